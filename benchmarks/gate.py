@@ -0,0 +1,250 @@
+"""Compares benchmark results for the core scenarios against a stored baseline, failing on regressions"""
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, Union
+
+import click
+
+from benchmarks.run import run_scenario, warm_up, results_as_dict, SCENARIOS, CLI_MODULES, BenchmarkResult
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+
+GATE_SCENARIOS: Dict[str, int] = {
+    'create_schema': 20,
+    'export': 20,
+    'generate_populate_concise': 2,
+    'generate_populate_exhaustive': 2,
+    'cli_cold_start': 1,
+    'cli_import': 1,
+}
+"""Core scenarios, and the scale at which each is run"""
+
+IMPORT_SCENARIO = 'cli_import'
+"""Time taken to import each command line module, beyond importing linkml_runtime itself"""
+
+MEASURE_IMPORT = '''
+import json, time
+import linkml_runtime, linkml_runtime.dumpers, linkml_runtime.utils.schemaview
+start = time.perf_counter()
+import {module}
+print(json.dumps(time.perf_counter() - start))
+'''
+
+
+@dataclass
+class Comparison:
+    """
+    Current time of a scenario compared to its baseline
+    """
+    scenario: str
+    scale: int
+    baseline: Optional[float]
+    """Baseline time in seconds; None if the scenario is not in the baseline"""
+
+    current: float
+
+    phases: Dict[str, Tuple[Optional[float], Optional[float]]] = field(default_factory=dict)
+    """Baseline and current time of each phase; None if the phase was not run"""
+
+    @property
+    def ratio(self) -> Optional[float]:
+        return self.current / self.baseline if self.baseline else None
+
+    def is_regression(self, threshold: float, min_delta: float = 0.0) -> bool:
+        """
+        True if the current time exceeds the baseline by more than the threshold
+
+        :param threshold: maximum ratio of current to baseline time, e.g. 1.5
+        :param min_delta: differences of fewer seconds than this are never regressions, as they are mostly noise
+        :return:
+        """
+        if self.baseline is None:
+            return False
+        return self.current > self.baseline * threshold and self.current - self.baseline >= min_delta
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Comparison]:
+    """
+    Compares each current result with the baseline result for the same scenario and scale
+
+    :param baseline: results, as returned by :ref:`run_benchmarks`
+    :param current: results, as returned by :ref:`run_benchmarks`
+    :return: one comparison per current result
+    """
+    baseline_results = {(r['scenario'], r['scale']): r for r in baseline['results']}
+    comparisons = []
+    for r in current['results']:
+        b = baseline_results.get((r['scenario'], r['scale']))
+        c = Comparison(r['scenario'], r['scale'], b['time'] if b else None, r['time'])
+        b_phases = b['phases'] if b else {}
+        for phase in list(b_phases) + [p for p in r['phases'] if p not in b_phases]:
+            c.phases[phase] = (b_phases.get(phase), r['phases'].get(phase))
+        comparisons.append(c)
+    return comparisons
+
+
+def _delta(baseline: Optional[float], current: Optional[float]) -> str:
+    if baseline is None or current is None:
+        return '-'
+    if not baseline:
+        return '+inf%' if current else '0.0%'
+    return f'{100 * (current - baseline) / baseline:+.1f}%'
+
+
+def _secs(t: Optional[float]) -> str:
+    return '-' if t is None else f'{t:.3f}'
+
+
+def format_comparisons(comparisons: List[Comparison], threshold: float, min_delta: float = 0.0) -> str:
+    """
+    Formats comparisons as a human-readable report, with the delta of each phase
+
+    :param comparisons:
+    :param threshold: see :ref:`Comparison.is_regression`
+    :param min_delta: see :ref:`Comparison.is_regression`
+    :return:
+    """
+    lines = [f'{"scenario / phase":<40} {"baseline (s)":>12} {"current (s)":>12} {"delta":>9}']
+    for c in comparisons:
+        status = 'REGRESSION' if c.is_regression(threshold, min_delta) else ('NEW' if c.baseline is None else 'ok')
+        lines.append(f'{f"{c.scenario} (scale {c.scale})":<40} {_secs(c.baseline):>12} {_secs(c.current):>12} '
+                     f'{_delta(c.baseline, c.current):>9}  {status}')
+        for phase, (b, cur) in c.phases.items():
+            lines.append(f'{"  " + phase:<40} {_secs(b):>12} {_secs(cur):>12} {_delta(b, cur):>9}')
+    return '\n'.join(lines)
+
+
+def measure_import_time(repeat: int = 3) -> BenchmarkResult:
+    """
+    Imports each command line module in a new interpreter, after linkml_runtime; each is a phase
+
+    Unlike the cold start, this excludes starting the interpreter and importing linkml_runtime,
+    so that slow imports added to schemasheets stand out.
+
+    :param repeat: number of timed repetitions
+    :return:
+    """
+    result = BenchmarkResult(IMPORT_SCENARIO, 1, {}, 0)
+    for _ in range(repeat):
+        phases = {}
+        for name, module in CLI_MODULES.items():
+            out = subprocess.run([sys.executable, '-c', MEASURE_IMPORT.format(module=module)],
+                                 check=True, capture_output=True, text=True).stdout
+            phases[name] = json.loads(out.splitlines()[-1])
+        result.times.append(sum(phases.values()))
+        if result.time == result.times[-1]:
+            result.phases = phases
+    return result
+
+
+def run_gate(scenarios: Dict[str, int], repeat: int = 3, workdir: Union[str, Path] = None) -> Dict[str, Any]:
+    """
+    Runs each scenario at its scale, measuring time only
+
+    :param scenarios: mapping between scenario names and scales
+    :param repeat: number of timed repetitions; the fastest is used
+    :param workdir: directory in which sheets and outputs are written; a temporary directory if not set
+    :return: results, in the same form as :ref:`run_benchmarks`
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = Path(workdir or tmpdir)
+        warm_up(workdir)
+        results = []
+        for name, scale in scenarios.items():
+            logging.info(f'Running {name} at scale {scale}')
+            if name == IMPORT_SCENARIO:
+                results.append(measure_import_time(repeat=repeat))
+            else:
+                results.append(run_scenario(name, scale, workdir, repeat=repeat, memory=False))
+    return results_as_dict(results)
+
+
+@click.command()
+@click.option("--baseline", "-b",
+              default=str(DEFAULT_BASELINE),
+              show_default=True,
+              help="Baseline results to compare against")
+@click.option("--threshold", "-t",
+              type=float,
+              default=1.5,
+              show_default=True,
+              help="Fail if a scenario takes more than this many times its baseline time")
+@click.option("--min-delta",
+              type=float,
+              default=0.05,
+              show_default=True,
+              help="Differences of fewer seconds than this are never treated as regressions")
+@click.option("--repeat", "-r",
+              type=int,
+              default=3,
+              show_default=True,
+              help="Number of timed repetitions; the fastest is compared")
+@click.option("--scenario", "-S",
+              type=click.Choice(list(SCENARIOS) + [IMPORT_SCENARIO]),
+              multiple=True,
+              help="Only run these scenarios")
+@click.option("--update/--no-update",
+              default=False,
+              show_default=True,
+              help="Replace the baseline with the current results, instead of comparing")
+@click.option("-o", "--output",
+              help="Write current results as JSON to this file")
+@click.option("-v", "--verbose", count=True)
+def cli(baseline: str, threshold: float, min_delta: float, repeat: int, scenario, update: bool, output: str,
+        verbose: int):
+    """
+    Compare the performance of the core scenarios against a baseline
+
+    Exits with a non-zero status if any scenario is slower than the threshold allows.
+    Baselines are only comparable on the same machine; create one with --update:
+
+        python -m benchmarks.gate --update
+
+    Then, e.g. after upgrading dependencies:
+
+        python -m benchmarks.gate --threshold 1.5
+    """
+    if verbose >= 1:
+        logging.basicConfig(level=logging.INFO)
+    else:
+        logging.disable(logging.WARNING)
+    baseline_path = Path(baseline)
+    baseline_results = None
+    if update or not baseline_path.exists():
+        scenarios = dict(GATE_SCENARIOS)
+    else:
+        with open(baseline_path, encoding='utf-8') as stream:
+            baseline_results = json.load(stream)
+        # use the same scales as the baseline
+        scenarios = {r['scenario']: r['scale'] for r in baseline_results['results']}
+    if scenario:
+        scenarios = {k: v for k, v in scenarios.items() if k in scenario}
+    current = run_gate(scenarios, repeat=repeat)
+    if output:
+        with open(output, 'w', encoding='utf-8') as stream:
+            json.dump(current, stream, indent=2)
+            stream.write('\n')
+    if baseline_results is None:
+        with open(baseline_path, 'w', encoding='utf-8') as stream:
+            json.dump(current, stream, indent=2)
+            stream.write('\n')
+        click.echo(f'Wrote baseline to {baseline_path}')
+        return
+    comparisons = compare(baseline_results, current)
+    click.echo(f'Baseline versions: {baseline_results["versions"]}')
+    click.echo(f'Current versions:  {current["versions"]}')
+    click.echo(format_comparisons(comparisons, threshold, min_delta))
+    regressions = [c for c in comparisons if c.is_regression(threshold, min_delta)]
+    if regressions:
+        click.echo(f'{len(regressions)} scenarios are more than {threshold}x slower than the baseline: '
+                   f'{", ".join(c.scenario for c in regressions)}', err=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    cli()
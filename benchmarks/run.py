@@ -0,0 +1,344 @@
+"""Runs benchmarks of conversion and export on synthetic schema sheets of increasing size"""
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any, Union
+
+import click
+from linkml_runtime.dumpers import yaml_dumper
+from linkml_runtime.utils.schemaview import SchemaView
+
+from benchmarks.synthetic import SyntheticSheetSpec, write_schemasheets
+from schemasheets import generate_populate
+from schemasheets.schema_exporter import SchemaExporter
+from schemasheets.schemamaker import SchemaMaker
+from schemasheets.utils.profiler import Profiler, package_versions, profile_phase
+
+Run = Callable[[Optional[Profiler]], Any]
+"""A prepared benchmark run; called with a profiler, or None when measuring memory"""
+
+Scenario = Callable[[List[Path], Path], Run]
+"""Prepares a run from the synthetic sheets and a working directory; preparation is not timed"""
+
+
+def _create_schema(sheets: List[Path], profiler: Optional[Profiler] = None):
+    return SchemaMaker(profiler=profiler).create_schema([str(p) for p in sheets])
+
+
+def _export(schema, spec: Path, to_file: Path, profiler: Optional[Profiler] = None) -> None:
+    SchemaExporter(profiler=profiler).export(SchemaView(schema), specification=str(spec), to_file=str(to_file))
+
+
+def create_schema_scenario(sheets: List[Path], workdir: Path) -> Run:
+    """
+    Translates all sheets into a schema
+    """
+    return lambda profiler: _create_schema(sheets, profiler)
+
+
+def repair_schema_scenario(sheets: List[Path], workdir: Path) -> Run:
+    """
+    Repairs a translated schema
+    """
+    sm = SchemaMaker()
+    schema = sm.create_schema([str(p) for p in sheets])
+
+    def run(profiler: Optional[Profiler]):
+        sm.profiler = profiler
+        return sm.repair_schema(schema)
+
+    return run
+
+
+def export_scenario(sheets: List[Path], workdir: Path) -> Run:
+    """
+    Exports a translated schema using the classes and slots sheet as the specification
+    """
+    schema = _create_schema(sheets)
+    return lambda profiler: _export(schema, sheets[2], workdir / 'export.tsv', profiler)
+
+
+def round_trip_scenario(sheets: List[Path], workdir: Path) -> Run:
+    """
+    Translates all sheets, exports the schema back to sheets, and translates the exported sheets
+    """
+    schema_sheet, prefixes_sheet, elements_sheet, enums_sheet = sheets
+
+    def run(profiler: Optional[Profiler]):
+        schema = _create_schema(sheets, profiler)
+        exported = [workdir / 'roundtrip-elements.tsv', workdir / 'roundtrip-enums.tsv']
+        _export(schema, elements_sheet, exported[0], profiler)
+        _export(schema, enums_sheet, exported[1], profiler)
+        return _create_schema([schema_sheet, prefixes_sheet] + exported, profiler)
+
+    return run
+
+
+def generate_populate_scenario(style: str) -> Scenario:
+    """
+    Generates a slot usage template for a translated schema, in the given report style
+
+    :param style: concise or exhaustive
+    :return:
+    """
+    def scenario(sheets: List[Path], workdir: Path) -> Run:
+        source_path = workdir / 'source.yaml'
+        yaml_dumper.dump(_create_schema(sheets), str(source_path))
+
+        def run(profiler: Optional[Profiler]):
+            with profile_phase(profiler, 'generate_populate'):
+                generate_populate.cli.callback(source_path=str(source_path),
+                                               output_path=str(workdir / f'template-{style}.tsv'),
+                                               debug_report_path=None, verbose=False, log_file=None,
+                                               report_style=style)
+
+        return run
+
+    return scenario
+
+
+CLI_MODULES = {
+    'sheets2linkml': 'schemasheets.schemamaker',
+    'linkml2sheets': 'schemasheets.schema_exporter',
+    'sheets2project': 'schemasheets.sheets_to_project',
+    'linkml2schemasheets-template': 'schemasheets.generate_populate',
+}
+"""Module of each command line entry point"""
+
+
+def cli_cold_start_scenario(sheets: List[Path], workdir: Path) -> Run:
+    """
+    Starts each command line entry point in a new interpreter, showing its help; each is a phase
+    """
+    def run(profiler: Optional[Profiler]):
+        for name, module in CLI_MODULES.items():
+            with profile_phase(profiler, name):
+                subprocess.run([sys.executable, '-m', module, '--help'], check=True, stdout=subprocess.DEVNULL)
+
+    return run
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    'create_schema': create_schema_scenario,
+    'repair_schema': repair_schema_scenario,
+    'export': export_scenario,
+    'round_trip': round_trip_scenario,
+    'generate_populate_concise': generate_populate_scenario('concise'),
+    'generate_populate_exhaustive': generate_populate_scenario('exhaustive'),
+    'cli_cold_start': cli_cold_start_scenario,
+}
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Result of running one scenario at one scale
+    """
+    scenario: str
+    scale: int
+    spec: Dict[str, int]
+    rows: int
+    """Number of rows in the synthetic sheets"""
+
+    times: List[float] = field(default_factory=list)
+    """Wall time of each repetition, in seconds"""
+
+    peak_memory: Optional[int] = None
+    """Peak bytes allocated during a separate run with memory tracing"""
+
+    phases: Dict[str, float] = field(default_factory=dict)
+    """Time spent in each phase during the fastest repetition"""
+
+    @property
+    def time(self) -> float:
+        return min(self.times)
+
+    def as_dict(self) -> Dict[str, Any]:
+        obj = vars(self).copy()
+        obj['time'] = self.time
+        return obj
+
+
+def _count_rows(sheets: List[Path]) -> int:
+    n = 0
+    for p in sheets:
+        with open(p, encoding='utf-8') as stream:
+            n += sum(1 for _ in stream)
+    return n
+
+
+def run_scenario(name: str, scale: int, workdir: Union[str, Path], repeat: int = 3, memory: bool = True,
+                 **spec_args: Any) -> BenchmarkResult:
+    """
+    Runs a scenario on synthetic sheets at the given scale
+
+    Each repetition is timed with a profiler that does not trace memory, as tracing slows down allocation;
+    if memory is True, peak memory is measured in an additional run.
+
+    :param name: key in SCENARIOS
+    :param scale: see :ref:`SyntheticSheetSpec.at_scale`
+    :param workdir: directory in which sheets and outputs are written
+    :param repeat: number of timed repetitions
+    :param memory: if True, measure peak memory
+    :param spec_args: overrides for the synthetic sheets
+    :return:
+    """
+    scenario = SCENARIOS[name]
+    spec = SyntheticSheetSpec.at_scale(scale, **spec_args)
+    workdir = Path(workdir) / f'scale-{scale}'
+    sheets = write_schemasheets(spec, workdir)
+    result = BenchmarkResult(name, scale, spec.as_dict(), _count_rows(sheets))
+    best = None
+    for _ in range(repeat):
+        run = scenario(sheets, workdir)
+        with Profiler(track_memory=False) as profiler:
+            run(profiler)
+        result.times.append(profiler.total_time)
+        if best is None or profiler.total_time < best.total_time:
+            best = profiler
+    result.phases = {p.name: p.wall_time for p in best.phases.values()}
+    if memory:
+        run = scenario(sheets, workdir)
+        tracemalloc.start()
+        try:
+            run(None)
+            result.peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(scenarios: List[str], scales: List[int], workdir: Union[str, Path] = None, repeat: int = 3,
+                   memory: bool = True, **spec_args: Any) -> Dict[str, Any]:
+    """
+    Runs each scenario at each scale, giving time and memory curves
+
+    :param scenarios: keys in SCENARIOS
+    :param scales: see :ref:`SyntheticSheetSpec.at_scale`
+    :param workdir: directory in which sheets and outputs are written; a temporary directory if not set
+    :param repeat: number of timed repetitions of each scenario
+    :param memory: if True, measure peak memory
+    :param spec_args: overrides for the synthetic sheets
+    :return: JSON-serializable results
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = Path(workdir or tmpdir)
+        warm_up(workdir)
+        results = []
+        for name in scenarios:
+            for scale in scales:
+                logging.info(f'Running {name} at scale {scale}')
+                results.append(run_scenario(name, scale, workdir, repeat=repeat, memory=memory, **spec_args))
+    return results_as_dict(results)
+
+
+def warm_up(workdir: Path) -> None:
+    """
+    Loads the metamodel and other one-off state, so it is not included in the first scenario
+
+    :param workdir:
+    :return:
+    """
+    create_schema_scenario(write_schemasheets(SyntheticSheetSpec.at_scale(1), workdir / 'warmup'), workdir)(None)
+
+
+def results_as_dict(results: List[BenchmarkResult]) -> Dict[str, Any]:
+    """
+    Returns results as a JSON-serializable dictionary, including the environment in which they were run
+
+    :param results:
+    :return:
+    """
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': sys.version.split()[0],
+        'versions': package_versions(),
+        'results': [r.as_dict() for r in results],
+    }
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """
+    Formats benchmark results as a human-readable table
+
+    :param results: as returned by :ref:`run_benchmarks`
+    :return:
+    """
+    lines = [f'{"scenario":<30} {"scale":>6} {"rows":>8} {"time (s)":>10} {"rows/s":>10} {"peak memory (MiB)":>18}']
+    for r in results['results']:
+        mem = '-' if r['peak_memory'] is None else f'{r["peak_memory"] / (1 << 20):.1f}'
+        lines.append(f'{r["scenario"]:<30} {r["scale"]:>6} {r["rows"]:>8} {r["time"]:>10.3f} '
+                     f'{r["rows"] / r["time"]:>10.0f} {mem:>18}')
+    return '\n'.join(lines)
+
+
+@click.command()
+@click.option("--scenario", "-S",
+              type=click.Choice(list(SCENARIOS)),
+              multiple=True,
+              help="Scenario to run; if not set, all scenarios are run")
+@click.option("--scale",
+              type=int,
+              multiple=True,
+              default=[1, 5, 20],
+              show_default=True,
+              help="Size of the synthetic sheets; 1 is about 200 rows, and size grows linearly")
+@click.option("--repeat", "-r",
+              type=int,
+              default=3,
+              show_default=True,
+              help="Number of timed repetitions; the fastest is reported")
+@click.option("--memory/--no-memory",
+              default=True,
+              show_default=True,
+              help="Measure peak memory in an additional run of each scenario")
+@click.option("--annotations",
+              type=int,
+              default=5,
+              show_default=True,
+              help="Number of annotation columns")
+@click.option("--permissible-values",
+              type=int,
+              default=50,
+              show_default=True,
+              help="Number of permissible values in each enum")
+@click.option("--seed",
+              type=int,
+              default=0,
+              show_default=True)
+@click.option("--workdir",
+              help="Directory in which to write synthetic sheets and outputs; a temporary directory if not set")
+@click.option("-o", "--output",
+              help="Write results as JSON to this file")
+@click.option("-v", "--verbose", count=True)
+def cli(scenario, scale, repeat: int, memory: bool, annotations: int, permissible_values: int, seed: int,
+        workdir: str, output: str, verbose: int):
+    """
+    Benchmark conversion and export of synthetic schema sheets
+
+    Example:
+
+        python -m benchmarks.run --scale 1 --scale 10 -o results.json
+    """
+    if verbose >= 1:
+        logging.basicConfig(level=logging.INFO)
+    else:
+        # conversion of synthetic sheets logs warnings that are expected, and would distort timings
+        logging.disable(logging.WARNING)
+    results = run_benchmarks(list(scenario or SCENARIOS), list(scale), workdir=workdir, repeat=repeat, memory=memory,
+                             annotations=annotations, permissible_values=permissible_values, seed=seed)
+    click.echo(format_results(results))
+    if output:
+        with open(output, 'w', encoding='utf-8') as stream:
+            json.dump(results, stream, indent=2)
+            stream.write('\n')
+
+
+if __name__ == '__main__':
+    cli()
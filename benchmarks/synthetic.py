@@ -0,0 +1,138 @@
+"""Generates synthetic schema sheets of configurable size, for benchmarking"""
+import csv
+import random
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import List, Dict, Union, Any
+
+SCHEMA_NAME = 'synthetic'
+PREFIX = 'syn'
+CARDINALITIES = ['0..1', '1', '0..*', '1..*', 'M', 'O', 'R']
+BASE_RANGES = ['string', 'integer', 'float', 'boolean', 'date', 'uriorcurie']
+
+
+@dataclass
+class SyntheticSheetSpec:
+    """
+    Size of a synthetic set of schema sheets
+
+    The same spec and seed always generate the same sheets.
+    """
+    classes: int = 10
+    """Number of classes"""
+
+    slots: int = 20
+    """Number of top level slots"""
+
+    usages: int = 50
+    """Number of rows giving the usage of a slot in a class; at most classes * slots"""
+
+    enums: int = 2
+    """Number of enums"""
+
+    permissible_values: int = 50
+    """Number of permissible values in each enum"""
+
+    annotations: int = 5
+    """Number of annotation columns"""
+
+    seed: int = 0
+
+    @classmethod
+    def at_scale(cls, scale: int, **kwargs: Any) -> 'SyntheticSheetSpec':
+        """
+        A spec in which the number of each kind of element grows linearly with the scale
+
+        :param scale: 1 gives a small schema of about 200 rows
+        :param kwargs: overrides
+        :return:
+        """
+        params = dict(classes=10 * scale, slots=20 * scale, usages=50 * scale, enums=2 * scale)
+        params.update(kwargs)
+        return cls(**params)
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _write_tsv(path: Path, rows: List[List[str]]) -> None:
+    with open(path, 'w', encoding='utf-8', newline='') as stream:
+        csv.writer(stream, delimiter='\t', lineterminator='\n').writerows(rows)
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return ' '.join(rng.choice(['alpha', 'beta', 'gamma', 'delta', 'sample', 'value', 'measured', 'site', 'time',
+                                'quantity', 'of', 'the', 'a', 'for']) for _ in range(n))
+
+
+def write_schemasheets(spec: SyntheticSheetSpec, directory: Union[str, Path]) -> List[Path]:
+    """
+    Writes a set of schema sheets: schema metadata and prefixes, classes and slots, and enums
+
+    The classes and slots sheet has a column for each of the common metamodel slots,
+    plus the given number of annotation columns; it can also be used as an export specification.
+
+    :param spec: size of the schema
+    :param directory: created if it does not exist
+    :return: paths of the sheets, in the order they should be translated
+    """
+    if spec.usages > spec.classes * spec.slots:
+        raise ValueError(f'Cannot have {spec.usages} usages of {spec.slots} slots in {spec.classes} classes')
+    rng = random.Random(spec.seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    class_names = [f'Class{i}' for i in range(spec.classes)]
+    slot_names = [f'slot_{i}' for i in range(spec.slots)]
+    enum_names = [f'Enum{i}' for i in range(spec.enums)]
+    ranges = BASE_RANGES + class_names + enum_names
+
+    schema_path = directory / 'schema.tsv'
+    _write_tsv(schema_path, [
+        ['schema', 'uri', 'description', 'prefix'],
+        ['> schema', 'id', 'description', 'default_prefix'],
+        [SCHEMA_NAME, f'https://example.org/{SCHEMA_NAME}', 'A generated schema for benchmarking', PREFIX],
+    ])
+    prefixes_path = directory / 'prefixes.tsv'
+    _write_tsv(prefixes_path, [
+        ['prefix', 'URI'],
+        ['> prefix', 'prefix_reference'],
+        [PREFIX, f'https://example.org/{SCHEMA_NAME}/'],
+        ['ex', 'https://example.org/terms/'],
+    ])
+
+    annotation_columns = [f'ann_{i}' for i in range(spec.annotations)]
+    elements_path = directory / 'elements.tsv'
+    rows = [
+        ['class', 'slot', 'parent', 'range', 'cardinality', 'description', 'mapping', 'aliases'] + annotation_columns,
+        ['> class', 'slot', 'is_a', 'range', 'cardinality', 'description', 'exact_mappings', 'aliases'] +
+        ['annotations'] * spec.annotations,
+        ['>', '', '', '', '', '', 'curie_prefix: ex', "internal_separator: '|'"] +
+        [f'inner_key: {c}' for c in annotation_columns],
+    ]
+
+    def annotation_values() -> List[str]:
+        return [_words(rng, 2) if rng.random() < 0.5 else '' for _ in annotation_columns]
+
+    for i, s in enumerate(slot_names):
+        rows.append(['', s, '', rng.choice(ranges), rng.choice(CARDINALITIES), _words(rng, 8), f'term{i}',
+                     '|'.join(f'{s}_alias{j}' for j in range(rng.randint(0, 2)))] + annotation_values())
+    for i, c in enumerate(class_names):
+        parent = class_names[rng.randrange(i)] if i and rng.random() < 0.7 else ''
+        rows.append([c, '', parent, '', '', _words(rng, 10), f'Class{i}', ''] + annotation_values())
+    for pair in sorted(rng.sample(range(spec.classes * spec.slots), spec.usages)):
+        c, s = class_names[pair // spec.slots], slot_names[pair % spec.slots]
+        rows.append([c, s, '', rng.choice(ranges) if rng.random() < 0.3 else '', rng.choice(CARDINALITIES),
+                     _words(rng, 6), '', ''] + annotation_values())
+    _write_tsv(elements_path, rows)
+
+    enums_path = directory / 'enums.tsv'
+    rows = [
+        ['enum', 'value', 'meaning', 'description'],
+        ['> enum', 'permissible_value', 'meaning', 'description'],
+    ]
+    for e in enum_names:
+        rows.append([e, '', '', _words(rng, 6)])
+        for j in range(spec.permissible_values):
+            rows.append([e, f'{e.upper()}_PV{j}', f'ex:{e}_{j}', _words(rng, 4)])
+    _write_tsv(enums_path, rows)
+    return [schema_path, prefixes_path, elements_path, enums_path]
@@ -84,6 +84,7 @@ class ColumnSettings(YAMLRoot):
     applies_to_slot: Optional[str] = None
     tag: Optional[str] = None
     internal_separator: Optional[str] = None
+    cardinality_vocabulary: Optional[str] = None
 
     def __post_init__(self, *_: List[str], **kwargs: Dict[str, Any]):
         if self.curie_prefix is not None and not isinstance(self.curie_prefix, str):
@@ -118,6 +119,9 @@ class ColumnSettings(YAMLRoot):
         if self.internal_separator is not None and not isinstance(self.internal_separator, str):
             self.internal_separator = str(self.internal_separator)
 
+        if self.cardinality_vocabulary is not None and not isinstance(self.cardinality_vocabulary, str):
+            self.cardinality_vocabulary = str(self.cardinality_vocabulary)
+
         super().__post_init__(**kwargs)
 
 
@@ -281,3 +285,6 @@ slots.columnSettings__tag = Slot(uri=SCHEMASHEETS.tag, name="columnSettings__tag
 
 slots.columnSettings__internal_separator = Slot(uri=SCHEMASHEETS.internal_separator, name="columnSettings__internal_separator", curie=SCHEMASHEETS.curie('internal_separator'),
                    model_uri=SCHEMASHEETS.columnSettings__internal_separator, domain=None, range=Optional[str])
+
+slots.columnSettings__cardinality_vocabulary = Slot(uri=SCHEMASHEETS.cardinality_vocabulary, name="columnSettings__cardinality_vocabulary", curie=SCHEMASHEETS.curie('cardinality_vocabulary'),
+                   model_uri=SCHEMASHEETS.columnSettings__cardinality_vocabulary, domain=None, range=Optional[str])
@@ -1,9 +1,12 @@
+import contextlib
 import csv
 import logging
 import sys
+import time
+from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Any, List, Optional, TextIO, Union
+from typing import Dict, Any, List, Optional, TextIO, Union, Tuple, Callable
 
 import click
 from linkml_runtime.linkml_model import Element, SlotDefinition, SubsetDefinition, ClassDefinition, EnumDefinition, \
@@ -15,16 +18,180 @@ from linkml_runtime.utils.schemaview import SchemaView
 from schemasheets.conf.configschema import ColumnSettings
 from schemasheets.schemamaker import SchemaMaker
 from schemasheets.schemasheet_datamodel import TableConfig, T_CLASS, T_SLOT, SchemaSheet, T_ENUM, T_PV, T_TYPE, \
-    T_SUBSET, T_PREFIX, T_SCHEMA
+    T_SUBSET, T_PREFIX, T_SCHEMA, COL_NAME, ColumnConfig
+from schemasheets.utils.fileutils import atomic_file
+from schemasheets.utils.profiler import Profiler, profile_phase, profile_sheet
 
 ROW = Dict[str, Any]
 
 
-def _configuration_has_primary_keys_for(table_config: TableConfig, metatype: str) -> bool:
-    for col_name, col_config in table_config.columns.items():
-        if col_config.is_element_type and col_config.maps_to == metatype:
-            return True
-    return False
+EXPORTED_ELEMENT_TYPES = {
+    T_CLASS: ClassDefinition,
+    T_SLOT: SlotDefinition,
+    T_TYPE: TypeDefinition,
+    T_SUBSET: SubsetDefinition,
+    T_ENUM: EnumDefinition,
+    T_PV: PermissibleValue,
+    T_PREFIX: Prefix,
+    T_SCHEMA: SchemaDefinition,
+}
+"""Class of the elements identified by each type of element column"""
+
+PARENT_ELEMENT_TYPES = [T_CLASS, T_ENUM]
+"""Types of element columns that can also identify a parent; slots MAY be contextualized by classes,
+and permissible values MUST be contextualized by enums"""
+
+Renderer = Callable[[Any], Optional[str]]
+"""A function that renders the value of a metaslot as a cell for a particular column, or None if the cell is empty"""
+
+DEFAULT_SEPARATOR = '|'
+"""Separator between the values of a multivalued metaslot, if the column has no internal_separator"""
+
+
+def compile_renderer(column_config: ColumnConfig) -> Renderer:
+    """
+    Compiles a renderer for values in a column mapped to a metaslot; the inverse of :ref:`compile_normalizer`
+
+    All decisions that depend only on the column configuration (examples, inner key, curie prefix,
+    separator) are made once here, rather than per value. Each value of a multivalued metaslot is
+    rendered once, and values that render as None are left out.
+
+    :param column_config:
+    :return: function mapping the value of the metaslot to a cell value
+    """
+    settings = column_config.settings
+    inner_key = settings.inner_key
+    separator = settings.internal_separator or DEFAULT_SEPARATOR
+    if column_config.maps_to == 'examples':
+        def render_atom(v: Any) -> Optional[str]:
+            if isinstance(v, Example):
+                return v.value
+            raise ValueError(f"Expected Example, got {type(v)} for {v}")
+    elif inner_key:
+        def render_atom(v: Any) -> Optional[str]:
+            if isinstance(v, Annotation):
+                return v.value if v.tag == inner_key else None
+            v = getattr(v, inner_key, None)
+            if isinstance(v, bool):
+                return str(v).lower()
+            return v
+    elif settings.curie_prefix:
+        pfx = f'{settings.curie_prefix}:'
+
+        def render_atom(v: Any) -> Optional[str]:
+            if v.startswith(pfx):
+                return v.replace(pfx, '')
+            return None
+    else:
+        def render_atom(v: Any) -> Optional[str]:
+            if isinstance(v, bool):
+                return str(v).lower()
+            return v
+
+    def render(v: Any) -> Optional[str]:
+        if v is None or v == [] or v == {}:
+            return None
+        # map the value (which may be a collection or an object) to a flat string representation
+        if isinstance(v, (list, dict)):
+            rendered = [render_atom(v1) for v1 in (v.values() if isinstance(v, dict) else v)]
+            v = separator.join([str(r) for r in rendered if r is not None])
+            return v if v != '' else None
+        v = render_atom(v)
+        return str(v) if v is not None else None
+
+    return render
+
+
+PlanColumn = Tuple[COL_NAME, Optional[str], Optional[Renderer]]
+"""A column of an element plan: name, and for a metaslot column, the attribute holding the value of the metaslot
+and the renderer for the column; both are None for the primary key columns"""
+
+
+@dataclass
+class ElementPlan:
+    """
+    Columns used to export elements of one class, in the context of one class of parent
+    """
+    pk_col: Optional[COL_NAME] = None
+    """Column holding the name of the element; elements without one are not exported"""
+
+    parent_pk_col: Optional[COL_NAME] = None
+    """Column holding the name of the parent"""
+
+    columns: List[PlanColumn] = field(default_factory=list)
+    """Columns to populate, in the order of the table"""
+
+
+@dataclass
+class ExportPlan:
+    """
+    Columns used to export each type of element with a table configuration
+
+    The plan is computed once per table configuration, so that exporting an element only visits
+    the columns that it populates.
+    """
+    element_type_columns: List[Tuple[COL_NAME, str]]
+    """Columns that hold the name of an element, and the type of element for each"""
+
+    metaslot_columns: Dict[COL_NAME, Tuple[str, Renderer]]
+    """Columns mapped to a metaslot, the attribute of the element that holds the value of each,
+    and the renderer for each"""
+
+    table_config: TableConfig
+
+    element_plans: Dict[Tuple[type, Optional[type]], ElementPlan] = field(default_factory=dict)
+
+    @classmethod
+    def from_table_config(cls, table_config: TableConfig) -> 'ExportPlan':
+        element_type_columns = []
+        metaslot_columns = {}
+        for col_name, col_config in table_config.columns.items():
+            if col_config.is_element_type:
+                t = col_config.maps_to
+                if t not in EXPORTED_ELEMENT_TYPES:
+                    raise AssertionError(f"Unexpected type: {t}")
+                element_type_columns.append((col_name, t))
+            if col_config.metaslot:
+                metaslot_columns[col_name] = (underscore(col_config.metaslot.name), compile_renderer(col_config))
+            elif not col_config.is_element_type:
+                logging.info(f'IGNORING: {col_name} // {col_config}')
+        return cls(element_type_columns, metaslot_columns, table_config)
+
+    def element_plan(self, element_class: type, parent_class: Optional[type] = None) -> ElementPlan:
+        """
+        Returns the plan for exporting elements of a class, computing it on first use
+
+        :param element_class: e.g. SlotDefinition
+        :param parent_class: class of the contextual element, e.g. ClassDefinition for slot usages
+        :return:
+        """
+        key = (element_class, parent_class)
+        plan = self.element_plans.get(key)
+        if plan is not None:
+            return plan
+        plan = ElementPlan()
+        for col_name, t in self.element_type_columns:
+            if issubclass(element_class, EXPORTED_ELEMENT_TYPES[t]):
+                plan.pk_col = col_name
+            if t in PARENT_ELEMENT_TYPES and parent_class is not None and \
+                    issubclass(parent_class, EXPORTED_ELEMENT_TYPES[t]):
+                plan.parent_pk_col = col_name
+        for col_name in self.table_config.columns:
+            if col_name in self.metaslot_columns:
+                plan.columns.append((col_name, *self.metaslot_columns[col_name]))
+            elif col_name in (plan.pk_col, plan.parent_pk_col):
+                plan.columns.append((col_name, None, None))
+        self.element_plans[key] = plan
+        return plan
+
+    def exports(self, element_class: type) -> bool:
+        """
+        True if standalone elements of a class are exported, i.e. there is a column holding their name
+
+        :param element_class:
+        :return:
+        """
+        return self.element_plan(element_class).pk_col is not None
 
 
 def get_fields(cls: type) -> List[str]:
@@ -102,74 +269,273 @@ def infer_descriptor_rows(table_config: TableConfig) -> List[ROW]:
     return descriptor_rows
 
 
+class RowSink(ABC):
+    """
+    Receives the rows of an exported sheet as they are generated, e.g. to write them to a file
+    """
+
+    def start(self, fieldnames: List[COL_NAME], descriptor_rows: List[ROW]) -> None:
+        """
+        Called once before any rows are written
+
+        :param fieldnames: names of the columns, in order
+        :param descriptor_rows: rows describing how columns map to the metamodel
+        :return:
+        """
+        pass
+
+    @abstractmethod
+    def write_row(self, row: ROW) -> None:
+        """
+        Called for each row, in order
+
+        :param row:
+        :return:
+        """
+
+    def close(self) -> None:
+        """
+        Called once after all rows are written, if the export succeeds
+        """
+        pass
+
+
+@dataclass
+class CsvRowSink(RowSink):
+    """
+    Writes rows to a stream as delimited text, as soon as they are generated
+    """
+    stream: TextIO
+    delimiter: str = '\t'
+    writer: csv.DictWriter = None
+
+    def start(self, fieldnames: List[COL_NAME], descriptor_rows: List[ROW]) -> None:
+        self.writer = csv.DictWriter(self.stream, delimiter=self.delimiter, fieldnames=fieldnames)
+        self.writer.writeheader()
+        self.writer.writerows(descriptor_rows)
+
+    def write_row(self, row: ROW) -> None:
+        self.writer.writerow(row)
+
+    def close(self) -> None:
+        self.stream.flush()
+
+
+@dataclass
+class ExportTarget:
+    """
+    A sheet to which a schema is exported: how elements map to rows, and where rows are written
+    """
+    name: str
+    """Specification path, or other name of the sheet, e.g. for profiling"""
+
+    table_config: TableConfig
+    descriptor_rows: List[ROW]
+    sink: RowSink = None
+
+    row_count: int = 0
+    """Number of rows written"""
+
+    wall_time: float = 0.0
+    """Seconds spent exporting elements to this sheet; only measured when profiling"""
+
+    @property
+    def plan(self) -> 'ExportPlan':
+        return SchemaExporter.export_plan(self.table_config)
+
+
+Specification = Union[str, TableConfig]
+"""Path of a specification sheet, or a table configuration"""
+
+Output = Union[str, Path, TextIO, RowSink]
+"""Path or open stream to which rows are written as delimited text, or a sink receiving rows"""
+
+
 @dataclass
 class SchemaExporter:
     """
     Exports a schema to Schema Sheets TSV format
+
+    Rows are passed to a :ref:`RowSink` as they are generated, so exporting takes constant memory.
+    Each export starts afresh, so one exporter can be used for several specifications.
     """
     schemamaker: SchemaMaker = field(default_factory=lambda: SchemaMaker())
     delimiter: str = field(default_factory=lambda: '\t')
     rows: List[ROW] = field(default_factory=lambda: [])
+    """Rows of the most recent export; only kept if keep_rows is set."""
+
+    keep_rows: bool = False
+    """If True, keep the rows of the most recent export in rows, e.g. for inspection."""
+
+    profiler: Profiler = None
+    """If set, records the time and memory used by each phase of export."""
 
-    def export(self, schemaview: SchemaView, to_file: Union[str, Path], specification: str = None,
-               table_config: TableConfig = None):
+    row_count: int = 0
+    """Number of rows generated by the current or most recent export, over all sheets."""
+
+    def export(self, schemaview: SchemaView, to_file: Union[str, Path, TextIO] = None, specification: str = None,
+               table_config: TableConfig = None, sink: RowSink = None):
         """
         Exports a schema to a schemasheets TSV
 
         EITHER a specification OR (a table_config and descriptor_rows) must be passed.
         This informs how schema elements are mapped to rows
 
+        EITHER to_file OR a sink must be passed.
+
         :param schemaview:
         :param specification:
-        :param to_file:
+        :param to_file: path, or open stream, to which rows are written as delimited text
         :param table_config:
+        :param sink: receives rows as they are generated, instead of writing them to to_file
         :return:
         """
+        if (to_file is None) == (sink is None):
+            raise ValueError("Must specify EITHER to_file OR sink")
+        if specification is None and table_config is None:
+            raise ValueError("Must specify EITHER specification OR table_config")
+        self.export_many(schemaview, [(specification if specification is not None else table_config,
+                                       to_file if sink is None else sink)])
+
+    def export_many(self, schemaview: SchemaView, exports: List[Tuple[Specification, Output]]):
+        """
+        Exports a schema to several schemasheets TSVs, in a single traversal of the schema
+
+        Each element is passed to every sheet whose specification has a row for it, so exporting to
+        many sheets costs about as much as exporting to one. Each sheet has the same rows as if it
+        were exported on its own.
 
-        if specification is not None:
-            schemasheet = SchemaSheet.from_csv(specification, delimiter=self.delimiter)
-            table_config = schemasheet.table_config
-            descriptor_rows = schemasheet.table_config_rows
-            logging.info(f'Remaining rows={len(schemasheet.rows)}')
-        elif table_config is not None:
-            descriptor_rows = infer_descriptor_rows(table_config)
+        All specifications are parsed before any output is opened. Outputs given as paths are written
+        to temporary files in the same directories, which only replace the outputs once all sheets
+        are exported, so a failed export never destroys an existing sheet.
+
+        :param schemaview:
+        :param exports: specification of each sheet, paired with its output
+        :return:
+        """
+        profiler = self.profiler
+        self.rows = []
+        self.row_count = 0
+        targets = []
+        for specification, output in exports:
+            name = str(specification if isinstance(specification, str) else output)
+            with profile_sheet(profiler, name), profile_phase(profiler, 'parse_specification'):
+                if isinstance(specification, TableConfig):
+                    table_config = specification
+                    descriptor_rows = infer_descriptor_rows(table_config)
+                else:
+                    schemasheet = SchemaSheet.from_csv(specification, delimiter=self.delimiter)
+                    table_config = schemasheet.table_config
+                    descriptor_rows = schemasheet.table_config_rows
+                    logging.info(f'Remaining rows={len(schemasheet.rows)}')
+            targets.append(ExportTarget(name, table_config, descriptor_rows))
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            with profile_phase(profiler, 'export_elements'):
+                for target, (_, output) in zip(targets, exports):
+                    target.sink = self._open_sink(output, stack)
+                    # rows are written as they are generated
+                    target.sink.start(list(target.table_config.columns.keys()), target.descriptor_rows)
+                self.export_elements(schemaview, targets)
+            with profile_phase(profiler, 'write'):
+                for target in targets:
+                    target.sink.close()
+                # replaces outputs given as paths with their temporary files
+                stack.close()
+        if profiler is not None:
+            self._attribute_time(targets, time.perf_counter() - start)
+        for target in targets:
+            with profile_sheet(profiler, target.name) as sheet_stats:
+                if sheet_stats is not None:
+                    sheet_stats.rows += target.row_count
+                    sheet_stats.wall_time += target.wall_time
+
+    @staticmethod
+    def _attribute_time(targets: List[ExportTarget], elapsed: float) -> None:
+        """
+        Splits the time of a fan-out export between its sheets
+
+        Each sheet is attributed the time spent exporting its own rows, and a share of the time spent
+        on work common to all sheets, such as traversing the schema and writing, in proportion to its rows.
+
+        :param targets:
+        :param elapsed: seconds spent exporting and writing all sheets
+        :return:
+        """
+        shared = max(elapsed - sum(t.wall_time for t in targets), 0.0)
+        total_rows = sum(t.row_count for t in targets)
+        for t in targets:
+            share = t.row_count / total_rows if total_rows else 1 / len(targets)
+            t.wall_time += shared * share
+
+    def _open_sink(self, output: Output, stack: contextlib.ExitStack) -> RowSink:
+        if isinstance(output, RowSink):
+            return output
+        if isinstance(output, (str, Path)):
+            # the output is only replaced if the stack exits without error
+            output = stack.enter_context(atomic_file(output, encoding='utf-8'))
+        return CsvRowSink(output, delimiter=self.delimiter)
+
+    def export_elements(self, schemaview: SchemaView, targets: List[ExportTarget]) -> None:
+        """
+        Exports each element of a schema to every target that has a row for it
+
+        :param schemaview:
+        :param targets:
+        :return:
+        """
+        if self.profiler is None:
+            export = self.export_element
         else:
-            raise ValueError("Must specify EITHER specification OR table_config")
-        for prefix in schemaview.schema.prefixes.values():
-            self.export_element(prefix, None, schemaview, table_config)
-        for slot in schemaview.all_slots().values():
-            self.export_element(slot, None, schemaview, table_config)
-        if _configuration_has_primary_keys_for(table_config, T_CLASS):
+            def export(element: Element, parent: Optional[Element], sv: SchemaView, target: ExportTarget) -> None:
+                start = time.perf_counter()
+                self.export_element(element, parent, sv, target)
+                target.wall_time += time.perf_counter() - start
+
+        def exporting(*element_classes) -> List[ExportTarget]:
+            # only elements of types that have a column for their name are visited
+            return [t for t in targets if any(t.plan.exports(c) for c in element_classes)]
+
+        prefix_targets = exporting(Prefix)
+        if prefix_targets:
+            for prefix in schemaview.schema.prefixes.values():
+                for t in prefix_targets:
+                    export(prefix, None, schemaview, t)
+        slot_targets = exporting(SlotDefinition)
+        if slot_targets:
+            for slot in schemaview.all_slots().values():
+                for t in slot_targets:
+                    export(slot, None, schemaview, t)
+        class_targets = exporting(ClassDefinition)
+        if class_targets:
             for cls in schemaview.all_classes().values():
-                self.export_element(cls, None, schemaview, table_config)
-                for att in cls.attributes.values():
-                    self.export_element(att, cls, schemaview, table_config)
-                for su in cls.slot_usage.values():
-                    self.export_element(su, cls, schemaview, table_config)
-        for e in schemaview.all_enums().values():
-            self.export_element(e, None, schemaview, table_config)
-            for pv in e.permissible_values.values():
-                self.export_element(pv, e, schemaview, table_config)
-        for typ in schemaview.all_types().values():
-            self.export_element(typ, None, schemaview, table_config)
-        for subset in schemaview.all_subsets().values():
-            self.export_element(subset, None, schemaview, table_config)
-
-        with open(to_file, 'w', encoding='utf-8') as stream:
-            writer = csv.DictWriter(
-                stream,
-                delimiter=self.delimiter,
-                fieldnames=table_config.columns.keys())
-            writer.writeheader()
-
-            for row in descriptor_rows:
-                writer.writerow(row)
-
-            for row in self.rows:
-                writer.writerow(row)
+                for t in class_targets:
+                    export(cls, None, schemaview, t)
+                    if t.plan.exports(SlotDefinition):
+                        for att in cls.attributes.values():
+                            export(att, cls, schemaview, t)
+                        for su in cls.slot_usage.values():
+                            export(su, cls, schemaview, t)
+        enum_targets = exporting(EnumDefinition, PermissibleValue)
+        if enum_targets:
+            for e in schemaview.all_enums().values():
+                for t in enum_targets:
+                    export(e, None, schemaview, t)
+                    for pv in e.permissible_values.values():
+                        export(pv, e, schemaview, t)
+        type_targets = exporting(TypeDefinition)
+        if type_targets:
+            for typ in schemaview.all_types().values():
+                for t in type_targets:
+                    export(typ, None, schemaview, t)
+        subset_targets = exporting(SubsetDefinition)
+        if subset_targets:
+            for subset in schemaview.all_subsets().values():
+                for t in subset_targets:
+                    export(subset, None, schemaview, t)
 
     def export_element(self, element: Element, parent: Optional[Element], schemaview: SchemaView,
-                       table_config: TableConfig):
+                       target: ExportTarget):
         """
         Translates an individual schema element to a row
 
@@ -182,146 +548,65 @@ class SchemaExporter:
         :param element: the element to be exported, e.g an instance of SlotDefinition, ClassDefinition, ...
         :param parent: contextual element; for slots, the parent may be a class; for permissible value, an Enum
         :param schemaview:
-        :param table_config:
+        :param target: sheet to which the row is written
         :return:
         """
 
-        # Step 1: determine both primary key (pk) column, a pk of any parent
-        pk_col = None
-        parent_pk_col = None
-        for col_name, col_config in table_config.columns.items():
-            if col_config.is_element_type:
-                t = col_config.maps_to
-                if t == T_CLASS:
-                    # slots MAY be contextualized by classes
-                    if isinstance(element, ClassDefinition):
-                        pk_col = col_name
-                    if isinstance(parent, ClassDefinition):
-                        parent_pk_col = col_name
-                elif t == T_SLOT:
-                    if isinstance(element, SlotDefinition):
-                        pk_col = col_name
-                    else:
-                        continue
-                elif t == T_TYPE:
-                    if isinstance(element, TypeDefinition):
-                        pk_col = col_name
-                    else:
-                        continue
-                elif t == T_SUBSET:
-                    if isinstance(element, SubsetDefinition):
-                        pk_col = col_name
-                    else:
-                        continue
-                elif t == T_ENUM:
-                    # permissible values MUST be contextualized by enums
-                    if isinstance(element, EnumDefinition):
-                        pk_col = col_name
-                    if isinstance(parent, EnumDefinition):
-                        parent_pk_col = col_name
-                elif t == T_PV:
-                    if isinstance(element, PermissibleValue):
-                        pk_col = col_name
-                    else:
-                        continue
-                elif t == T_PREFIX:
-                    if isinstance(element, Prefix):
-                        pk_col = col_name
-                    else:
-                        continue
-                elif t == T_SCHEMA:
-                    if isinstance(element, SchemaDefinition):
-                        pk_col = col_name
-                    else:
-                        continue
-                else:
-                    raise AssertionError(f"Unexpected type: {t}")
+        # Step 1: look up the primary key (pk) column, the pk of any parent, and the columns to populate
+        plan = target.plan.element_plan(type(element), type(parent) if parent else None)
+        pk_col = plan.pk_col
+        parent_pk_col = plan.parent_pk_col
         if not pk_col:
             logging.info(f"Skipping element: {element}, no PK")
             return
-        # Step 2: iterate through all columns in the spec, and populate a row object
+        # Step 2: iterate through the columns in the plan, and populate a row object
         exported_row = {}
-        for col_name, col_config in table_config.columns.items():
-            settings = col_config.settings
+        for col_name, attr, render in plan.columns:
             # Either: (1) this column is mapped to a metamodel slot (metaslot), or
-            # (2) the column is a type designator (e.g. holds a value like "class" or "slot")
-            if col_config.metaslot:
+            # (2) the column holds the name of the element or of its parent
+            if render:
                 # Lookup the value of the element for this metaslot;
                 # e.g. if element = SlotDefinition('phone_no', range='string'), then:
                 #  - if the column has a metaslot 'name', v='phone no'
                 #  - if the column has a metaslot 'range', v='string'
-                v = getattr(element, underscore(col_config.metaslot.name), None)
-                if v is not None and v != [] and v != {}:
-                    # TODO: consider moving this to a standalone function
-                    # inner function to map an atomic value
-                    def repl(v: Any) -> Optional[str]:
-                        if col_config.maps_to == 'examples':
-                            if isinstance(v, Example):
-                                return v.value
-                            else:
-                                raise ValueError(f"Expected Example, got {type(v)} for {v}")
-                        if col_config.settings.inner_key:
-                            if isinstance(v, Annotation):
-                                if v.tag == col_config.settings.inner_key:
-                                    return v.value
-                                else:
-                                    return None
-                            else:
-                                v = getattr(v, col_config.settings.inner_key, None)
-                                if isinstance(v, bool):
-                                    v = str(v).lower()
-                                return v
-                        if settings.curie_prefix:
-                            pfx = f'{settings.curie_prefix}:'
-                            if v.startswith(pfx):
-                                return v.replace(pfx, '')
-                            else:
-                                return None
-                        if isinstance(v, bool):
-                            return str(v).lower()
-                        return v
-
-                    # map the value (which may be a collection or an object) to a flat string
-                    # representation
-                    if isinstance(v, list):
-                        v = [repl(v1) for v1 in v if repl(v1) is not None]
-                        v = '|'.join([str(i) for i in v])
-                        if v != '':
-                            exported_row[col_name] = v
-                    elif isinstance(v, dict):
-                        v = [repl(v1) for v1 in v.values() if repl(v1) is not None]
-                        v = '|'.join([str(i) for i in v])
-                        if v != '':
-                            exported_row[col_name] = v
-                    else:
-                        v = repl(v)
-                        if v is not None:
-                            exported_row[col_name] = str(v)
-            elif col_config.is_element_type:
-                # the column holds the metatype of the element;
-                # e.g if slot=SlotDefinition(...), then the value of a column
-                # 'type' that is a type designator, then the value will be 'slot'
-                if pk_col == col_name:
-                    if isinstance(element, PermissibleValue):
-                        # permissible values are treated differently from other metamodel
-                        # elements, as they have no name
-                        exported_row[col_name] = element.text
-                        if not parent_pk_col:
-                            raise ValueError(f"Cannot have floating permissible value {element.text}")
-                    elif isinstance(element, Prefix):
-                        exported_row[col_name] = element.prefix_prefix
-                    else:
-                        exported_row[col_name] = element.name
-                elif parent_pk_col == col_name:
-                    exported_row[col_name] = parent.name
+                v = render(getattr(element, attr, None))
+                if v is not None:
+                    exported_row[col_name] = v
+            elif pk_col == col_name:
+                # e.g if slot=SlotDefinition(...), and the column 'slot' holds slots,
+                # then the value will be the name of the slot
+                if isinstance(element, PermissibleValue):
+                    # permissible values are treated differently from other metamodel
+                    # elements, as they have no name
+                    exported_row[col_name] = element.text
+                    if not parent_pk_col:
+                        raise ValueError(f"Cannot have floating permissible value {element.text}")
+                elif isinstance(element, Prefix):
+                    exported_row[col_name] = element.prefix_prefix
                 else:
-                    logging.info(f'TODO: {col_name} [{type(element).class_name}] // {col_config}')
+                    exported_row[col_name] = element.name
             else:
-                logging.info(f'IGNORING: {col_name} // {col_config}')
-        self.export_row(exported_row)
+                exported_row[col_name] = parent.name
+        self.export_row(exported_row, target)
+
+    @staticmethod
+    def export_plan(table_config: TableConfig) -> ExportPlan:
+        """
+        Returns the export plan for a table configuration, computing it on first use
+
+        :param table_config:
+        :return:
+        """
+        if table_config.export_plan is None:
+            table_config.export_plan = ExportPlan.from_table_config(table_config)
+        return table_config.export_plan
 
-    def export_row(self, row: ROW):
-        self.rows.append(row)
+    def export_row(self, row: ROW, target: ExportTarget):
+        target.sink.write_row(row)
+        target.row_count += 1
+        self.row_count += 1
+        if self.keep_rows:
+            self.rows.append(row)
 
     def is_slot_redundant(self, slot: SlotDefinition, schemaview: SchemaView):
         for c in schemaview.all_classes().values():
@@ -349,10 +634,16 @@ class SchemaExporter:
               default=False,
               show_default=True,
               help="All slots are treated as unique and top level and do not belong to the specified class")
+@click.option("--profile/--no-profile",
+              default=False,
+              show_default=True,
+              help="Report the time and peak memory of each phase, and row throughput of each sheet, on stderr")
+@click.option("--profile-json",
+              help="Write the profile as JSON to this file, e.g. for tracking performance over time")
 @click.option("-v", "--verbose", count=True)
 @click.argument('tsv_files', nargs=-1)
 def export_schema(tsv_files, output_directory, output: TextIO, overwrite: bool, append_sheet: bool,
-                  schema, unique_slots: bool, verbose: int):
+                  schema, unique_slots: bool, verbose: int, profile: bool, profile_json: str):
     """
     Convert LinkML schema to schemasheets
 
@@ -390,22 +681,40 @@ def export_schema(tsv_files, output_directory, output: TextIO, overwrite: bool,
         raise ValueError(f'Cannot use output option with multiple sheets')
     if append_sheet:
         raise NotImplementedError(f'--append-sheet not yet implemented')
-    exporter = SchemaExporter()
-    sv = SchemaView(schema)
-    for f in tsv_files:
+    profiler = Profiler(command='linkml2sheets') if profile or profile_json else None
+    exporter = SchemaExporter(profiler=profiler)
+    with profiler or contextlib.nullcontext():
+        with profile_phase(profiler, 'load_schema'):
+            sv = SchemaView(schema)
+        exports = []
+        for f in tsv_files:
+            if output_directory:
+                outpath: Path = Path(output_directory) / Path(f).name
+            else:
+                if output is not None:
+                    outpath = Path(output)
+                else:
+                    outpath = sys.stdout
+            if isinstance(outpath, Path) and outpath.exists():
+                if overwrite:
+                    logging.info(f'Overwriting: {outpath}')
+                else:
+                    raise PermissionError(f'Will not overwrite {outpath} unless --overwrite is set')
+            exports.append((f, outpath))
         if output_directory:
-            outpath: Path = Path(output_directory) / Path(f).name
+            outpaths = [outpath for _, outpath in exports]
+            if len(set(outpaths)) < len(outpaths):
+                raise ValueError(f'Cannot write sheets with the same name to {output_directory}')
+            # the schema is traversed once for all sheets
+            exporter.export_many(sv, exports)
         else:
-            if output is not None:
-                outpath = Path(output)
-            else:
-                outpath = sys.stdout
-        if isinstance(outpath, Path) and outpath.exists():
-            if overwrite:
-                logging.info(f'Overwriting: {outpath}')
-            else:
-                raise PermissionError(f'Will not overwrite {outpath} unless --overwrite is set')
-        exporter.export(sv, specification=f, to_file=outpath)
+            # sheets written to stdout follow one another
+            for f, outpath in exports:
+                exporter.export(sv, specification=f, to_file=outpath)
+    if profile:
+        click.echo(profiler.report(), err=True)
+    if profile_json:
+        profiler.write_json(profile_json)
 
 
 if __name__ == '__main__':
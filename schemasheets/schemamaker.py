@@ -1,33 +1,45 @@
 """Converts a schema sheet into a LinkML schema"""
-import codecs
 import contextlib
+import io
 import sys
 import csv
 import logging
-from pathlib import Path
-from urllib.request import urlopen
-from copy import copy
+from itertools import repeat
 import re
 
 import click
 import yaml
-from dataclasses import dataclass
-from typing import List, Union, Any, Dict, Tuple, Generator, TextIO
-
-from linkml_runtime.dumpers import yaml_dumper, json_dumper
-from linkml_runtime.linkml_model import Annotation, Example
+from jsonasobj2 import items, JsonObj
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Union, Any, Dict, Tuple, Generator, TextIO, Callable, Optional, FrozenSet, \
+    Mapping, NamedTuple, Set
+
+from linkml_runtime.dumpers import yaml_dumper
+from linkml_runtime.linkml_model import Annotation
 from linkml_runtime.linkml_model.meta import SchemaDefinition, ClassDefinition, Prefix, \
     SlotDefinition, EnumDefinition, PermissibleValue, SubsetDefinition, TypeDefinition, Element, Setting
+from linkml_runtime.utils.namespaces import Namespaces
 from linkml_runtime.utils.schema_as_dict import schema_as_dict
 from linkml_runtime.utils.schemaview import SchemaView
 from linkml_runtime.utils.yamlutils import YAMLRoot
 
-from schemasheets.schemasheet_datamodel import ColumnConfig, TableConfig, get_configmodel, get_metamodel, COL_NAME, \
-    DESCRIPTOR, \
+from schemasheets.schemasheet_datamodel import ColumnConfig, TableConfig, COL_NAME, DESCRIPTOR, \
     tmap, T_CLASS, T_PV, T_SLOT, T_ATTRIBUTE, T_SUBSET, T_SCHEMA, T_ENUM, T_PREFIX, T_TYPE, SchemaSheet, T_SETTING
+# re-exported, as they have long been imported from here
+from schemasheets.schemasheet_datamodel import get_metamodel, get_configmodel  # noqa: F401
 from schemasheets.conf.configschema import Cardinality
-from schemasheets.utils.google_sheets import gsheets_download_url
-from schemasheets.utils.prefixtool import guess_prefix_expansion
+from schemasheets.utils.file_watcher import FileWatcher
+from schemasheets.utils.fragment_cache import FragmentCache
+from schemasheets.utils.google_sheets import gsheets_download_url, gsheet_cache_name, fetch_gsheets, \
+    fetch_gsheet_workbook, SheetFetcher
+from schemasheets.utils.sheet_cache import SheetCache
+from schemasheets.utils.workbook import open_workbook, worksheet_rows, discover_schemasheets
+from schemasheets.utils.element_builder import ElementBuilder, element_class
+from schemasheets.utils.metamodel_snapshot import get_snapshot, cache_dir as persistent_cache_dir
+from schemasheets.utils.prefixtool import PrefixResolver
+from schemasheets.utils.profiler import Profiler, profile_phase, profile_sheet
 
 
 def ensure_path_tokens(path: Union[str, List[str]]) -> List[str]:
@@ -95,6 +107,414 @@ def set_attr_via_path_accessor(obj: Union[dict, YAMLRoot], path: Union[str, List
             set_attr_via_path_accessor(getattr(obj, tok), toks, value, depth+1)
 
 
+def _items(obj: Union[dict, JsonObj, YAMLRoot]) -> List[Tuple[str, Any]]:
+    if isinstance(obj, YAMLRoot):
+        return list(vars(obj).items())
+    return list(items(obj))
+
+
+def _get(obj: Union[dict, JsonObj, YAMLRoot], key: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(key, None)
+    return getattr(obj, key, None)
+
+
+def _set(obj: Union[dict, JsonObj, YAMLRoot], key: str, value: Any) -> None:
+    if isinstance(obj, dict):
+        obj[key] = value
+    elif isinstance(obj, YAMLRoot) and isinstance(value, dict):
+        # setattr would wrap a dict of elements (e.g. slot_usage) in a JsonObj
+        vars(obj)[key] = value
+    else:
+        setattr(obj, key, value)
+
+
+def _is_empty(v: Any) -> bool:
+    if isinstance(v, JsonObj):
+        return not list(items(v))
+    return v is None or v == [] or v == {}
+
+
+REPLACED_ELEMENT_SLOTS = ('slot_usage', 'attributes', 'permissible_values', 'prefixes', 'settings')
+"""Slots holding elements that are created anew by each row, replacing any element of the same name"""
+
+CARDINALITY_SLOTS = ('required', 'multivalued', 'recommended')
+"""Slots that may be set from a cardinality, which replaces rather than conflicts with the current value"""
+
+
+def _allows_overwrite(obj: Any) -> bool:
+    # mirrors the elements for which add_row permits values to be reset
+    return isinstance(obj, (SchemaDefinition, Prefix, Setting, Annotation))
+
+
+def merge_element(target: Union[dict, JsonObj, YAMLRoot], source: Union[dict, JsonObj, YAMLRoot],
+                  overwrite: bool = False) -> None:
+    """
+    Merges an element translated from one sheet into the same element translated from another
+
+    The rules are the same as those used when translating rows into a single schema (see
+    :ref:`SchemaMaker.add_row`):
+
+    - lists are appended to
+    - each row for a slot usage, attribute, permissible value, prefix or setting creates a new
+      element, so these replace any entry of the same name
+    - other dicts, such as classes or annotations, are merged entry by entry,
+      with elements being merged recursively
+    - a single value may only be set once; setting a different value is a conflict,
+      unless the element allows values to be reset (schemas, prefixes, settings, annotations),
+      or the value is set from a cardinality, which always replaces the current value
+
+    :param target: element to be merged into, modified in place
+    :param source: element to be merged from
+    :param overwrite: if True, a different single value replaces the current value
+    :return: None
+    """
+    for k, v in _items(source):
+        _merge_value(target, k, v, overwrite)
+
+
+def _merge_value(target: Union[dict, JsonObj, YAMLRoot], k: str, v: Any, overwrite: bool) -> None:
+    if _is_empty(v):
+        return
+    curr = _get(target, k)
+    if _is_empty(curr):
+        _set(target, k, v)
+    elif isinstance(v, list):
+        if k == 'slots':
+            # slots are only added to a class once
+            v = [x for x in v if x not in curr]
+        _set(target, k, curr + v)
+    elif k in REPLACED_ELEMENT_SLOTS:
+        for vk, vv in _items(v):
+            _set(curr, vk, vv)
+    elif isinstance(v, (dict, JsonObj, YAMLRoot)):
+        if isinstance(v, YAMLRoot):
+            child_overwrite = _allows_overwrite(curr)
+        else:
+            child_overwrite = overwrite or k == 'annotations'
+        for vk, vv in _items(v):
+            cv = _get(curr, vk)
+            if isinstance(cv, YAMLRoot) and isinstance(vv, YAMLRoot):
+                merge_element(cv, vv, overwrite=_allows_overwrite(cv))
+            else:
+                _merge_value(curr, vk, vv, child_overwrite)
+    else:
+        if curr and curr != v and not overwrite and k not in CARDINALITY_SLOTS:
+            raise ValueError(f'Cannot reset value for {k}, was {curr}, now {v}')
+        _set(target, k, v)
+
+
+@lru_cache()
+def literal_ranges() -> FrozenSet[Optional[str]]:
+    """
+    Returns the metamodel ranges whose values are used exactly as normalized from a cell
+
+    Values of metaslots with any other range, such as integers, CURIEs, enums, or inlined objects,
+    must be converted when the schema is finalized; see :ref:`SchemaMaker.finalize_elements`
+
+    :return: names of ranges; None stands for the default range
+    """
+    ranges = {None, 'boolean'}
+    for name, base in get_snapshot()['types'].items():
+        if base == 'str':
+            ranges.add(name)
+    return frozenset(ranges)
+
+
+class CardinalityMapping(NamedTuple):
+    """
+    The LinkML slot settings that a cardinality term maps to; None leaves a setting unchanged
+    """
+    required: Optional[bool] = None
+    multivalued: Optional[bool] = None
+    recommended: Optional[bool] = None
+    inapplicable: bool = False
+    """if True, the slot does not apply, and its slot usage is removed"""
+
+
+UML_SHORTCUTS = {'1': '1..1', '*': '0..*'}
+"""Abbreviated UML cardinalities"""
+
+UML_CARDINALITIES = ['0..0', '0..1', '1..1', '0..*', '1..*']
+"""Common UML cardinalities, which are included in every cardinality table"""
+
+
+def parse_uml_cardinality(card: str) -> CardinalityMapping:
+    """
+    Parses a UML cardinality, e.g. 0..1, or 1..*
+
+    :param card:
+    :return:
+    """
+    [min, max] = card.split('..')
+    return CardinalityMapping(required=int(min) > 0, multivalued=max == '*' or int(max) > 1)
+
+
+@lru_cache()
+def cardinality_table(vocabulary: str = 'code') -> Mapping[str, Union[CardinalityMapping, str]]:
+    """
+    Precomputes the mapping for all terms of a cardinality vocabulary
+
+    Terms are the names of the Cardinality permissible values, the values of the annotation
+    given by the vocabulary (e.g. code, or mixs_notation), UML strings, and UML shortcuts.
+    A term that matches more than one permissible value maps to an error message instead.
+
+    The permissible values are read from the metamodel snapshot, see :ref:`get_snapshot`
+
+    :param vocabulary: name of an annotation on Cardinality permissible values
+    :return: read-only mapping between terms and mappings
+    """
+    matches: Dict[str, List[str]] = {}
+    mappings: Dict[str, CardinalityMapping] = {}
+    for text, pv in get_snapshot()['cardinality'].items():
+        annotations = pv['annotations']
+        settings = {}
+        maps_to = annotations.get('maps_to')
+        if maps_to:
+            for k, v in yaml.safe_load(maps_to).items():
+                if k in ('required', 'multivalued', 'recommended'):
+                    settings[k] = v
+        mappings[text] = CardinalityMapping(inapplicable=text == Cardinality.not_applicable.text, **settings)
+        annv = annotations.get(vocabulary)
+        if annv:
+            matches.setdefault(annv, []).append(text)
+        matches.setdefault(text, []).append(text)
+    table: Dict[str, Union[CardinalityMapping, str]] = {}
+    for term, pv_names in matches.items():
+        if not isinstance(term, str) or '..' in term:
+            # UML strings are never looked up in the vocabulary
+            continue
+        if len(pv_names) > 1:
+            table[term] = f'Ambiguous matches to {term}: {pv_names}'
+        else:
+            table[term] = mappings[pv_names[0]]
+    for term in UML_CARDINALITIES:
+        table[term] = parse_uml_cardinality(term)
+    for term, uml in UML_SHORTCUTS.items():
+        table[term] = table[uml]
+    return MappingProxyType(table)
+
+
+def lookup_cardinality(card: str, vocabulary: str = 'code') -> CardinalityMapping:
+    """
+    Resolves a cardinality term, see :ref:`cardinality_table`
+
+    UML strings are always parsed as UML, even if they are also terms of the vocabulary
+
+    :param card: cardinality term
+    :param vocabulary: name of an annotation on Cardinality permissible values
+    :return:
+    """
+    table = cardinality_table(vocabulary)
+    mapping = table.get(card)
+    if mapping is None:
+        if '..' in card:
+            return parse_uml_cardinality(card)
+        raise ValueError(f'Cannot parse cardinality: {card} // {get_snapshot()["cardinality"].keys()}')
+    if isinstance(mapping, str):
+        raise ValueError(mapping)
+    return mapping
+
+
+MAPPING_SLOTS = ['exact_mappings', 'narrow_mappings', 'broad_mappings', 'related_mappings', 'close_mappings',
+                 'mappings']
+
+def _add_prefix(prefixes: Dict[str, None], curie: Optional[str]) -> None:
+    if curie and ':' in curie:
+        prefixes.setdefault(curie.split(':')[0])
+
+
+def schema_references(schema: SchemaDefinition, set_from_schema: bool = False) -> Tuple[List[str], List[str]]:
+    """
+    Collects the prefixes and subsets referenced by the elements of a schema, in a single traversal
+
+    Prefixes are those of mapping CURIEs of all elements, including slot_usage, and those of the URIs of classes,
+    slots, attributes and types, which default to the default prefix of the schema.
+
+    :param schema:
+    :param set_from_schema: if True, also set from_schema of each class, slot, attribute, enum, type and subset
+        to the id of the schema, as SchemaView does when it loads a schema
+    :return: tuple of prefixes and subset names, each in the order they are first referenced
+    """
+    prefixes: Dict[str, None] = {}
+    subsets: Dict[str, None] = {}
+    native_prefix = f'{schema.default_prefix}:' if schema.default_prefix else None
+
+    def visit(e: Element, uri_slot: str = None, is_element: bool = True) -> None:
+        if set_from_schema and is_element:
+            e.from_schema = schema.id
+        if uri_slot:
+            _add_prefix(prefixes, getattr(e, uri_slot) or native_prefix)
+            _add_prefix(prefixes, native_prefix)
+        for slot in MAPPING_SLOTS:
+            for curie in getattr(e, slot):
+                _add_prefix(prefixes, curie)
+        for subset in e.in_subset:
+            subsets.setdefault(subset)
+
+    for c in schema.classes.values():
+        visit(c, 'class_uri')
+        for a in c.attributes.values():
+            visit(a, 'slot_uri')
+        for su in c.slot_usage.values():
+            visit(su, is_element=False)
+    for x in schema.slots.values():
+        visit(x, 'slot_uri')
+    for t in schema.types.values():
+        visit(t, 'uri')
+    for e in schema.enums.values():
+        visit(e)
+        for pv in e.permissible_values.values():
+            visit(pv, is_element=False)
+    for x in schema.subsets.values():
+        visit(x)
+    return list(prefixes), list(subsets)
+
+
+INDEXED_ELEMENT_TYPES = {
+    T_CLASS: ClassDefinition,
+    T_SLOT: SlotDefinition,
+    T_ENUM: EnumDefinition,
+    T_TYPE: TypeDefinition,
+    T_SUBSET: SubsetDefinition,
+}
+"""Element types that are looked up by name in the schema being built"""
+
+ELEMENT_DICT_SLOTS = {
+    T_CLASS: 'classes',
+    T_SLOT: 'slots',
+    T_ENUM: 'enums',
+    T_TYPE: 'types',
+    T_SUBSET: 'subsets',
+}
+"""Schema slot holding the elements of each indexed type"""
+
+Normalizer = Callable[[Optional[str]], Any]
+"""A function that normalizes a cell value for a particular column"""
+
+NULL_VALUES = ('.', '', 'n/a')
+"""Values that are treated as if empty"""
+
+BOOLEAN_MAP = {
+    'yes': True,
+    'no': False,
+    'true': True,
+    'false': False,
+}
+
+
+def _normalize_null_and_whitespace(v: Optional[str], column_name: Optional[COL_NAME]) -> Optional[str]:
+    if v in NULL_VALUES:
+        return None
+    if v and (v.startswith(' ') or v.endswith(' ')):
+        if column_name is not None:
+            logging.warning(f'Stripping value: "{v}" for {column_name}')
+        else:
+            logging.warning(f'Stripping value: "{v}" (no column config)')
+        v = v.strip()
+    return v
+
+
+def _normalize_element_name(v: Optional[str]) -> Optional[str]:
+    return _normalize_null_and_whitespace(v, None)
+
+
+def _to_boolean(v: Optional[str]) -> bool:
+    if v and v.lower() in BOOLEAN_MAP:
+        return BOOLEAN_MAP[v.lower()]
+    return bool(v)
+
+
+def compile_normalizer(column_config: ColumnConfig = None) -> Normalizer:
+    """
+    Compiles a normalizer function for values in a column, see :ref:`SchemaMaker.normalize_value`
+
+    All decisions that depend only on the column configuration (regular expression, value map,
+    prefixing, range coercion, splitting into lists) are made once here, rather than per cell.
+
+    :param column_config: optional
+    :return: function mapping a raw cell value to a normalized value
+    """
+    if column_config is None:
+        return _normalize_element_name
+    column_name = column_config.name
+    settings = column_config.settings
+    metaslot = column_config.metaslot
+    # string transformations, applied in order to non-empty values
+    transforms: List[Callable[[Optional[str]], Optional[str]]] = []
+    if settings.regular_expression_match:
+        pattern = re.compile(settings.regular_expression_match)
+
+        def match_regex(v: str) -> Optional[str]:
+            m = pattern.search(v)
+            if m:
+                return m.group(1)
+            logging.error(f'No match using {settings.regular_expression_match} on {v}')
+            return None
+
+        transforms.append(match_regex)
+    if settings.curie_prefix:
+        curie_prefix = settings.curie_prefix
+
+        def add_curie_prefix(v: str) -> str:
+            if ':' in v:
+                logging.warning(f'Will not prefix {v} with {curie_prefix} as it is already prefixed')
+                return v
+            return f'{curie_prefix}:{v}'
+
+        transforms.append(add_curie_prefix)
+    if settings.prefix:
+        prefix = settings.prefix
+        transforms.append(lambda v: f'{prefix}{v}')
+    if settings.suffix:
+        suffix = settings.suffix
+        transforms.append(lambda v: f'{suffix}{v}')
+    if settings.vmap:
+        # vmap may be a dict or a JsonObj, depending on how settings were merged
+        value_map = {k: vm.map_value for k, vm in items(settings.vmap)}
+        has_default = '*' in value_map
+
+        def map_value(v: Optional[str]) -> Optional[str]:
+            if v in value_map:
+                return value_map[v]
+            elif has_default:
+                return value_map['*']
+            logging.warning(f'No mapping for {v}, passing through')
+            return v
+
+        transforms.append(map_value)
+    coerce = None
+    if metaslot and metaslot.range:
+        rng = metaslot.range
+        if column_config.inner_key_metaslot:
+            rng = column_config.inner_key_metaslot.range
+        if rng == 'boolean':
+            coerce = _to_boolean
+    # TODO: use inner_key to look up the actual slot
+    is_multivalued = bool(metaslot and metaslot.multivalued and not settings.inner_key)
+    if metaslot and settings.inner_key and settings.internal_separator:
+        is_multivalued = True
+    separator = settings.internal_separator
+
+    def normalize(v: Optional[str]) -> Any:
+        v = _normalize_null_and_whitespace(v, column_name)
+        if v:
+            for transform in transforms:
+                v = transform(v)
+        if coerce is not None:
+            v = coerce(v)
+        if is_multivalued and not isinstance(v, list):
+            if v is None:
+                v = []
+            elif separator:
+                v = v.split(separator)
+            else:
+                v = [v]
+        return v
+
+    return normalize
+
+
 class SchemaSheetRowException(Exception):
     pass
 
@@ -108,6 +528,16 @@ class SchemaMaker:
     """Generated schema."""
 
     element_map: Dict[Tuple[str, str], Element] = None
+    """Index of elements in the current schema, keyed by (element type, name), e.g. ('class', 'Person')."""
+
+    unfinalized_elements: Dict[int, YAMLRoot] = None
+    """Elements with values that must still be converted to metamodel objects, keyed by id."""
+
+    slot_usage_owners: Dict[int, Tuple[str, ElementBuilder]] = None
+    """Class name and builder of each slot usage created from a row, keyed by id of the builder."""
+
+    inapplicable_slot_usages: Dict[str, Set[str]] = None
+    """Names of slot usages marked not applicable, keyed by class name; removed once all sheets are translated."""
 
     metamodel: SchemaView = None
     """Schema describing LinkML elements."""
@@ -125,14 +555,66 @@ class SchemaMaker:
 
     gsheet_id: str = None
     """Google sheet ID."""
-    
+
     gsheet_cache_dir: str = None
+    """Directory in which downloaded google sheets tabs are cached."""
+
+    gsheet_cache_ttl: float = None
+    """Seconds during which a cached tab is used without checking whether it changed."""
+
+    gsheet_cache_max_age: float = None
+    """Cached tabs not used for this many seconds are evicted."""
+
+    gsheet_cache_max_size: int = None
+    """Maximum total size in bytes of cached tabs."""
+
+    offline: bool = None
+    """If True, google sheets tabs are read from the cache only, and never downloaded."""
+
+    gsheet_concurrency: int = None
+    """Maximum number of google sheets tabs to download concurrently."""
+
+    gsheet_retries: int = None
+    """Number of times a failed google sheets download is retried."""
+
+    gsheet_data: Dict[str, bytes] = None
+    """Downloaded content of google sheets tabs, keyed by tab name."""
+
+    gsheet_workbook: bool = None
+    """If True, the whole google sheet is downloaded in a single request as an Excel workbook,
+    rather than each tab separately as CSV."""
+
+    gsheet_workbook_data: bytes = None
+    """Downloaded content of the google sheet as an Excel workbook."""
 
     table_config_path: str = None
     """Path to table configuration file."""
 
     base_schema_path: str = None
 
+    stream_rows: bool = None
+    """If True, rows are translated as they are read, rather than after the whole sheet is read.
+    This requires all descriptor rows to precede the data rows of each sheet."""
+
+    jobs: int = None
+    """Number of sheets to translate in parallel. If not set, sheets are translated one by one."""
+
+    cache_dir: str = None
+    """Directory in which to cache the schema fragment translated from each sheet."""
+
+    fragment_cache: FragmentCache = None
+    """Cache of translated schema fragments. If not set, and cache_dir is set, a cache in that directory is used."""
+
+    profiler: Profiler = None
+    """If set, records the time and memory used by each phase of translation."""
+
+    prefix_map_path: str = None
+    """Local prefix map used to fill in missing prefixes on repair, instead of bioregistry."""
+
+    prefix_resolver: PrefixResolver = None
+    """Resolves missing prefixes on repair. If not set, one is created using prefix_map_path, or else bioregistry,
+    with guesses cached in cache_dir or SCHEMASHEETS_CACHE_DIR if either is set."""
+
     def create_schema(self, csv_files: Union[str, List[str]], **kwargs) -> SchemaDefinition:
         """
         Create a LinkML schema from one or more Schema Sheets.
@@ -141,50 +623,234 @@ class SchemaMaker:
         :param kwargs:
         :return: generated schema
         """
-        self.base_view = SchemaView(self.base_schema_path) if self.base_schema_path else None
-
-        if self.default_name:
-            n = self.default_name
-        elif self.base_view and self.base_view.schema.name:
-            n = self.base_view.schema.name
+        if self.base_schema_path:
+            with profile_phase(self.profiler, 'load_base_schema'):
+                self.base_view = SchemaView(self.base_schema_path)
         else:
-            n = 'TEMP'
-        self.schema = SchemaDefinition(id=n, name=n, default_prefix=n, default_range='string')
+            self.base_view = None
+
+        self.schema = self._new_schema()
+        self._reset_state()
         if not isinstance(csv_files, list):
             csv_files = [csv_files]
-        for f in csv_files:
-            # reconstitute schema
-            self.load_and_merge_sheet(f, **kwargs)
-        self.schema = SchemaDefinition(**json_dumper.to_dict(self.schema))
+        if self.gsheet_id:
+            with profile_phase(self.profiler, 'fetch'):
+                csv_files = self.fetch_gsheets(csv_files)
+        if (self.jobs and self.jobs > 1 and len(csv_files) > 1) or self.cache_dir or self.fragment_cache:
+            # translate each sheet independently, then merge in input order
+            for f, fragment in zip(csv_files, self._create_schema_fragments(csv_files, **kwargs)):
+                with profile_phase(self.profiler, 'merge_fragment'):
+                    self.merge_fragment(fragment, f)
+        else:
+            for f in csv_files:
+                # reconstitute schema
+                self.load_and_merge_sheet(f, **kwargs)
+        with profile_phase(self.profiler, 'finalize_elements'):
+            self.finalize_elements()
         self.schema.imports.append('linkml:types')
         self.schema.prefixes['linkml'] = Prefix('linkml', 'https://w3id.org/linkml/')
-        self._tidy_slot_usage()
+        with profile_phase(self.profiler, 'tidy_slot_usage'):
+            self._tidy_slot_usage()
         prefix = self.schema.default_prefix
         if prefix not in self.schema.prefixes:
             logging.error(f'Prefix {prefix} not declared: using default')
             self.schema.prefixes[prefix] = Prefix(prefix, f'https://example.org/{prefix}/')
 
         if self.base_view:
-            SchemaView(self.schema).merge_schema(self.base_view.schema)
+            with profile_phase(self.profiler, 'merge_base_schema'):
+                SchemaView(self.schema).merge_schema(self.base_view.schema)
         return self.schema
 
+    def _reset_state(self) -> None:
+        self.element_map = None
+        self.unfinalized_elements = None
+        self.slot_usage_owners = None
+        self.inapplicable_slot_usages = None
+
+    def _new_schema(self) -> SchemaDefinition:
+        if self.default_name:
+            n = self.default_name
+        elif getattr(self, 'base_view', None) and self.base_view.schema.name:
+            n = self.base_view.schema.name
+        else:
+            n = 'TEMP'
+        return SchemaDefinition(id=n, name=n, default_prefix=n, default_range='string')
+
+    def create_schema_fragment(self, file_name: str, **kwargs) -> SchemaDefinition:
+        """
+        Translates a single schema sheet into a new schema, independent of the current schema.
+
+        The resulting fragment can be combined with others using :ref:`merge_fragment`
+
+        :param file_name: schema sheet
+        :param kwargs: passed to :ref:`load_and_merge_sheet`
+        :return: schema containing only the elements from this sheet
+        """
+        self.schema = self._new_schema()
+        self._reset_state()
+        self.load_and_merge_sheet(file_name, **kwargs)
+        with profile_phase(self.profiler, 'finalize_elements'):
+            self.finalize_elements()
+        return self.schema
+
+    def _create_schema_fragments(self, csv_files: List[str], **kwargs) -> List[SchemaDefinition]:
+        """
+        Translates each sheet into a schema fragment, using the cache and worker processes if configured.
+
+        :param csv_files: schema sheets paths
+        :param kwargs: passed to :ref:`load_and_merge_sheet`
+        :return: fragments, in the same order as the sheets
+        """
+        maker = replace(self, schema=None, element_map=None, unfinalized_elements=None, slot_usage_owners=None,
+                        inapplicable_slot_usages=None, default_name=self.schema.name)
+        fragments: List[Optional[SchemaDefinition]] = [None] * len(csv_files)
+        keys: List[Optional[str]] = [None] * len(csv_files)
+        cache = self.fragment_cache
+        if cache is None and self.cache_dir:
+            cache = FragmentCache(self.cache_dir)
+        if cache and self.gsheet_id:
+            logging.warning('Fragment cache is not used for google sheets')
+            cache = None
+        if cache:
+            for i, f in enumerate(csv_files):
+                keys[i] = cache.key(f, self.table_config_path,
+                                    use_attributes=self.use_attributes,
+                                    unique_slots=self.unique_slots,
+                                    cardinality_vocabulary=self.cardinality_vocabulary,
+                                    schema_name=maker.default_name,
+                                    **kwargs)
+                fragments[i] = cache.get(keys[i])
+        misses = [i for i, fragment in enumerate(fragments) if fragment is None]
+        logging.info(f'Translating {len(misses)} of {len(csv_files)} sheets')
+        if self.jobs and self.jobs > 1 and len(misses) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            # phases within worker processes are not profiled individually
+            with profile_phase(self.profiler, 'translate_in_workers'), \
+                    ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                translated = list(executor.map(_create_schema_fragment, repeat(replace(maker, profiler=None)),
+                                               [csv_files[i] for i in misses], repeat(kwargs)))
+        else:
+            translated = [maker.create_schema_fragment(csv_files[i], **kwargs) for i in misses]
+        for i, fragment in zip(misses, translated):
+            fragments[i] = fragment
+            if cache:
+                cache.put(keys[i], fragment)
+        if cache and cache.in_memory:
+            cache.retain_in_memory(keys)
+        return fragments
+
+    def merge_fragment(self, fragment: SchemaDefinition, file_name: str = None) -> None:
+        """
+        Merges a schema fragment translated from one sheet into the current schema.
+
+        Fragments must be merged in the order of their sheets. Elements are merged with the same rules
+        as rows from a single sheet, see :ref:`merge_element`; in particular, setting a different value
+        for a slot of an element is an error.
+
+        :param fragment: schema created using :ref:`create_schema_fragment`
+        :param file_name: sheet the fragment was translated from, used in error messages
+        :return: None
+        """
+        template = self._new_schema()
+        try:
+            for k, v in vars(fragment).items():
+                if v == getattr(template, k, None):
+                    # not set by the sheet
+                    continue
+                _merge_value(self.schema, k, v, overwrite=True)
+        except ValueError as e:
+            raise SchemaSheetRowException(f"Error merging {file_name or 'sheet'}\nException:\n{e}") from e
+        # slot usages marked not applicable in a worker are only recorded in the fragment;
+        # a slot usage replaced by this fragment no longer carries any earlier mark
+        for cn, c in fragment.classes.items():
+            for sn, su in c.slot_usage.items():
+                if 'inapplicable' in su.annotations:
+                    self._add_inapplicable_slot_usage(cn, sn)
+                elif self.inapplicable_slot_usages and cn in self.inapplicable_slot_usages:
+                    self.inapplicable_slot_usages[cn].discard(sn)
+
+    def finalize_elements(self) -> None:
+        """
+        Converts values that were set from cells into metamodel objects.
+
+        Rows are translated by setting plain values on an :ref:`ElementBuilder` for each new element;
+        here each builder is replaced by the element it builds, in a single pass over the schema.
+
+        Rows may also set values directly on elements that were already in the schema. Some of these
+        values are placeholders, such as the dict created for a column with an inner key like
+        structured_pattern.syntax, or strings for integers, CURIEs, or enums. Elements given
+        such values are recorded as rows are added, and only those elements are converted.
+        Both steps validate values in the same way as loading a schema.
+
+        :return: None
+        """
+        schema = self.schema
+        for slot_name in ELEMENT_DICT_SLOTS.values():
+            ix = getattr(schema, slot_name)
+            for name, element in ix.items():
+                if isinstance(element, ElementBuilder):
+                    ix[name] = element.build()
+                else:
+                    self._build_nested(element)
+        for element in (self.unfinalized_elements or {}).values():
+            self._build_nested(element)
+            element.__post_init__()
+        self.unfinalized_elements = None
+        self.element_map = None
+        self.slot_usage_owners = None
+
+    @staticmethod
+    def _build_nested(element: YAMLRoot) -> None:
+        # an existing element may contain new nested elements, e.g. slot_usage or permissible values
+        for v in vars(element).values():
+            if isinstance(v, dict):
+                for k, nested in v.items():
+                    if isinstance(nested, ElementBuilder):
+                        v[k] = nested.build()
+
+    def _defer_finalization(self, element: YAMLRoot) -> None:
+        if self.unfinalized_elements is None:
+            self.unfinalized_elements = {}
+        self.unfinalized_elements[id(element)] = element
+
+    def _add_inapplicable_slot_usage(self, class_name: str, slot_name: str) -> None:
+        if self.inapplicable_slot_usages is None:
+            self.inapplicable_slot_usages = {}
+        self.inapplicable_slot_usages.setdefault(class_name, set()).add(slot_name)
+
     def _tidy_slot_usage(self):
         """
         removes all slot usages marked inapplicable.
 
+        Slot usages are recorded as they are marked, see :ref:`set_cardinality`, so only affected
+        classes are visited, and the slots of each are rebuilt once.
+
         :return:
         """
-        for cn, c in self.schema.classes.items():
+        for cn, slot_names in (self.inapplicable_slot_usages or {}).items():
+            c = self.schema.classes.get(cn)
+            if c is None:
+                continue
             logging.debug(f"Tidying {cn}")
-            inapplicable_slots = [sn for sn, s in c.slot_usage.items() if 'inapplicable' in s.annotations]
+            slot_usage = c.slot_usage
+            # a slot usage may have been replaced by a later row
+            inapplicable_slots = {sn for sn in slot_names
+                                  if sn in slot_usage and 'inapplicable' in slot_usage[sn].annotations}
+            if not inapplicable_slots:
+                continue
+            c.slots = [sn for sn in c.slots if sn not in inapplicable_slots]
             for sn in inapplicable_slots:
-                c.slots.remove(sn)
-                del c.slot_usage[sn]
+                del slot_usage[sn]
+        self.inapplicable_slot_usages = None
 
     def load_and_merge_sheet(self, file_name: str, delimiter='\t') -> None:
         """
         Merge information from the given schema sheet into the current schema.
 
+        New elements are added as element builders; call :ref:`finalize_elements` once all
+        sheets are loaded (this is done by :ref:`create_schema`).
+
         :param file_name: schema sheet
         :param delimiter: default is tab
         :return:
@@ -192,23 +858,33 @@ class SchemaMaker:
         logging.info(f'READING {file_name} D={delimiter}')
         # with self.ensure_file(file_name) as tsv_file:
         #    reader = csv.DictReader(tsv_file, delimiter=delimiter)
-        with self.ensure_csvreader(file_name, delimiter=delimiter) as reader:
-            schemasheet = SchemaSheet.from_dictreader(reader)
-            if self.table_config_path:
-                schemasheet.load_table_config(self.table_config_path)
+        profiler = self.profiler
+        with profile_sheet(profiler, file_name), contextlib.ExitStack() as stack:
+            with profile_phase(profiler, 'read'):
+                reader = stack.enter_context(self.ensure_csvreader(file_name, delimiter=delimiter))
+            # descriptor rows may follow data rows, and apply to the whole sheet, so rows are only
+            # streamed from the reader, and translated as they are read, if this is ruled out
+            with profile_phase(profiler, 'parse_descriptors'):
+                schemasheet = SchemaSheet.from_dictreader(reader, stream=bool(self.stream_rows))
+                if self.table_config_path:
+                    schemasheet.load_table_config(self.table_config_path)
             line_num = schemasheet.start_line_number
             # TODO: check why this doesn't work
             # while rows and all(x for x in rows[-1] if not x):
             #    print(f'TRIMMING: {rows[-1]}')
             #    rows.pop()
-            logging.info(f'ROWS={len(schemasheet.rows)}')
-            for row in schemasheet.rows:
-                try:
-                    self.add_row(row, schemasheet.table_config)
-                    line_num += 1
-                except (ValueError, AttributeError) as e:
-                    raise SchemaSheetRowException(f"Error in line {line_num}, row={row}\n"
-                                                  f"Exception:\n{e}") from e
+            rows = schemasheet.rows
+            if profiler:
+                # time spent reading each row is recorded separately from translating it
+                rows = profiler.rows(rows)
+            with profile_phase(profiler, 'add_row'):
+                for row in rows:
+                    try:
+                        self.add_row(row, schemasheet.table_config)
+                        line_num += 1
+                    except (ValueError, AttributeError) as e:
+                        raise SchemaSheetRowException(f"Error in line {line_num}, row={row}\n"
+                                                      f"Exception:\n{e}") from e
 
     def add_row(self, row: Dict[str, Any], table_config: TableConfig):
         """
@@ -223,12 +899,14 @@ class SchemaMaker:
         :param table_config:
         :return:
         """
+        normalizers = self.column_normalizers(table_config)
         for element in self.row_focal_element(row, table_config):
-            if isinstance(element, Prefix):
+            elt_cls = element_class(element)
+            if issubclass(elt_cls, Prefix):
                 name = element.prefix_prefix
-            elif isinstance(element, PermissibleValue):
+            elif issubclass(elt_cls, PermissibleValue):
                 name = element.text
-            elif isinstance(element, Setting):
+            elif issubclass(elt_cls, Setting):
                 name = element.setting_key
             else:
                 logging.debug(f'EL={element} in {row}')
@@ -239,7 +917,7 @@ class SchemaMaker:
                 if k not in table_config.columns:
                     raise ValueError(f'Expected to find {k} in {table_config.columns.keys()}')
                 cc = table_config.columns[k]
-                v = self.normalize_value(v, cc)
+                v = normalizers[k](v)
                 if v:
                     # special case: class-context provided by settings
                     if cc.settings.applies_to_class:
@@ -248,22 +926,29 @@ class SchemaMaker:
                         actual_element = element
                     logging.debug(f'SETTING {name}.{cc.maps_to} = {v} // IK={cc.settings.inner_key}')
                     if cc.maps_to == 'cardinality':
-                        self.set_cardinality(actual_element, v)
+                        self.set_cardinality(actual_element, v, vocabulary=cc.settings.cardinality_vocabulary)
                     elif cc.metaslot:
+                        # values are stored as plain values, and converted when the element is built or finalized
+                        if not isinstance(actual_element, ElementBuilder) and \
+                                (cc.settings.inner_key or cc.metaslot.range not in literal_ranges()):
+                            self._defer_finalization(actual_element)
                         if cc.maps_to == 'examples':
-                            for vi in v:
-                                actual_element.examples.append(Example(value=vi))
+                            actual_element.examples.extend({'value': vi} for vi in v)
                         elif cc.maps_to == 'annotations':
                             if cc.settings.inner_key:
-                                ann = Annotation(cc.settings.inner_key, v)
-                                actual_element.annotations[ann.tag] = ann
+                                tag = cc.settings.inner_key
+                                actual_element.annotations[tag] = {'tag': tag, 'value': v}
                             else:
                                 anns = yaml.safe_load(v[0])
                                 for ann_key, ann_val in anns.items():
                                     actual_element.annotations[ann_key] = ann_val
                         elif isinstance(v, list) and not cc.settings.inner_key:
                             # append to existing list
-                            setattr(actual_element, cc.maps_to, getattr(actual_element, cc.maps_to, []) + v)
+                            curr_list = getattr(actual_element, cc.maps_to, None)
+                            if curr_list is None:
+                                setattr(actual_element, cc.maps_to, list(v))
+                            else:
+                                curr_list.extend(v)
                         elif isinstance(v, dict) and not cc.settings.inner_key:
                             for v_k, v_v in v.items():
                                 curr_dict = getattr(actual_element, cc.maps_to)
@@ -284,9 +969,7 @@ class SchemaMaker:
                                 curr_val = getattr(actual_element, cc.maps_to)
 
                             if curr_val and curr_val != 'TEMP' and curr_val != v and \
-                                    not isinstance(actual_element, SchemaDefinition) and \
-                                    not isinstance(actual_element, Prefix) and \
-                                    not isinstance(actual_element, Setting):
+                                    not issubclass(element_class(actual_element), (SchemaDefinition, Prefix, Setting)):
                                 logging.warning(f'Overwriting value for {k}, was {curr_val}, now {v}')
                                 raise ValueError(f'Cannot reset value for {k}, was {curr_val}, now {v}')
                             if cc.settings.inner_key:
@@ -337,36 +1020,66 @@ class SchemaMaker:
 
         This time the existing "foo" class from the schema, with its adornments, will be returned
 
+        When translating rows, use :ref:`lookup_element`, which does not require a stub
+
         :param elt: proxy for element to look up
         :param is_attr: if True, then the element is an attribute, not a slot
         :return:
         """
-        sc = self.schema
         if isinstance(elt, SchemaDefinition):
             # TODO: consider multiple schemas per sheet
-            return sc
+            return self.schema
         elif isinstance(elt, PermissibleValue):
             return elt
-        else:
-            if isinstance(elt, ClassDefinition):
-                ix = sc.classes
-            elif isinstance(elt, SlotDefinition):
-                if self.use_attributes or is_attr:
-                    ix = copy(sc.slots)
-                else:
-                    ix = sc.slots
-            elif isinstance(elt, EnumDefinition):
-                ix = sc.enums
-            elif isinstance(elt, TypeDefinition):
-                ix = sc.types
-            elif isinstance(elt, SubsetDefinition):
-                ix = sc.subsets
-            else:
-                raise ValueError(f'TODO: implement for type {type(elt)} in {elt}')
-            if elt.name not in ix:
-                logging.debug(f"Adding {elt.name} to schema")
-                ix[elt.name] = elt
-            return ix[elt.name]
+        for typ, elt_cls in INDEXED_ELEMENT_TYPES.items():
+            if isinstance(elt, elt_cls):
+                return self.lookup_element(typ, elt.name, is_attr=is_attr, stub=elt)
+        raise ValueError(f'TODO: implement for type {type(elt)} in {elt}')
+
+    def lookup_element(self, typ: str, name: str, is_attr=False, stub: Element = None) -> Element:
+        """
+        Look up an element in the current schema by type and name
+
+        If an element cannot be found, then a new element is created and added to the schema;
+        the exception is slots looked up as attributes, which are created but not added,
+        as attributes belong to classes. New elements are created as an :ref:`ElementBuilder`,
+        which is replaced by the element itself when the schema is finalized.
+
+        :param typ: element type, one of class, slot, enum, type, subset
+        :param name: element name
+        :param is_attr: if True, then the element is an attribute, not a slot
+        :param stub: optional, element to use if not found; by default a new element builder is created
+        :return: element or element builder
+        """
+        if self.element_map is None:
+            self._index_elements()
+        key = (typ, name)
+        elt = self.element_map.get(key)
+        if elt is not None:
+            return elt
+        if typ not in INDEXED_ELEMENT_TYPES:
+            raise ValueError(f'TODO: implement for type {typ} in {name}')
+        elt = stub if stub is not None else ElementBuilder(INDEXED_ELEMENT_TYPES[typ], name=name)
+        if typ == T_SLOT and (self.use_attributes or is_attr):
+            return elt
+        logging.debug(f"Adding {name} to schema")
+        self._element_dict(typ)[name] = elt
+        self.element_map[key] = elt
+        return elt
+
+    def _element_dict(self, typ: str) -> Dict[str, Element]:
+        return getattr(self.schema, ELEMENT_DICT_SLOTS[typ])
+
+    def _index_elements(self) -> None:
+        """
+        Builds the element map from the current schema
+
+        :return:
+        """
+        self.element_map = {}
+        for typ in INDEXED_ELEMENT_TYPES:
+            for name, elt in self._element_dict(typ).items():
+                self.element_map[(typ, name)] = elt
 
     def row_focal_element(self, row: Dict[str, Any], table_config: TableConfig,
                           column: COL_NAME = None) -> Generator[None, Element, None]:
@@ -387,16 +1100,16 @@ class SchemaMaker:
         if table_config.metatype_column:
             tc = table_config.metatype_column
             if tc in row:
-                typ = self.normalize_value(row[tc], table_config.columns[tc])
+                typ = self.column_normalizers(table_config)[tc](row[tc])
                 if not table_config.name_column:
                     raise ValueError(f'name column must be set when type column ({tc}) is set; row={row}')
                 name_val = row[table_config.name_column]
                 if not name_val:
                     raise ValueError(f'name column must be set when type column ({tc}) is set')
                 if typ == 'class':
-                    vmap[T_CLASS] = [self.get_current_element(ClassDefinition(name_val))]
+                    vmap[T_CLASS] = [self.lookup_element(T_CLASS, name_val)]
                 elif typ == 'slot':
-                    vmap[T_SLOT] = [self.get_current_element(SlotDefinition(name_val))]
+                    vmap[T_SLOT] = [self.lookup_element(T_SLOT, name_val)]
                 else:
                     raise ValueError(f'Unknown metatype: {typ}')
         if table_config.column_by_element_type is None:
@@ -405,7 +1118,7 @@ class SchemaMaker:
             if k in table_config.column_by_element_type:
                 col = table_config.column_by_element_type[k]
                 if col in row:
-                    v = self.normalize_value(row[col])
+                    v = _normalize_element_name(row[col])
                     if v:
                         if '|' in v:
                             vs = v.split('|')
@@ -429,7 +1142,11 @@ class SchemaMaker:
                             self.schema.name = vs[0]
                             vmap[k] = [self.schema]
                         elif k == T_ATTRIBUTE:
-                            vmap[k] = [self.get_current_element(elt_cls(v), is_attr=True) for v in vs]
+                            vmap[k] = [self.lookup_element(T_SLOT, v, is_attr=True) for v in vs]
+                        elif k in INDEXED_ELEMENT_TYPES:
+                            vmap[k] = [self.lookup_element(k, v) for v in vs]
+                        elif elt_cls == PermissibleValue:
+                            vmap[k] = [ElementBuilder(PermissibleValue, text=v) for v in vs]
                         else:
                             vmap[k] = [self.get_current_element(elt_cls(v)) for v in vs]
 
@@ -444,7 +1161,7 @@ class SchemaMaker:
                 if T_CLASS in vmap and vmap[T_CLASS]:
                     raise ValueError(f'Cannot use applies_to_class in class-focused row')
                 else:
-                    cls = self.get_current_element(ClassDefinition(cc.settings.applies_to_class))
+                    cls = self.lookup_element(T_CLASS, cc.settings.applies_to_class)
                     vmap[T_CLASS] = [cls]
         if T_SLOT in vmap or T_ATTRIBUTE in vmap:
             if T_SLOT in vmap and T_ATTRIBUTE in vmap:
@@ -464,7 +1181,7 @@ class SchemaMaker:
                     if self.use_attributes or T_SLOT_ATTR == T_ATTRIBUTE:
                         # slots always belong to a class;
                         # no separate top level slots
-                        a = SlotDefinition(main_elt.name)
+                        a = ElementBuilder(SlotDefinition, name=main_elt.name)
                         c.attributes[main_elt.name] = a
                         yield a
                     else:
@@ -474,8 +1191,11 @@ class SchemaMaker:
                         if self.unique_slots:
                             yield main_elt
                         else:
-                            c.slot_usage[main_elt.name] = SlotDefinition(main_elt.name)
-                            main_elt = c.slot_usage[main_elt.name]
+                            main_elt = ElementBuilder(SlotDefinition, name=main_elt.name)
+                            c.slot_usage[main_elt.name] = main_elt
+                            if self.slot_usage_owners is None:
+                                self.slot_usage_owners = {}
+                            self.slot_usage_owners[id(main_elt)] = (c.name, main_elt)
                             yield main_elt
             else:
                 yield main_elt
@@ -533,86 +1253,29 @@ class SchemaMaker:
         For example, if this method is called with a value v and a column config that has
         a regex pattern, then the regex is used to extract the value from v
 
+        Note that when translating a sheet, a normalizer is compiled once per column,
+        see :ref:`compile_normalizer`; this method compiles one on each call.
+
         :param v:
         :param column_config: optional
         :return:
         """
-        if column_config:
-            metaslot = column_config.metaslot
-        else:
-            metaslot = None
-        if v == '.':
-            v = None
-        elif v == '':
-            v = None
-        elif v == 'n/a':
-            v = None
-        if v and (v.startswith(' ') or v.endswith(' ')):
-            if column_config:
-                logging.warning(f'Stripping value: "{v}" for {column_config.name}')
-            else:
-                logging.warning(f'Stripping value: "{v}" (no column config)')
-            v = v.strip()
-        if v and column_config:
-            re_match = column_config.settings.regular_expression_match
-            if re_match:
-                m = re.search(re_match, v)
-                if m:
-                    v = m.group(1)
-                else:
-                    logging.error(f'No match using {column_config.settings.regular_expression_match} on {v}')
-                    v = None
-            if column_config.settings.curie_prefix:
-                if ':' in v:
-                    logging.warning(
-                        f'Will not prefix {v} with {column_config.settings.curie_prefix} as it is already prefixed')
-                else:
-                    v = f'{column_config.settings.curie_prefix}:{v}'
-            if column_config.settings.prefix:
-                v = f'{column_config.settings.prefix}{v}'
-            if column_config.settings.suffix:
-                v = f'{column_config.settings.suffix}{v}'
-            if column_config.settings.vmap:
-                vmap = column_config.settings.vmap
-                if v in vmap:
-                    v = vmap[v].map_value
-                elif '*' in vmap:
-                    v = vmap['*'].map_value
-                else:
-                    logging.warning(f'No mapping for {v}, passing through')
-        if metaslot and metaslot.range:
-            rng = metaslot.range
-            if column_config.inner_key_metaslot:
-                rng = column_config.inner_key_metaslot.range
-            if rng == 'boolean':
-                bmap = {
-                    'yes': True,
-                    'no': False,
-                    'true': True,
-                    'false': False,
-                }
-                if v and v.lower() in bmap:
-                    v = bmap[v.lower()]
-                else:
-                    v = bool(v)
-        # TODO: use inner_key to look up the actual slot
-        metaslot_is_multivalued = metaslot and metaslot.multivalued and not column_config.settings.inner_key
-        if metaslot and column_config.settings.inner_key:
-            if column_config.settings.internal_separator:
-                # print(f"ASSUMING MV FOR {column_config.name}")
-                metaslot_is_multivalued = True
-        if metaslot_is_multivalued:
-            if not isinstance(v, list):
-                if v is None:
-                    v = []
-                else:
-                    if column_config.settings.internal_separator:
-                        v = v.split(column_config.settings.internal_separator)
-                    else:
-                        v = [v]
-        return v
+        return compile_normalizer(column_config)(v)
 
-    def set_cardinality(self, element: SlotDefinition, card: str) -> None:
+    def column_normalizers(self, table_config: TableConfig) -> Dict[COL_NAME, Normalizer]:
+        """
+        Returns a compiled normalizer for each column in the table configuration
+
+        Normalizers are compiled on first use, and recompiled if the configuration changes
+
+        :param table_config:
+        :return: mapping between column names and normalizers
+        """
+        if table_config.normalizers is None:
+            table_config.normalizers = {k: compile_normalizer(cc) for k, cc in table_config.columns.items()}
+        return table_config.normalizers
+
+    def set_cardinality(self, element: SlotDefinition, card: str, vocabulary: str = None) -> None:
         """
         Sets the cardinality of a slot, allowing a variety of vocabularies.
 
@@ -628,55 +1291,32 @@ class SchemaMaker:
         - multivalued
         - recommended
 
+        Terms are resolved using a table that is computed once per vocabulary, see :ref:`cardinality_table`
+
         :param element: slot
         :param card: cardinality term
+        :param vocabulary: vocabulary for codes; defaults to cardinality_vocabulary, or code if not set
         :return: None
         """
         if not card:
             return
-        # shortcuts for UML
-        if card == '1':
-            card = '1..1'
-        if card == '*':
-            card = '0..*'
-        # parse UML strings as a simple grammar
-        if '..' in card:
-            [min, max] = card.split('..')
-            element.required = int(min) > 0
-            element.multivalued = max == '*' or int(max) > 1
-        else:
-            # lookup in cardinality vocabulary
-            sv = get_configmodel()
-            cvocab = self.cardinality_vocabulary
-            if cvocab is None:
-                cvocab = 'code'
-            matches = []
-            pvs = sv.get_enum('Cardinality').permissible_values
-            for pv in pvs.values():
-                annv = pv.annotations.get(cvocab)
-                if card and annv and annv.value == card:
-                    matches.append(pv)
-                if card == pv.text:
-                    matches.append(pv)
-            if len(matches) > 1:
-                raise ValueError(f'Ambiguous matches to {card}: {matches}')
-            if matches:
-                match = matches[0]
-                if match.text == Cardinality.not_applicable.text:
-                    # this slot usage will be removed post-processing
-                    element.annotations['inapplicable'] = Annotation('inapplicable', 'true')
-                maps_to_ann = match.annotations.get('maps_to')
-                if maps_to_ann:
-                    yobj = yaml.safe_load(maps_to_ann.value)
-                    for k, v in yobj.items():
-                        if k == 'required':
-                            element.required = v
-                        elif k == 'multivalued':
-                            element.multivalued = v
-                        elif k == 'recommended':
-                            element.recommended = v
-            else:
-                raise ValueError(f'Cannot parse cardinality: {card} // {pvs.keys()}')
+        if vocabulary is None:
+            vocabulary = self.cardinality_vocabulary
+        if vocabulary is None:
+            vocabulary = 'code'
+        mapping = lookup_cardinality(card, vocabulary)
+        if mapping.inapplicable:
+            # this slot usage will be removed post-processing
+            element.annotations['inapplicable'] = Annotation('inapplicable', 'true')
+            owner = self.slot_usage_owners.get(id(element)) if self.slot_usage_owners else None
+            if owner:
+                self._add_inapplicable_slot_usage(owner[0], element.name)
+        if mapping.required is not None:
+            element.required = mapping.required
+        if mapping.multivalued is not None:
+            element.multivalued = mapping.multivalued
+        if mapping.recommended is not None:
+            element.recommended = mapping.recommended
 
     def repair_schema(self, schema: SchemaDefinition) -> SchemaDefinition:
         """
@@ -685,68 +1325,120 @@ class SchemaMaker:
         - adds default prefixes
         - repairs subsets
 
+        Only the elements of the schema itself are repaired, not those of imported schemas.
+
         :param schema:
         :return:
         """
-        sv = SchemaView(schema)
-        # pfx = schema.default_prefix
-        # if pfx not in schema.prefixes:
-        #    schema.prefixes[pfx] = Prefix(pfx, f'http://example.org/{pfx}/')
-        #    logging.info(f'Set default prefix: {schema.prefixes[pfx]}')
-        prefixes = set()
-        for e in list(sv.all_elements(imports=False).values()):
-            # TODO: this does not include slot_usage
-            map_ix = sv.get_mappings(e.name)
-            for t, curies in map_ix.items():
-                if curies:
-                    for curie in curies:
-                        if ':' in curie:
-                            prefixes.add(curie.split(':')[0])
-        namespaces = sv.namespaces()
-        for pfx in prefixes:
-            if pfx not in namespaces:
-                logging.debug(f'Guessing prefix expansion: {pfx}')
-                pfx_ref = guess_prefix_expansion(pfx)
+        prefixes, subsets = schema_references(schema, set_from_schema=True)
+        namespaces = Namespaces()
+        for cmap in schema.default_curi_maps:
+            namespaces.add_prefixmap(cmap, include_defaults=False)
+        for prefix in schema.prefixes.values():
+            namespaces[prefix.prefix_prefix] = prefix.prefix_reference
+        missing = sorted(pfx for pfx in prefixes if pfx not in namespaces)
+        if missing and schema.imports:
+            # prefixes declared in imported schemas, e.g. xsd in linkml:types, are not missing
+            sv = SchemaView(schema)
+            sv.imports_closure(inject_metadata=False)
+            namespaces = sv.namespaces()
+            missing = [pfx for pfx in missing if pfx not in namespaces]
+        if missing:
+            if self.prefix_resolver is None:
+                # guesses are only stored if a cache directory is given; otherwise they are memoized in memory
+                self.prefix_resolver = PrefixResolver(prefix_map_path=self.prefix_map_path,
+                                                      cache_dir=self.cache_dir or persistent_cache_dir())
+            expansions = self.prefix_resolver.resolve(missing)
+            for pfx in missing:
+                pfx_ref = expansions[pfx]
                 if not pfx_ref:
                     pfx_ref = f'http://example.org/{pfx}/'
                 schema.prefixes[pfx] = Prefix(pfx, pfx_ref)
                 logging.warning(f'Filling in missing prefix for: {pfx} => {pfx_ref}')
-        # reset indexes
-        sv = SchemaView(schema)
-        subsets = set()
-        for e in sv.all_elements().values():
-            subsets.update(set(e.in_subset))
         for s in subsets:
             if s not in schema.subsets:
                 schema.subsets[s] = SubsetDefinition(s)
         return schema
 
+    def _sheet_fetcher(self) -> SheetFetcher:
+        fetcher = SheetFetcher()
+        if self.gsheet_concurrency is not None:
+            fetcher.max_workers = self.gsheet_concurrency
+        if self.gsheet_retries is not None:
+            fetcher.retries = self.gsheet_retries
+        return fetcher
+
+    def fetch_gsheets(self, sheet_names: List[str]) -> List[str]:
+        """
+        Downloads all of the given google sheets tabs concurrently, before any translation starts
+
+        Each tab is downloaded once; subsequent reads of the tab use the downloaded content.
+        If gsheet_workbook is set, the whole google sheet is downloaded in a single request instead.
+
+        :param sheet_names: tab names; if empty, and gsheet_workbook is set, all schema sheet tabs are used
+        :return: tab names to translate
+        """
+        if self.gsheet_workbook:
+            self.gsheet_workbook_data = fetch_gsheet_workbook(self.gsheet_id,
+                                                              fetcher=self._sheet_fetcher(),
+                                                              cache=self._sheet_cache())
+            self._open_workbook = None
+            if not sheet_names:
+                sheet_names = discover_schemasheets(self._workbook())
+                logging.info(f'Found schema sheets: {sheet_names}')
+            return sheet_names
+        self.gsheet_data = fetch_gsheets(self.gsheet_id, sheet_names,
+                                         fetcher=self._sheet_fetcher(),
+                                         cache=self._sheet_cache())
+        return sheet_names
+
+    def _workbook(self):
+        # opened once, and shared by all tabs; not a field, so it is never copied to worker processes
+        if getattr(self, '_open_workbook', None) is None:
+            self._open_workbook = open_workbook(self.gsheet_workbook_data)
+        return self._open_workbook
+
+    def _sheet_cache(self) -> Optional[SheetCache]:
+        if not self.gsheet_cache_dir:
+            if self.offline:
+                raise ValueError('Offline mode requires a google sheets cache directory')
+            return None
+        return SheetCache(self.gsheet_cache_dir,
+                          ttl=self.gsheet_cache_ttl or 0,
+                          offline=bool(self.offline),
+                          max_age=self.gsheet_cache_max_age,
+                          max_size=self.gsheet_cache_max_size)
+
+    def _gsheet_text(self, file_name: str) -> str:
+        data = self.gsheet_data.get(file_name) if self.gsheet_data else None
+        if data is None:
+            url = gsheets_download_url(self.gsheet_id, file_name)
+            cache = self._sheet_cache()
+            if cache is None:
+                data = self._sheet_fetcher().fetch(url)
+            else:
+                data = cache.fetch(gsheet_cache_name(self.gsheet_id, file_name), url, self._sheet_fetcher())
+        return data.decode('utf-8')
+
     @contextlib.contextmanager
     def ensure_file(self, file_name: str) -> str:
         if self.gsheet_id:
-            url = gsheets_download_url(self.gsheet_id, file_name)
-            stream = urlopen(url)
-            yield codecs.iterdecode(stream, 'utf-8')
+            yield io.StringIO(self._gsheet_text(file_name), newline='')
         else:
             with open(file_name) as file:
                 yield file
 
     @contextlib.contextmanager
     def ensure_csvreader(self, file_name: str, delimiter=None) -> str:
-        if self.gsheet_id:
-            url = gsheets_download_url(self.gsheet_id, file_name)
-            if self.gsheet_cache_dir:
-                # cache a copy of the file
-                dir_path = Path(self.gsheet_cache_dir)
-                dir_path.mkdir(parents=True, exist_ok=True)
-                path = dir_path / (file_name + '.csv')
-                stream = urlopen(url)
-                lines = [line for line in codecs.iterdecode(stream, 'utf-8')]
-                with open(path, 'w') as f:
-                    f.write("".join(lines))
-                stream.close()
-            stream = urlopen(url)
-            text_stream = codecs.iterdecode(stream, 'utf-8')
+        if self.gsheet_id and self.gsheet_workbook:
+            if self.gsheet_workbook_data is None:
+                self.fetch_gsheets([file_name])
+            workbook = self._workbook()
+            if file_name not in workbook.sheetnames:
+                raise ValueError(f'No tab named {file_name} in google sheet {self.gsheet_id}')
+            yield worksheet_rows(workbook[file_name])
+        elif self.gsheet_id:
+            text_stream = io.StringIO(self._gsheet_text(file_name), newline='')
             reader = csv.DictReader(text_stream, delimiter=",")
             yield reader
 
@@ -755,6 +1447,10 @@ class SchemaMaker:
                 reader = csv.DictReader(file, delimiter=delimiter)
                 yield reader
 
+def _create_schema_fragment(maker: SchemaMaker, file_name: str, kwargs: Dict[str, Any]) -> SchemaDefinition:
+    # module-level, so that it can be pickled for use in a process pool
+    return maker.create_schema_fragment(file_name, **kwargs)
+
 
 @click.command()
 @click.option('-o', '--output',
@@ -784,13 +1480,78 @@ class SchemaMaker:
 @click.option("--gsheet-id",
               help="Google sheets ID. If this is specified then the arguments MUST be sheet names")
 @click.option("--gsheet-cache-dir",
-                help="Directory to cache google sheets")
+              help="Directory to cache google sheets. Cached tabs are only downloaded again if they have changed")
+@click.option("--gsheet-cache-ttl",
+              type=float,
+              default=0,
+              show_default=True,
+              help="Seconds during which a cached google sheets tab is used without checking whether it has changed")
+@click.option("--gsheet-cache-max-age",
+              type=float,
+              help="Evict cached google sheets tabs that have not been used for this many seconds")
+@click.option("--gsheet-cache-max-size",
+              type=int,
+              help="Maximum total size in bytes of the google sheets cache; least recently used tabs are evicted first")
+@click.option("--offline/--no-offline",
+              default=False,
+              show_default=True,
+              help="Only use google sheets tabs from --gsheet-cache-dir, never download")
+@click.option("--gsheet-workbook/--no-gsheet-workbook",
+              default=False,
+              show_default=True,
+              help="Download the whole google sheet in a single request as an Excel workbook. "
+                   "If no sheet names are given, all tabs that are schema sheets are used")
+@click.option("--gsheet-concurrency",
+              type=int,
+              default=4,
+              show_default=True,
+              help="Maximum number of google sheets tabs to download concurrently")
+@click.option("--gsheet-retries",
+              type=int,
+              default=3,
+              show_default=True,
+              help="Number of times a failed google sheets download is retried")
+@click.option("--prefix-map",
+              help="JSON or TSV file mapping prefixes to expansions, used to fill in missing prefixes on repair "
+                   "instead of bioregistry")
 @click.option("--base-schema-path",
               help="Base schema yaml file, the base-schema will be merged with the generated schema")
+@click.option("-j", "--jobs",
+              type=int,
+              default=1,
+              show_default=True,
+              help="Number of sheets to translate in parallel")
+@click.option("--stream-rows/--no-stream-rows",
+              default=False,
+              show_default=True,
+              help="Translate rows as they are read, so large sheets are converted in bounded memory. "
+                   "All descriptor rows must precede the data rows of each sheet")
+@click.option("--cache-dir",
+              help="Directory in which to cache translated sheets and guessed prefixes; only changed sheets are "
+                   "translated on a rebuild")
+@click.option("--watch/--no-watch",
+              default=False,
+              show_default=True,
+              help="Keep running, and rebuild the output whenever a sheet or the table config changes")
+@click.option("--watch-interval",
+              type=float,
+              default=0.5,
+              show_default=True,
+              help="Seconds between checks for changes in watch mode")
+@click.option("--profile/--no-profile",
+              default=False,
+              show_default=True,
+              help="Report the time and peak memory of each phase, and row throughput of each sheet, on stderr")
+@click.option("--profile-json",
+              help="Write the profile as JSON to this file, e.g. for tracking performance over time")
 @click.option("-v", "--verbose", count=True)
 @click.argument('tsv_files', nargs=-1)
 def convert(tsv_files, gsheet_id, gsheet_cache_dir, output: TextIO, name, repair, table_config_path: str, use_attributes: bool,
-            unique_slots: bool, verbose: int, sort_keys: bool, base_schema_path: str):
+            unique_slots: bool, verbose: int, sort_keys: bool, base_schema_path: str, jobs: int,
+            stream_rows: bool, cache_dir: str,
+            watch: bool, watch_interval: float, gsheet_concurrency: int, gsheet_retries: int,
+            gsheet_cache_ttl: float, gsheet_cache_max_age: float, gsheet_cache_max_size: int, offline: bool,
+            gsheet_workbook: bool, profile: bool, profile_json: str, prefix_map: str):
     """
     Convert schemasheets to a LinkML schema
 
@@ -804,6 +1565,21 @@ def convert(tsv_files, gsheet_id, gsheet_cache_dir, output: TextIO, name, repair
     Example:
 
         sheets2linkml --gsheet-id 1wVoaiFg47aT9YWNeRfTZ8tYHN8s8PAuDx5i2HUcDpvQ personinfo types -o my_schema.yaml
+
+    To download all tabs in a single request, and translate every tab that is a schema sheet, use --gsheet-workbook:
+
+        sheets2linkml --gsheet-id 1wVoaiFg47aT9YWNeRfTZ8tYHN8s8PAuDx5i2HUcDpvQ --gsheet-workbook -o my_schema.yaml
+
+    With --gsheet-cache-dir, tabs are only downloaded again if they have changed; add --offline
+    to build from the cached tabs without any network access.
+
+    To keep the output up to date while editing sheets, use --watch:
+
+        sheets2linkml my_schema/*tsv --output my_schema.yaml --watch
+
+    To see where time is spent, use --profile:
+
+        sheets2linkml my_schema/*tsv --output my_schema.yaml --profile --profile-json profile.json
     """
     if verbose >= 2:
         logging.basicConfig(level=logging.DEBUG)
@@ -811,18 +1587,66 @@ def convert(tsv_files, gsheet_id, gsheet_cache_dir, output: TextIO, name, repair
         logging.basicConfig(level=logging.INFO)
     else:
         logging.basicConfig(level=logging.WARNING)
+    if watch and output is sys.stdout:
+        raise click.UsageError('--watch requires --output')
+    if watch and gsheet_id:
+        raise click.UsageError('--watch cannot be used with --gsheet-id')
+    if gsheet_workbook and not gsheet_id:
+        raise click.UsageError('--gsheet-workbook requires --gsheet-id')
+    if offline and not gsheet_cache_dir:
+        raise click.UsageError('--offline requires --gsheet-cache-dir')
     sm = SchemaMaker(use_attributes=use_attributes,
                      unique_slots=unique_slots,
                      gsheet_id=gsheet_id,
                      gsheet_cache_dir=gsheet_cache_dir,
+                     gsheet_cache_ttl=gsheet_cache_ttl,
+                     gsheet_cache_max_age=gsheet_cache_max_age,
+                     gsheet_cache_max_size=gsheet_cache_max_size,
+                     offline=offline,
+                     gsheet_workbook=gsheet_workbook,
+                     gsheet_concurrency=gsheet_concurrency,
+                     gsheet_retries=gsheet_retries,
                      default_name=name,
                      table_config_path=table_config_path,
-                     base_schema_path=base_schema_path)
-    schema = sm.create_schema(list(tsv_files))
-    if repair:
-        schema = sm.repair_schema(schema)
-    schema_dict = schema_as_dict(schema)
-    output.write(yaml.dump(schema_dict, sort_keys=sort_keys))
+                     base_schema_path=base_schema_path,
+                     prefix_map_path=prefix_map,
+                     jobs=jobs,
+                     stream_rows=stream_rows,
+                     cache_dir=cache_dir)
+
+    def build():
+        profiler = sm.profiler = Profiler(command='sheets2linkml') if profile or profile_json else None
+        with profiler or contextlib.nullcontext():
+            schema = sm.create_schema(list(tsv_files))
+            if repair:
+                with profile_phase(profiler, 'repair_schema'):
+                    schema = sm.repair_schema(schema)
+            with profile_phase(profiler, 'dump_yaml'):
+                schema_dict = schema_as_dict(schema)
+                if watch:
+                    # replace the previous build
+                    output.seek(0)
+                    output.truncate()
+                output.write(yaml.dump(schema_dict, sort_keys=sort_keys))
+                output.flush()
+        if profile:
+            click.echo(profiler.report(), err=True)
+        if profile_json:
+            profiler.write_json(profile_json)
+
+    if not watch:
+        build()
+        return
+    # keep translated sheets in memory, so only changed sheets are translated again
+    sm.fragment_cache = FragmentCache(cache_dir, in_memory=True)
+    build()
+    watched = list(tsv_files) + ([table_config_path] if table_config_path else [])
+    for changed in FileWatcher(watched).watch(interval=watch_interval):
+        logging.warning(f'Rebuilding {output.name}; changed: {changed}')
+        try:
+            build()
+        except Exception as e:
+            logging.error(f'Could not rebuild {output.name}: {e}')
 
 
 if __name__ == '__main__':
@@ -1,7 +1,8 @@
 """Core data model for a SchemaSheet."""
 import csv
 from dataclasses import dataclass
-from typing import Union, Dict, List, Any
+from types import MappingProxyType
+from typing import Union, Dict, List, Any, Iterable, Iterator, Callable, Mapping, Tuple, Optional
 import pkgutil
 from pathlib import PurePath, Path
 from functools import lru_cache
@@ -14,6 +15,7 @@ from linkml_runtime.linkml_model.meta import Setting
 from linkml_runtime.utils.schemaview import SchemaView
 
 from schemasheets.conf.configschema import ColumnSettings, Shortcuts
+from schemasheets.utils.metamodel_snapshot import get_snapshot
 
 COL_NAME = str
 DESCRIPTOR = str
@@ -99,19 +101,10 @@ class ColumnConfig:
                     self.merge_settings(settings)
             else:
                 self.maps_to = info
-            mm = get_metamodel()
-            snmap = mm.slot_name_mappings()
-            for k, v in snmap.items():
-                if k != v.name:
-                    logging.info(f"Mismatch between slot_name_mapping key {k} slot name {v.name}")
-            # TODO: use alias
-            snmap['uri'] = snmap['type_uri']
-            if self.maps_to.startswith("metaslot."):
-                maps_to = self.maps_to.replace("metaslot.", "")
-                self.metaslot = snmap[maps_to]
+            maps_to, metaslot = lookup_metaslot(self.maps_to)
+            if metaslot is not None:
+                self.metaslot = metaslot
                 self.maps_to = maps_to
-            elif self.maps_to in snmap and self.maps_to != 'type':
-                self.metaslot = snmap[self.maps_to]
             else:
                 if self.maps_to not in tmap and self.maps_to not in Shortcuts:
                     raise ValueError(f'Cannot interpret: {self.maps_to}')
@@ -119,7 +112,7 @@ class ColumnConfig:
             settings = ColumnSettings(**info)
             self.merge_settings(settings)
             if settings.inner_key:
-                snmap = get_metamodel().slot_name_mappings()
+                snmap = get_metaslot_index()
                 if settings.inner_key in snmap:
                     self.inner_key_metaslot = snmap[settings.inner_key]
 
@@ -146,6 +139,13 @@ class TableConfig:
     name_column: COL_NAME = None
     """Column that represents that name of the entity"""
 
+    normalizers: Dict[COL_NAME, Callable[[Any], Any]] = None
+    """compiled value normalizers for each column; reset whenever column configuration is added"""
+
+    export_plan: Any = None
+    """columns used to export each type of element, see :ref:`ExportPlan`; reset whenever column configuration
+    is added"""
+
     def add_info(self, col: COL_NAME, info: Union[Dict, DESCRIPTOR]) -> None:
         """
         Wrapper for :ref:`ColumnConfig.add_info`
@@ -156,6 +156,8 @@ class TableConfig:
         if col not in self.columns:
             self.columns[col] = ColumnConfig(col)
         self.columns[col].add_info(info)
+        self.normalizers = None
+        self.export_plan = None
         if self.columns[col].maps_to == 'metatype':
             if self.metatype_column and self.metatype_column != col:
                 raise ValueError(f'Multiple metatype columns not allowed: {self.metatype_column}, {col}')
@@ -179,9 +181,12 @@ class SchemaSheet:
 
     - a collection of rows, each row representing a schema element
     - a TableConfiguration
+
+    If the sheet was read in streaming mode, then rows is a generator that is
+    consumed as the underlying reader is consumed, and can only be iterated once.
     """
     table_config: TableConfig
-    rows: List[ROW]
+    rows: Iterable[ROW]
     start_line_number: int
     table_config_rows: List[ROW] = None
 
@@ -192,11 +197,17 @@ class SchemaSheet:
             return cls.from_dictreader(reader)
 
     @staticmethod
-    def from_dictreader(reader: csv.DictReader) -> "SchemaSheet":
+    def from_dictreader(reader: Iterable[ROW], stream: bool = False) -> "SchemaSheet":
         """
         Reads a schemasheets TSV file parsing only header info
 
+        In streaming mode, the descriptor rows at the top of the sheet are parsed up front,
+        and the remaining rows are yielded lazily from the reader; this means the reader
+        must remain open while the rows are consumed. Descriptor rows must precede all
+        data rows in this mode.
+
         :param reader:
+        :param stream: if True, yield data rows lazily rather than collecting them in a list
         :return:
         """
         table_config = TableConfig(columns={})
@@ -204,13 +215,11 @@ class SchemaSheet:
         line_num = 1
         table_config_rows = []
         descriptor_line_count = 0
-        for row in reader:
+        row_iter = iter(reader)
+        for row in row_iter:
             logging.debug(f"ROW: {row}")
-            # google sheets
-            if "" in row:
-                del row[""]
-            k0 = list(row.keys())[0]
-            if row[k0].startswith('>'):
+            _strip_unnamed_column(row)
+            if _is_descriptor_row(row):
                 table_config_rows.append(row)
                 line_num += 1
                 descriptor_line_count += 1
@@ -225,6 +234,9 @@ class SchemaSheet:
                             # TODO: consider auto-interpreting
                             raise ValueError(f'Enter an interpretation for {k}')
                         logging.debug(f'Empty val for {k} in line {line_num}')
+            elif stream:
+                rows = _stream_data_rows(row, row_iter)
+                break
             else:
                 rows.append(row)
         if descriptor_line_count == 0:
@@ -252,6 +264,34 @@ class SchemaSheet:
             else:
                 self.table_config.add_info(k, v)
 
+def _strip_unnamed_column(row: ROW) -> None:
+    # google sheets
+    if "" in row:
+        del row[""]
+
+
+def _is_descriptor_row(row: ROW) -> bool:
+    k0 = list(row.keys())[0]
+    return row[k0].startswith('>')
+
+
+def _stream_data_rows(first_row: ROW, row_iter: Iterator[ROW]) -> Iterator[ROW]:
+    """
+    Yields the data rows of a sheet, starting with the first row that follows the descriptors
+
+    :param first_row: first data row, already consumed from the reader
+    :param row_iter: iterator over the remaining rows
+    :return:
+    """
+    yield first_row
+    for row in row_iter:
+        _strip_unnamed_column(row)
+        if _is_descriptor_row(row):
+            raise ValueError(f'Descriptor rows must precede all data rows in streaming mode; '
+                             f'read the sheet without streaming instead; got: {row}')
+        yield row
+
+
 @lru_cache()
 def get_metamodel() -> SchemaView:
     """
@@ -266,6 +306,49 @@ def get_metamodel() -> SchemaView:
     data = pkgutil.get_data(package, f'{full_path}/meta.yaml')
     return SchemaView(data.decode("utf-8"))
 
+@lru_cache()
+def get_metaslot_index() -> Mapping[str, SlotDefinition]:
+    """
+    Returns a read-only index of metamodel slots, keyed by code-safe slot name
+
+    The index is built once per process and shared, so it must not be modified.
+    In addition to the slot names, ``uri`` is indexed as an alias for ``type_uri``.
+
+    Slots are read from the metamodel snapshot, see :ref:`get_snapshot`, and only have
+    the name, range, and multivalued flag of the metamodel slot.
+
+    :return: mapping from slot names to metamodel slots
+    """
+    snmap = {k: SlotDefinition(s['name'], range=s['range'], multivalued=s['multivalued'])
+             for k, s in get_snapshot()['slots'].items()}
+    for k, v in snmap.items():
+        if k != v.name:
+            logging.info(f"Mismatch between slot_name_mapping key {k} slot name {v.name}")
+    # TODO: use alias
+    snmap['uri'] = snmap['type_uri']
+    return MappingProxyType(snmap)
+
+
+def lookup_metaslot(descriptor: DESCRIPTOR) -> Tuple[DESCRIPTOR, Optional[SlotDefinition]]:
+    """
+    Looks up the metamodel slot for a column descriptor
+
+    Descriptors may be explicitly prefixed with ``metaslot.``, in which case the prefix is
+    removed, and the descriptor must match a metamodel slot. Otherwise, the descriptor
+    ``type`` is never treated as a metaslot, as it denotes a type element.
+
+    :param descriptor: column descriptor, e.g. description, metaslot.range
+    :return: tuple of the (unprefixed) descriptor and the metaslot, or None if not a metaslot
+    """
+    snmap = get_metaslot_index()
+    if descriptor.startswith("metaslot."):
+        descriptor = descriptor.replace("metaslot.", "")
+        return descriptor, snmap[descriptor]
+    elif descriptor in snmap and descriptor != 'type':
+        return descriptor, snmap[descriptor]
+    return descriptor, None
+
+
 @lru_cache()
 def get_configmodel() -> SchemaView:
     """
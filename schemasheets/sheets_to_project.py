@@ -1,3 +1,4 @@
+import contextlib
 import logging
 import os
 
@@ -5,10 +6,10 @@ import click
 import yaml
 from typing import List, Union, Any, Dict, Tuple, Generator
 
-from linkml.generators.projectgen import ProjectConfiguration, ProjectGenerator
 from linkml_runtime.dumpers import yaml_dumper
 
 from schemasheets.schemamaker import SchemaMaker
+from schemasheets.utils.profiler import Profiler, profile_phase
 
 
 @click.command()
@@ -37,11 +38,23 @@ from schemasheets.schemamaker import SchemaMaker
               default=False,
               show_default=True,
               help="All slots are treated as unique and top level and do not belong to the specified class")
+@click.option("-j", "--jobs",
+              type=int,
+              default=1,
+              show_default=True,
+              help="Number of sheets to translate in parallel")
+@click.option("--profile/--no-profile",
+              default=False,
+              show_default=True,
+              help="Report the time and peak memory of each phase, and row throughput of each sheet, on stderr")
+@click.option("--profile-json",
+              help="Write the profile as JSON to this file, e.g. for tracking performance over time")
 @click.option("-v", "--verbose", count=True)
 @click.argument('tsv_files', nargs=-1)
 def multigen(tsv_files, dir, verbose: int, repair: bool, name,
-             unique_slots: bool,
-             exclude: List[str], include: List[str], config_file, generator_arguments: str, **kwargs):
+             unique_slots: bool, jobs: int,
+             exclude: List[str], include: List[str], config_file, generator_arguments: str,
+             profile: bool, profile_json: str, **kwargs):
     """
     Generate an entire set of schema files from Schemasheets
 
@@ -51,6 +64,9 @@ def multigen(tsv_files, dir, verbose: int, repair: bool, name,
 
 
     """
+    # the generators are slow to import, and are not needed to show help or validate arguments
+    from linkml.generators.projectgen import ProjectConfiguration, ProjectGenerator
+
     if verbose >= 2:
         logging.basicConfig(level=logging.DEBUG)
     elif verbose == 1:
@@ -74,17 +90,27 @@ def multigen(tsv_files, dir, verbose: int, repair: bool, name,
     if dir is None:
         dir = '.'
     project_config.directory = dir
-    sm = SchemaMaker()
+    profiler = Profiler(command='sheets2project') if profile or profile_json else None
+    sm = SchemaMaker(profiler=profiler)
     if name:
         sm.default_name = name
     sm.unique_slots = unique_slots
-    schema = sm.create_schema(list(tsv_files))
-    if repair:
-        schema = sm.repair_schema(schema)
-    out_file = os.path.join(dir, f'{name}.yaml')
-    yaml_dumper.dump(schema, to_file=out_file)
-    gen = ProjectGenerator()
-    gen.generate(out_file, project_config)
+    sm.jobs = jobs
+    with profiler or contextlib.nullcontext():
+        schema = sm.create_schema(list(tsv_files))
+        if repair:
+            with profile_phase(profiler, 'repair_schema'):
+                schema = sm.repair_schema(schema)
+        out_file = os.path.join(dir, f'{name}.yaml')
+        with profile_phase(profiler, 'dump_yaml'):
+            yaml_dumper.dump(schema, to_file=out_file)
+        with profile_phase(profiler, 'generate_project'):
+            gen = ProjectGenerator()
+            gen.generate(out_file, project_config)
+    if profile:
+        click.echo(profiler.report(), err=True)
+    if profile_json:
+        profiler.write_json(profile_json)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,96 @@
+from dataclasses import fields, MISSING
+from functools import lru_cache
+from typing import Any, Dict, Callable, Optional, Type
+
+from linkml_runtime.utils.yamlutils import YAMLRoot
+
+
+@lru_cache()
+def _field_factories(element_class: Type[YAMLRoot]) -> Dict[str, Optional[Callable[[], Any]]]:
+    """
+    Maps each field of an element class to the factory for its default value, if it is a collection
+
+    :param element_class: e.g. ClassDefinition
+    :return: mapping between field names and factories, or None for fields without a factory
+    """
+    return {f.name: None if f.default_factory is MISSING else f.default_factory for f in fields(element_class)}
+
+
+class ElementBuilder:
+    """
+    Accumulates the values of a single element, e.g. a class, as plain python values.
+
+    Translating a sheet sets values cell by cell; doing this on a builder avoids the cost of
+    metamodel objects until the element is complete, at which point :ref:`build` creates the
+    element in one step.
+
+    Values are read and written as attributes, in the same way as on the element itself.
+    Lists and dicts, such as aliases or slot_usage, are created empty on first access,
+    so they can be appended to or updated in place.
+    """
+    __slots__ = ('element_class', 'values')
+
+    def __init__(self, element_class: Type[YAMLRoot], **values: Any):
+        object.__setattr__(self, 'element_class', element_class)
+        object.__setattr__(self, 'values', values)
+
+    def __getattr__(self, key: str) -> Any:
+        # only called for keys that are not builder attributes
+        if key.startswith('__'):
+            raise AttributeError(key)
+        values = self.values
+        if key in values:
+            return values[key]
+        factories = _field_factories(self.element_class)
+        if key not in factories:
+            raise AttributeError(f'{self.element_class.__name__} has no slot {key}')
+        factory = factories[key]
+        if factory is None:
+            return None
+        value = values[key] = factory()
+        return value
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        self.values[key] = value
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.element_class.__name__}, {self.values})'
+
+    def build(self) -> YAMLRoot:
+        """
+        Creates the element, including any nested elements that are themselves builders
+
+        Plain values are converted to metamodel objects by the element class, in the same
+        way as when loading a schema; e.g. a dict for structured_pattern becomes a PatternExpression.
+
+        :return: element
+        """
+        return self.element_class(**{k: build_value(v) for k, v in self.values.items()})
+
+
+def element_class(element: Any) -> type:
+    """
+    Returns the class of an element, or of the element that a builder will create
+
+    :param element: element or builder
+    :return: e.g. ClassDefinition
+    """
+    if isinstance(element, ElementBuilder):
+        return element.element_class
+    return type(element)
+
+
+def build_value(value: Any) -> Any:
+    """
+    Builds all builders within a value, which may be a builder, list, or dict
+
+    :param value:
+    :return: value with all builders replaced by elements
+    """
+    if isinstance(value, ElementBuilder):
+        return value.build()
+    if isinstance(value, list):
+        return [build_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: build_value(v) for k, v in value.items()}
+    return value
@@ -0,0 +1,62 @@
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union, Iterator
+
+SIGNATURE = Optional[Tuple[int, int]]
+
+
+def file_signature(path: Union[str, Path]) -> SIGNATURE:
+    """
+    Returns a cheap signature of a file, which changes when the file is modified
+
+    :param path:
+    :return: tuple of modification time and size, or None if the file does not exist
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+@dataclass
+class FileWatcher:
+    """
+    Watches a set of files for changes, by polling their modification time and size.
+    """
+    paths: List[Union[str, Path]]
+    signatures: Dict[str, SIGNATURE] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.signatures = {str(p): file_signature(p) for p in self.paths}
+
+    def changed(self) -> List[str]:
+        """
+        Returns the files that have changed since the last check
+
+        :return: changed paths, in the order they were given
+        """
+        changed = []
+        for p, sig in self.signatures.items():
+            new_sig = file_signature(p)
+            if new_sig != sig:
+                self.signatures[p] = new_sig
+                changed.append(p)
+        return changed
+
+    def watch(self, interval: float = 1.0) -> Iterator[List[str]]:
+        """
+        Yields each time one or more files change
+
+        :param interval: seconds between polls
+        :return: iterator over lists of changed paths
+        """
+        logging.info(f"Watching {len(self.signatures)} files")
+        while True:
+            time.sleep(interval)
+            changed = self.changed()
+            if changed:
+                yield changed
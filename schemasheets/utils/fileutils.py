@@ -0,0 +1,66 @@
+"""Helpers shared by the caches and writers in schemasheets"""
+import contextlib
+import os
+import shutil
+import tempfile
+from importlib.metadata import version, PackageNotFoundError
+from pathlib import Path
+from typing import Union, Iterator, IO
+
+
+def package_version(package: str) -> str:
+    """
+    Version of an installed package, found without importing it
+
+    :param package: distribution name, e.g. linkml-runtime
+    :return: version, or "unknown" if the package is not installed
+    """
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+@contextlib.contextmanager
+def atomic_file(path: Union[str, Path], mode: str = 'w', encoding: str = None) -> Iterator[IO]:
+    """
+    Opens a temporary file in the same directory as path, which replaces path when the context exits
+
+    If the context exits with an error, the temporary file is removed and path is left unchanged,
+    so concurrent readers never see a partially written file.
+
+    :param path: file to be written; parent directories are created if needed
+    :param mode: 'w' or 'wb'
+    :param encoding: encoding of text files
+    :return: stream to write to
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as stream:
+            yield stream
+        if path.exists():
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_atomic(path: Union[str, Path], data: Union[str, bytes]) -> None:
+    """
+    Writes a file atomically, see :ref:`atomic_file`
+
+    :param path:
+    :param data: bytes, or text to be encoded as UTF-8
+    :return:
+    """
+    if isinstance(data, bytes):
+        with atomic_file(path, 'wb') as stream:
+            stream.write(data)
+    else:
+        with atomic_file(path, encoding='utf-8') as stream:
+            stream.write(data)
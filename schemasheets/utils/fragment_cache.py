@@ -0,0 +1,128 @@
+import copy
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union, Any, Dict, Iterable
+
+from linkml_runtime.dumpers import yaml_dumper
+from linkml_runtime.linkml_model import SchemaDefinition
+from linkml_runtime.loaders import yaml_loader
+
+from schemasheets.utils.fileutils import package_version, write_atomic
+
+CACHE_FORMAT_VERSION = "3"
+"""Increment this whenever the way sheets are translated to fragments changes"""
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    """
+    Returns the SHA-256 hex digest of the contents of a file
+
+    :param path:
+    :return:
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as stream:
+        for chunk in iter(lambda: stream.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@dataclass
+class FragmentCache:
+    """
+    Cache of schema fragments, each translated from a single schema sheet, stored on disk.
+
+    Fragments are keyed by the content of the sheet, the content of any table configuration,
+    and all settings that affect translation; a changed sheet therefore gets a new key,
+    and stale entries are never returned.
+
+    Entries are stored on disk as YAML, so a shared cache directory never holds anything
+    that is executed when loaded.
+
+    Entries can additionally be kept in memory, for long-running processes that rebuild
+    the same schema many times. Each retrieval returns a fresh copy that can be modified freely.
+    """
+    directory: Optional[Union[str, Path]] = None
+    """Directory in which entries are stored. If not set, entries are not stored on disk."""
+
+    in_memory: bool = False
+    """If True, also keep entries in memory."""
+
+    memory: Dict[str, SchemaDefinition] = field(default_factory=dict)
+
+    def key(self, sheet_path: Union[str, Path], table_config_path: Union[str, Path] = None, **settings: Any) -> str:
+        """
+        Computes the cache key for a sheet
+
+        :param sheet_path: path to the schema sheet
+        :param table_config_path: optional path to the table configuration
+        :param settings: any other settings that affect translation, e.g. use_attributes
+        :return: hex digest
+        """
+        parts = [
+            f"format={CACHE_FORMAT_VERSION}",
+            f"schemasheets={package_version('schemasheets')}",
+            f"linkml-runtime={package_version('linkml-runtime')}",
+            f"sheet={file_digest(sheet_path)}",
+            f"table_config={file_digest(table_config_path) if table_config_path else None}",
+        ]
+        for k in sorted(settings):
+            parts.append(f"{k}={settings[k]!r}")
+        return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return Path(self.directory) / f"{key}.yaml"
+
+    def get(self, key: str) -> Optional[SchemaDefinition]:
+        """
+        Retrieves a fragment, or None if there is no usable entry for the key
+
+        :param key:
+        :return:
+        """
+        if key in self.memory:
+            return copy.deepcopy(self.memory[key])
+        if not self.directory:
+            return None
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            fragment = yaml_loader.load(str(path), target_class=SchemaDefinition)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+        if self.in_memory:
+            self.memory[key] = copy.deepcopy(fragment)
+        return fragment
+
+    def put(self, key: str, fragment: SchemaDefinition) -> None:
+        """
+        Stores a fragment
+
+        On disk, the entry is written to a temporary file first, so concurrent readers never see
+        a partially written entry.
+
+        :param key:
+        :param fragment:
+        :return:
+        """
+        if self.in_memory:
+            self.memory[key] = copy.deepcopy(fragment)
+        if not self.directory:
+            return
+        write_atomic(self._path(key), yaml_dumper.dumps(fragment))
+
+    def retain_in_memory(self, keys: Iterable[str]) -> None:
+        """
+        Drops all in-memory entries except those for the given keys
+
+        :param keys: keys to keep, e.g. those used in the most recent build
+        :return:
+        """
+        keys = set(keys)
+        for key in list(self.memory):
+            if key not in keys:
+                del self.memory[key]
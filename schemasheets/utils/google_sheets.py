@@ -1,5 +1,22 @@
+import http.client
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Optional, TYPE_CHECKING
+from urllib.parse import urlsplit, urljoin, quote
+
+if TYPE_CHECKING:
+    from schemasheets.utils.sheet_cache import SheetCache
+
 BASE = "https://docs.google.com/spreadsheets/d"
 
+NOT_MODIFIED = 304
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
 def gsheets_download_url(sheet_id: str, sheet_name: str) -> str:
     """
     Get the google sheets download URL
@@ -8,6 +25,226 @@ def gsheets_download_url(sheet_id: str, sheet_name: str) -> str:
     :param sheet_name: e.g. personinfo
     :return:
     """
-    return f"{BASE}/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}"
+    return f"{BASE}/{sheet_id}/gviz/tq?tqx=out:csv&sheet={quote(sheet_name)}"
+
+
+def gsheets_workbook_url(sheet_id: str) -> str:
+    """
+    Get the URL for downloading an entire google sheet, with all tabs, as an Excel workbook
+
+    :param sheet_id: 1wVoaiFg47aT9YWNeRfTZ8tYHN8s8PAuDx5i2HUcDpvQ
+    :return:
+    """
+    return f"{BASE}/{sheet_id}/export?format=xlsx"
+
+
+class FetchError(Exception):
+    """
+    Raised when a URL cannot be downloaded
+    """
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of a single, possibly conditional, download
+    """
+    body: Optional[bytes] = None
+    """response body; None if not modified"""
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    not_modified: bool = False
+    """True if the server confirmed that the cached copy is still current"""
+
+
+@dataclass
+class SheetFetcher:
+    """
+    Downloads a set of URLs concurrently, reusing keep-alive connections.
+
+    Each worker thread keeps one open connection per host, so downloading many tabs of the
+    same spreadsheet only pays for connection setup once per worker.
+    """
+    max_workers: int = 4
+    """Maximum number of concurrent downloads"""
+
+    retries: int = 3
+    """Number of times a failed download is retried"""
+
+    backoff: float = 0.5
+    """Seconds to wait before the first retry; doubled on each subsequent retry"""
+
+    timeout: float = 60.0
+    """Socket timeout in seconds"""
+
+    max_redirects: int = 5
+
+    _local: threading.local = field(default_factory=threading.local, init=False, repr=False, compare=False)
+
+    def fetch_all(self, urls: Dict[str, str], cache: "SheetCache" = None) -> Dict[str, bytes]:
+        """
+        Downloads each URL exactly once
+
+        :param urls: mapping between names (e.g. tab names) and URLs
+        :param cache: optional, a cache that is consulted (and revalidated) before downloading
+        :return: mapping between names and downloaded content
+        """
+        names = list(urls)
+        if cache is None:
+            get = lambda n: self.fetch(urls[n])
+        else:
+            get = lambda n: cache.fetch(n, urls[n], self)
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            contents = list(executor.map(get, names))
+        if cache is not None:
+            cache.evict(keep=names)
+        return dict(zip(names, contents))
+
+    def fetch(self, url: str) -> bytes:
+        """
+        Downloads a single URL, retrying with exponential backoff on errors
+
+        :param url:
+        :return: response body
+        """
+        return self.request(url).body
+
+    def request(self, url: str, etag: str = None, last_modified: str = None) -> FetchResult:
+        """
+        Downloads a single URL, retrying with exponential backoff on errors
+
+        If a validator from a previous download is passed, the request is conditional,
+        and the body is only transferred if the content has changed.
+
+        :param url:
+        :param etag: ETag of a previously downloaded copy
+        :param last_modified: Last-Modified date of a previously downloaded copy
+        :return: result of the download
+        """
+        headers = {'Connection': 'keep-alive'}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        attempt = 0
+        while True:
+            try:
+                return self._fetch(url, headers)
+            except (OSError, http.client.HTTPException, FetchError) as e:
+                if isinstance(e, FetchError) and not e.retryable:
+                    raise
+                if attempt >= self.retries:
+                    raise FetchError(f"Failed to download {url} after {attempt + 1} attempts: {e}") from e
+                delay = self.backoff * (2 ** attempt)
+                logging.warning(f"Error downloading {url}: {e}; retrying in {delay}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def _connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        connections: Dict[Tuple[str, str], http.client.HTTPConnection] = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        key = (scheme, netloc)
+        if key not in connections:
+            if scheme == 'https':
+                connections[key] = http.client.HTTPSConnection(netloc, timeout=self.timeout)
+            elif scheme == 'http':
+                connections[key] = http.client.HTTPConnection(netloc, timeout=self.timeout)
+            else:
+                raise FetchError(f"Unsupported URL scheme: {scheme}")
+        return connections[key]
+
+    def _drop_connection(self, scheme: str, netloc: str) -> None:
+        conn = self._local.connections.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def _fetch(self, url: str, headers: Dict[str, str]) -> FetchResult:
+        for _ in range(self.max_redirects + 1):
+            parts = urlsplit(url)
+            path = parts.path or '/'
+            if parts.query:
+                path = f"{path}?{parts.query}"
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except Exception:
+                # the server may have closed a kept-alive connection; reconnect on retry
+                self._drop_connection(parts.scheme, parts.netloc)
+                raise
+            if response.will_close:
+                self._drop_connection(parts.scheme, parts.netloc)
+            if response.status in REDIRECT_STATUSES:
+                url = urljoin(url, response.getheader('Location'))
+                continue
+            result = FetchResult(etag=response.getheader('ETag'),
+                                 last_modified=response.getheader('Last-Modified'))
+            if response.status == NOT_MODIFIED:
+                result.not_modified = True
+                return result
+            if response.status in RETRY_STATUSES:
+                raise FetchError(f"HTTP {response.status} for {url}", retryable=True)
+            if response.status >= 400:
+                raise FetchError(f"HTTP {response.status} for {url}")
+            result.body = body
+            return result
+        raise FetchError(f"Too many redirects for {url}")
+
+
+def fetch_gsheets(sheet_id: str, sheet_names: List[str], fetcher: SheetFetcher = None,
+                  cache: "SheetCache" = None) -> Dict[str, bytes]:
+    """
+    Downloads the CSV for each of the named tabs of a google sheet
+
+    :param sheet_id: google sheet ID
+    :param sheet_names: tab names
+    :param fetcher: optional, a configured fetcher
+    :param cache: optional, a local cache of previously downloaded tabs
+    :return: mapping between tab names and CSV content
+    """
+    if fetcher is None:
+        fetcher = SheetFetcher()
+    names = {n: gsheet_cache_name(sheet_id, n) for n in sheet_names}
+    files = fetcher.fetch_all({names[n]: gsheets_download_url(sheet_id, n) for n in sheet_names}, cache=cache)
+    return {n: files[names[n]] for n in sheet_names}
+
+
+def gsheet_cache_name(sheet_id: str, sheet_name: str) -> str:
+    """
+    Name under which a tab of a google sheet is cached
+
+    Tabs are grouped by sheet ID, so that different sheets with the same tab names do not collide.
+
+    :param sheet_id: google sheet ID
+    :param sheet_name: tab name
+    :return: file name relative to the cache directory, e.g. <sheet_id>/personinfo.csv
+    """
+    return f"{sheet_id}/{sheet_name}.csv"
 
 
+def fetch_gsheet_workbook(sheet_id: str, fetcher: SheetFetcher = None, cache: "SheetCache" = None) -> bytes:
+    """
+    Downloads an entire google sheet as an Excel workbook, in a single request
+
+    :param sheet_id: google sheet ID
+    :param fetcher: optional, a configured fetcher
+    :param cache: optional, a local cache of previously downloaded workbooks
+    :return: xlsx content
+    """
+    if fetcher is None:
+        fetcher = SheetFetcher()
+    url = gsheets_workbook_url(sheet_id)
+    if cache is None:
+        return fetcher.fetch(url)
+    name = f"{sheet_id}.xlsx"
+    data = cache.fetch(name, url, fetcher)
+    cache.evict(keep=[name])
+    return data
@@ -0,0 +1,165 @@
+"""Compact snapshot of the parts of the LinkML metamodel and config schema used to translate sheets"""
+import hashlib
+import json
+import logging
+import os
+import pkgutil
+from functools import lru_cache
+from pathlib import Path, PurePath
+from typing import Dict, Any, Optional, Union
+
+import click
+
+from schemasheets.utils.fileutils import package_version, atomic_file
+
+SNAPSHOT_FORMAT_VERSION = "1"
+"""Increment this whenever the content of snapshots changes"""
+
+SHIPPED_SNAPSHOT = 'metamodel_snapshot.json'
+"""Snapshot distributed with schemasheets, in schemasheets/conf"""
+
+CACHE_DIR_ENV = 'SCHEMASHEETS_CACHE_DIR'
+"""Environment variable giving the directory in which generated snapshots are stored"""
+
+Snapshot = Dict[str, Any]
+
+
+def metamodel_yaml() -> bytes:
+    return pkgutil.get_data('linkml_runtime.linkml_model.meta', str(PurePath('model') / 'schema' / 'meta.yaml'))
+
+
+def configschema_yaml() -> bytes:
+    return pkgutil.get_data('schemasheets.conf.configschema', 'configschema.yaml')
+
+
+def snapshot_key() -> str:
+    """
+    Returns the key for snapshots of the installed metamodel and config schema
+
+    The key combines the linkml-runtime version with a digest of both schema files, so a snapshot
+    is never used with a different metamodel, even in a development install of linkml-runtime.
+
+    :return:
+    """
+    h = hashlib.sha256()
+    h.update(metamodel_yaml())
+    h.update(configschema_yaml())
+    return f'{package_version("linkml-runtime")}-{SNAPSHOT_FORMAT_VERSION}-{h.hexdigest()[:16]}'
+
+
+def build_snapshot() -> Snapshot:
+    """
+    Builds a snapshot by parsing the metamodel and config schema
+
+    The snapshot contains the name, range and multivalued flag of each metamodel slot, keyed by code-safe
+    name, the base of each metamodel type, and the permissible values of the Cardinality enum.
+
+    :return:
+    """
+    # imported here to avoid an import cycle; only needed when there is no snapshot
+    from schemasheets.schemasheet_datamodel import get_metamodel, get_configmodel
+
+    mm = get_metamodel()
+    slots = {k: {'name': s.name, 'range': s.range, 'multivalued': s.multivalued}
+             for k, s in mm.slot_name_mappings().items()}
+    types = {name: t.base for name, t in mm.all_types().items()}
+    cardinality = {pv.text: {'annotations': {tag: a.value for tag, a in pv.annotations.items()}}
+                   for pv in get_configmodel().get_enum('Cardinality').permissible_values.values()}
+    return {'key': snapshot_key(), 'slots': slots, 'types': types, 'cardinality': cardinality}
+
+
+def cache_dir() -> Optional[Path]:
+    """
+    Directory in which generated snapshots and other persistent caches are stored
+
+    Persistent caching is opt-in, so nothing is written to the home directory unless asked for.
+
+    :return: SCHEMASHEETS_CACHE_DIR if set, else None
+    """
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV])
+    return None
+
+
+def _read_snapshot(data: Optional[bytes], key: str, source: str) -> Optional[Snapshot]:
+    if data is None:
+        return None
+    try:
+        snapshot = json.loads(data)
+    except ValueError as e:
+        logging.warning(f'Ignoring unreadable metamodel snapshot {source}: {e}')
+        return None
+    if snapshot.get('key') != key:
+        logging.info(f'Metamodel snapshot {source} is for {snapshot.get("key")}, not {key}')
+        return None
+    return snapshot
+
+
+def write_snapshot(snapshot: Snapshot, path: Union[str, Path]) -> None:
+    """
+    Writes a snapshot atomically, so concurrent processes never read a partial snapshot
+
+    :param snapshot:
+    :param path:
+    :return:
+    """
+    with atomic_file(path, encoding='utf-8') as stream:
+        # order is preserved, as it determines the order of values in messages
+        json.dump(snapshot, stream, indent=1)
+
+
+@lru_cache()
+def get_snapshot() -> Snapshot:
+    """
+    Returns the snapshot for the installed metamodel and config schema
+
+    The snapshot shipped with schemasheets is used if it matches; otherwise a snapshot generated
+    by a previous process is used from the cache directory, if one is set (see :ref:`cache_dir`).
+    If there is none, the schemas are parsed, and the snapshot is stored in the cache directory
+    for subsequent processes, or only kept in memory if there is no cache directory.
+
+    :return:
+    """
+    key = snapshot_key()
+    try:
+        shipped = pkgutil.get_data('schemasheets.conf.configschema', SHIPPED_SNAPSHOT)
+    except OSError:
+        shipped = None
+    snapshot = _read_snapshot(shipped, key, SHIPPED_SNAPSHOT)
+    if snapshot is not None:
+        return snapshot
+    directory = cache_dir()
+    if directory is None:
+        logging.info(f'Building metamodel snapshot for {key}; set {CACHE_DIR_ENV} to store it')
+        return build_snapshot()
+    path = directory / f'metamodel-{key}.json'
+    try:
+        data = path.read_bytes()
+    except OSError:
+        data = None
+    snapshot = _read_snapshot(data, key, str(path))
+    if snapshot is not None:
+        return snapshot
+    logging.info(f'Building metamodel snapshot {path}')
+    snapshot = build_snapshot()
+    try:
+        write_snapshot(snapshot, path)
+    except OSError as e:
+        logging.warning(f'Could not store metamodel snapshot in {path}: {e}')
+    return snapshot
+
+
+@click.command()
+@click.option('-o', '--output',
+              default=str(Path(__file__).parent.parent / 'conf' / SHIPPED_SNAPSHOT),
+              show_default=True,
+              help="Path of the snapshot")
+def cli(output: str):
+    """
+    Regenerate the metamodel snapshot shipped with schemasheets, e.g. after upgrading linkml-runtime
+    """
+    write_snapshot(build_snapshot(), output)
+
+
+if __name__ == '__main__':
+    cli()
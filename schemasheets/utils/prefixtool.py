@@ -1,18 +1,185 @@
-from typing import Optional
+import csv
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, Iterable, Union
 
-from bioregistry import get_iri
+import click
+
+from schemasheets.utils.fileutils import package_version, atomic_file
 
 priority = ["obofoundry", "default", "miriam", "ols", "n2t", "bioportal"]
 
+PrefixMap = Dict[str, str]
+
 
 def guess_prefix_expansion(prefix: str) -> Optional[str]:
     """
     Guesses a prefix expansion using bioregistry
 
+    bioregistry is slow to import, so it is only imported when a prefix needs to be guessed.
+
     :param prefix:
     :return:
     """
+    from bioregistry import get_iri
+
     try:
         return get_iri(prefix, "", priority=priority)
     except KeyError:
-        return None
\ No newline at end of file
+        return None
+
+
+def load_prefix_map(path: Union[str, Path]) -> PrefixMap:
+    """
+    Loads a prefix map, mapping prefixes to expansions
+
+    A .json file must contain a single object; any other file is read as tab separated,
+    with the prefix in the first column and the expansion in the second. A header row
+    with ``prefix`` in the first column is skipped.
+
+    :param path:
+    :return:
+    """
+    path = Path(path)
+    if path.suffix == '.json':
+        with open(path, encoding='utf-8') as stream:
+            prefix_map = json.load(stream)
+        if not isinstance(prefix_map, dict):
+            raise ValueError(f'Prefix map {path} must be a JSON object mapping prefixes to expansions')
+        return prefix_map
+    prefix_map = {}
+    with open(path, encoding='utf-8', newline='') as stream:
+        for i, row in enumerate(csv.reader(stream, delimiter='\t')):
+            if not row or (i == 0 and row[0].lower() == 'prefix'):
+                continue
+            if len(row) < 2:
+                raise ValueError(f'Line {i + 1} of prefix map {path} must have a prefix and an expansion')
+            prefix_map[row[0]] = row[1]
+    return prefix_map
+
+
+def _write_json(obj: dict, path: Path) -> None:
+    with atomic_file(path, encoding='utf-8') as stream:
+        json.dump(obj, stream, indent=1, sort_keys=True)
+
+
+@dataclass
+class PrefixResolver:
+    """
+    Resolves the expansions of many prefixes in a single batch
+
+    If a local prefix map is given, it is the only source, and bioregistry is never loaded.
+    Otherwise, expansions are guessed using bioregistry, and memoized in a cache file keyed by the
+    bioregistry version, so later runs only load bioregistry for prefixes they have not seen before.
+    Prefixes that bioregistry does not know are memoized too.
+    """
+    prefix_map_path: Optional[Union[str, Path]] = None
+    """Local prefix map; see :ref:`load_prefix_map`."""
+
+    cache_dir: Optional[Union[str, Path]] = None
+    """Directory of the cache of guessed expansions. If not set, guesses are only memoized in memory."""
+
+    prefix_map: Optional[PrefixMap] = None
+    """Contents of the local prefix map; loaded from prefix_map_path on first use if not set."""
+
+    memo: Dict[str, Optional[str]] = field(default_factory=dict)
+    """Guessed expansions, including None for prefixes that could not be guessed."""
+
+    _folded_prefix_map: Optional[PrefixMap] = field(default=None, init=False, repr=False)
+
+    @property
+    def cache_path(self) -> Optional[Path]:
+        if not self.cache_dir:
+            return None
+        return Path(self.cache_dir) / f'prefixes-bioregistry-{package_version("bioregistry")}.json'
+
+    @property
+    def uses_prefix_map(self) -> bool:
+        return self.prefix_map is not None or bool(self.prefix_map_path)
+
+    def _from_prefix_map(self, prefix: str) -> Optional[str]:
+        if self.prefix_map is None:
+            self.prefix_map = load_prefix_map(self.prefix_map_path)
+        if prefix in self.prefix_map:
+            return self.prefix_map[prefix]
+        # bioregistry matches prefixes case-insensitively
+        if self._folded_prefix_map is None:
+            self._folded_prefix_map = {k.casefold(): v for k, v in self.prefix_map.items()}
+        return self._folded_prefix_map.get(prefix.casefold())
+
+    def _load_cache(self) -> None:
+        path = self.cache_path
+        if path is None or not path.exists():
+            return
+        try:
+            with open(path, encoding='utf-8') as stream:
+                cached = json.load(stream)
+        except ValueError as e:
+            logging.warning(f'Ignoring unreadable prefix cache {path}: {e}')
+            return
+        for k, v in cached.items():
+            self.memo.setdefault(k, v)
+
+    def resolve(self, prefixes: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Resolves the expansion of each prefix
+
+        :param prefixes:
+        :return: mapping between each prefix and its expansion, or None if it could not be resolved
+        """
+        prefixes = list(dict.fromkeys(prefixes))
+        if self.uses_prefix_map:
+            return {pfx: self._from_prefix_map(pfx) for pfx in prefixes}
+        missing = [pfx for pfx in prefixes if pfx not in self.memo]
+        if missing:
+            self._load_cache()
+            missing = [pfx for pfx in missing if pfx not in self.memo]
+        if missing:
+            logging.info(f'Guessing expansions of {len(missing)} prefixes using bioregistry')
+            for pfx in missing:
+                self.memo[pfx] = guess_prefix_expansion(pfx)
+            path = self.cache_path
+            if path is not None:
+                # merge with entries stored by concurrent processes since the cache was loaded
+                self._load_cache()
+                try:
+                    _write_json(self.memo, path)
+                except OSError as e:
+                    logging.warning(f'Could not store prefix cache {path}: {e}')
+        return {pfx: self.memo[pfx] for pfx in prefixes}
+
+
+@click.command()
+@click.option('-o', '--output',
+              required=True,
+              help="Path of the prefix map; written as JSON if it ends in .json, otherwise as TSV")
+def cli(output: str):
+    """
+    Export the bioregistry prefix map, for use with sheets2linkml --prefix-map
+
+    Repairing a schema with a local prefix map does not need to load bioregistry.
+    Expansions are chosen with the same priority as when bioregistry is used directly,
+    and synonyms of each prefix are included.
+    """
+    from bioregistry import get_converter
+
+    records = get_converter(uri_prefix_priority=priority).records
+    prefix_map = {r.prefix: r.uri_prefix for r in records}
+    # synonyms such as sdo for schema are also resolved by bioregistry
+    for r in records:
+        for synonym in r.prefix_synonyms:
+            prefix_map.setdefault(synonym, r.uri_prefix)
+    prefix_map = dict(sorted(prefix_map.items()))
+    if output.endswith('.json'):
+        _write_json(prefix_map, Path(output))
+        return
+    with open(output, 'w', encoding='utf-8', newline='') as stream:
+        writer = csv.writer(stream, delimiter='\t', lineterminator='\n')
+        writer.writerow(['prefix', 'expansion'])
+        writer.writerows(prefix_map.items())
+
+
+if __name__ == '__main__':
+    cli()
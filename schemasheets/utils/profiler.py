@@ -0,0 +1,308 @@
+import contextlib
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, List, Any, Iterable, Iterator, ContextManager, Union
+
+from schemasheets.utils.fileutils import package_version
+
+PACKAGES = ['schemasheets', 'linkml', 'linkml-runtime']
+"""Packages whose versions are included in reports, for comparing results between upgrades"""
+
+
+@dataclass
+class PhaseStats:
+    """
+    Time and memory used by one phase of a conversion, e.g. add_row
+    """
+    name: str
+
+    wall_time: float = 0.0
+    """Seconds spent in the phase, excluding time spent in nested phases"""
+
+    calls: int = 0
+    """Number of times the phase was entered"""
+
+    peak_memory: Optional[int] = None
+    """Maximum bytes allocated during the phase, above what was allocated when it started; None if not traced"""
+
+
+@dataclass
+class SheetStats:
+    """
+    Rows translated or written for one sheet
+    """
+    name: str
+
+    rows: int = 0
+
+    wall_time: float = 0.0
+    """Seconds spent on the sheet, in all phases"""
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        return self.rows / self.wall_time if self.wall_time else None
+
+
+@dataclass
+class _Frame:
+    stats: PhaseStats
+    start_time: float
+    start_memory: int = 0
+    peak_memory: int = 0
+    nested_time: float = 0.0
+
+
+@dataclass
+class Profiler:
+    """
+    Records wall time and peak memory for each phase of a conversion, and row throughput for each sheet.
+
+    Phases may be nested; the time of a phase excludes the time of phases nested within it, so the
+    phase times add up to the total. Peak memory is measured using tracemalloc, which slows down
+    allocation-heavy code; set track_memory to False to measure time only.
+
+    Example:
+
+        with Profiler() as profiler:
+            schema = SchemaMaker(profiler=profiler).create_schema(sheets)
+        print(profiler.report())
+    """
+    command: str = None
+    """Name of the profiled command, e.g. sheets2linkml"""
+
+    track_memory: bool = True
+    """If True, trace allocations to measure peak memory of each phase"""
+
+    phases: Dict[str, PhaseStats] = field(default_factory=dict)
+    """Statistics for each phase, in the order in which phases were first entered"""
+
+    sheets: Dict[str, SheetStats] = field(default_factory=dict)
+    """Statistics for each sheet"""
+
+    total_time: float = 0.0
+
+    _stack: List[_Frame] = field(default_factory=list, repr=False)
+    _sheet: Optional[SheetStats] = field(default=None, repr=False)
+    _started: Optional[float] = field(default=None, repr=False)
+    _started_tracing: bool = field(default=False, repr=False)
+
+    def __enter__(self) -> 'Profiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Starts timing, and memory tracing if enabled
+
+        :return:
+        """
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._started = time.perf_counter()
+
+    def stop(self) -> None:
+        """
+        Stops timing, and memory tracing if it was started by this profiler
+
+        :return:
+        """
+        if self._started is not None:
+            self.total_time += time.perf_counter() - self._started
+            self._started = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[PhaseStats]:
+        """
+        Records the time and peak memory of a phase for the duration of the context
+
+        :param name: phase name, e.g. add_row
+        :return: statistics for the phase
+        """
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats(name)
+        tracing = tracemalloc.is_tracing()
+        frame = _Frame(stats, 0.0)
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # the enclosing phase keeps the peak so far, which is about to be reset
+                parent = self._stack[-1]
+                parent.peak_memory = max(parent.peak_memory, peak)
+            tracemalloc.reset_peak()
+            frame.start_memory = frame.peak_memory = current
+        self._stack.append(frame)
+        frame.start_time = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            elapsed = time.perf_counter() - frame.start_time
+            self._stack.pop()
+            stats.calls += 1
+            stats.wall_time += elapsed - frame.nested_time
+            if self._stack:
+                self._stack[-1].nested_time += elapsed
+            if tracing and tracemalloc.is_tracing():
+                peak = max(tracemalloc.get_traced_memory()[1], frame.peak_memory)
+                stats.peak_memory = max(stats.peak_memory or 0, peak - frame.start_memory)
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent.peak_memory = max(parent.peak_memory, peak)
+
+    @contextlib.contextmanager
+    def sheet(self, name: str) -> Iterator[SheetStats]:
+        """
+        Records the time spent on a sheet for the duration of the context
+
+        Rows read using :ref:`rows` within the context are counted for this sheet.
+
+        :param name: sheet name or path
+        :return: statistics for the sheet, so that rows can also be counted directly
+        """
+        stats = self.sheets.get(name)
+        if stats is None:
+            stats = self.sheets[name] = SheetStats(name)
+        outer = self._sheet
+        self._sheet = stats
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.wall_time += time.perf_counter() - start
+            self._sheet = outer
+
+    def rows(self, rows: Iterable[Any], phase: str = 'read') -> Iterator[Any]:
+        """
+        Iterates over rows that are read lazily, recording the time taken to read each row as a phase
+
+        Only time is recorded for this phase, as reading is interleaved with processing each row.
+
+        :param rows: e.g. a csv.DictReader
+        :param phase: name of the phase
+        :return: the same rows
+        """
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = PhaseStats(phase)
+        it = iter(rows)
+        while True:
+            start = time.perf_counter()
+            try:
+                row = next(it)
+            except StopIteration:
+                self._add_nested_time(stats, time.perf_counter() - start)
+                return
+            self._add_nested_time(stats, time.perf_counter() - start)
+            if self._sheet is not None:
+                self._sheet.rows += 1
+            yield row
+
+    def _add_nested_time(self, stats: PhaseStats, elapsed: float) -> None:
+        stats.wall_time += elapsed
+        if self._stack:
+            self._stack[-1].nested_time += elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns all statistics as a JSON-serializable dictionary
+
+        :return:
+        """
+        return {
+            'command': self.command,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'versions': package_versions(),
+            'total_time': self.total_time,
+            'phases': [vars(s).copy() for s in self.phases.values()],
+            'sheets': [{'name': s.name, 'rows': s.rows, 'wall_time': s.wall_time,
+                        'rows_per_second': s.rows_per_second} for s in self.sheets.values()],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def write_json(self, path: Union[str, Path]) -> None:
+        """
+        Writes all statistics as JSON, for tracking performance over time
+
+        :param path:
+        :return:
+        """
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(self.to_json())
+            stream.write('\n')
+
+    def report(self) -> str:
+        """
+        Returns a human-readable report of all statistics
+
+        :return:
+        """
+        lines = []
+        title = f'Profile of {self.command}' if self.command else 'Profile'
+        lines.append(f'{title}: {self.total_time:.3f}s total')
+        lines.append('')
+        lines.append(f'{"phase":<24} {"time (s)":>10} {"%":>6} {"calls":>8} {"peak memory (MiB)":>18}')
+        for s in self.phases.values():
+            pct = 100 * s.wall_time / self.total_time if self.total_time else 0.0
+            mem = '-' if s.peak_memory is None else f'{s.peak_memory / (1 << 20):.1f}'
+            lines.append(f'{s.name:<24} {s.wall_time:>10.3f} {pct:>6.1f} {s.calls:>8} {mem:>18}')
+        if self.sheets:
+            lines.append('')
+            lines.append(f'{"sheet":<40} {"rows":>8} {"time (s)":>10} {"rows/s":>10}')
+            for s in self.sheets.values():
+                rate = '-' if s.rows_per_second is None else f'{s.rows_per_second:.0f}'
+                lines.append(f'{_truncate(s.name, 40):<40} {s.rows:>8} {s.wall_time:>10.3f} {rate:>10}')
+        if self.track_memory:
+            lines.append('')
+            lines.append('Times include the overhead of memory tracing')
+        return '\n'.join(lines)
+
+
+def profile_phase(profiler: Optional[Profiler], name: str) -> ContextManager:
+    """
+    Records a phase using the given profiler, if there is one
+
+    :param profiler: profiler, or None if profiling is disabled
+    :param name: phase name
+    :return: context manager
+    """
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name)
+
+
+def profile_sheet(profiler: Optional[Profiler], name: str) -> ContextManager:
+    """
+    Records a sheet using the given profiler, if there is one
+
+    :param profiler: profiler, or None if profiling is disabled
+    :param name: sheet name or path
+    :return: context manager
+    """
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.sheet(name)
+
+
+def package_versions() -> Dict[str, str]:
+    """
+    Returns the installed versions of schemasheets and the linkml packages it depends on
+
+    :return: mapping between package names and versions
+    """
+    return {p: package_version(p) for p in PACKAGES}
+
+
+def _truncate(s: str, n: int) -> str:
+    return s if len(s) <= n else '...' + s[-(n - 3):]
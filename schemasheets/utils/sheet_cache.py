@@ -0,0 +1,199 @@
+import contextlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union, Dict, Any, Iterable, Iterator
+
+from schemasheets.utils.fileutils import write_atomic
+from schemasheets.utils.google_sheets import SheetFetcher, FetchError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+    import msvcrt
+
+META_DIR = '.meta'
+
+
+@contextlib.contextmanager
+def file_lock(path: Union[str, Path], blocking: bool = True) -> Iterator[bool]:
+    """
+    Holds an exclusive lock on a file for the duration of the context
+
+    Locks are advisory, and are shared between processes, so that several processes
+    (e.g. parallel CI jobs) can safely use the same directory.
+
+    :param path: lock file; created if it does not exist
+    :param blocking: if False, do not wait for the lock
+    :return: True if the lock was acquired (always True if blocking)
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:  # pragma: no cover
+                msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            if blocking:
+                raise
+            yield False
+            return
+        yield True
+    finally:
+        os.close(fd)
+
+
+@dataclass
+class SheetCache:
+    """
+    Local cache of downloaded sheets, e.g. the tabs of a google sheet.
+
+    Each sheet is stored under its file name (e.g. ``personinfo.csv``) in the cache directory,
+    alongside metadata recording where it was downloaded from and the validators (ETag, Last-Modified)
+    returned by the server.
+
+    - within the ``ttl``, a cached sheet is used without contacting the server
+    - after that, the sheet is revalidated with a conditional request; if the server
+      reports it unchanged, the body is not downloaded again
+    - in ``offline`` mode, only cached sheets are used, regardless of age
+
+    Entries not used within ``max_age`` seconds, and the least recently used entries
+    beyond ``max_size`` bytes, are evicted. Every entry is locked while it is being read
+    or written, so the cache directory can be shared between processes.
+    """
+    directory: Union[str, Path]
+    """Directory in which sheets are stored"""
+
+    ttl: float = 0
+    """Seconds after download or revalidation during which a sheet is used without revalidation"""
+
+    offline: bool = False
+    """If True, never contact the server"""
+
+    max_age: Optional[float] = None
+    """Entries not used for this many seconds are evicted"""
+
+    max_size: Optional[int] = None
+    """Maximum total size in bytes of all entries; least recently used entries are evicted first"""
+
+    def __post_init__(self):
+        self.directory = Path(self.directory)
+
+    def path(self, name: str) -> Path:
+        """
+        Path to the cached copy of a sheet
+
+        :param name: file name, e.g. personinfo.csv; may include a subdirectory
+        :return:
+        """
+        return self.directory / name
+
+    def _meta_path(self, name: str) -> Path:
+        return self.directory / META_DIR / f'{name}.json'
+
+    def _lock_path(self, name: str) -> Path:
+        return self.directory / META_DIR / f'{name}.lock'
+
+    def _read_meta(self, name: str) -> Optional[Dict[str, Any]]:
+        meta_path = self._meta_path(name)
+        if not meta_path.exists() or not self.path(name).exists():
+            return None
+        try:
+            with open(meta_path) as stream:
+                return json.load(stream)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable cache metadata {meta_path}: {e}")
+            return None
+
+    def _write_meta(self, name: str, meta: Dict[str, Any]) -> None:
+        write_atomic(self._meta_path(name), json.dumps(meta))
+
+    def fetch(self, name: str, url: str, fetcher: SheetFetcher) -> bytes:
+        """
+        Returns the content of a sheet, downloading it only if the cached copy is missing or stale
+
+        :param name: file name, e.g. personinfo.csv
+        :param url: download URL
+        :param fetcher: used to download or revalidate the sheet
+        :return: content of the sheet
+        """
+        for directory in (self.path(name).parent, self._meta_path(name).parent):
+            directory.mkdir(parents=True, exist_ok=True)
+        with file_lock(self._lock_path(name)):
+            now = time.time()
+            meta = self._read_meta(name)
+            if meta is not None and meta.get('url') != url:
+                logging.info(f"Cached copy of {name} was downloaded from {meta.get('url')}, not {url}")
+                meta = None
+            if self.offline:
+                if meta is None:
+                    raise FetchError(f"{name} is not in the cache {self.directory}; cannot download in offline mode")
+                logging.info(f"Using cached copy of {name} (offline)")
+            elif meta is not None and now - meta['validated'] < self.ttl:
+                logging.info(f"Using cached copy of {name}")
+            else:
+                if meta is None:
+                    result = fetcher.request(url)
+                else:
+                    result = fetcher.request(url, etag=meta.get('etag'), last_modified=meta.get('last_modified'))
+                if result.not_modified:
+                    logging.info(f"Cached copy of {name} is up to date")
+                else:
+                    logging.info(f"Downloaded {name}")
+                    write_atomic(self.path(name), result.body)
+                    meta = {'url': url, 'etag': result.etag, 'last_modified': result.last_modified}
+                meta['validated'] = now
+            meta['used'] = now
+            with open(self.path(name), 'rb') as stream:
+                data = stream.read()
+            self._write_meta(name, meta)
+            return data
+
+    def evict(self, keep: Iterable[str] = ()) -> None:
+        """
+        Removes entries that are too old, or that do not fit within the maximum size
+
+        Entries that are currently locked by another process are skipped.
+
+        :param keep: file names of sheets that are never evicted, e.g. those used in the current build
+        :return:
+        """
+        if self.max_age is None and self.max_size is None:
+            return
+        meta_dir = self.directory / META_DIR
+        if not meta_dir.exists():
+            return
+        keep = set(keep)
+        now = time.time()
+        entries = []
+        for meta_path in meta_dir.rglob('*.json'):
+            name = meta_path.relative_to(meta_dir).as_posix()[:-len('.json')]
+            meta = self._read_meta(name)
+            if meta is None:
+                continue
+            try:
+                size = self.path(name).stat().st_size
+            except FileNotFoundError:
+                # evicted by another process since the metadata was read
+                continue
+            entries.append((meta.get('used', 0), size, name))
+        entries.sort()
+        total_size = sum(size for _, size, _ in entries)
+        for used, size, name in entries:
+            expired = self.max_age is not None and now - used > self.max_age
+            oversized = self.max_size is not None and total_size > self.max_size
+            if name in keep or not (expired or oversized):
+                continue
+            with file_lock(self._lock_path(name), blocking=False) as locked:
+                if not locked:
+                    continue
+                logging.info(f"Evicting {name} from {self.directory}")
+                for path in (self._meta_path(name), self.path(name)):
+                    with contextlib.suppress(FileNotFoundError):
+                        path.unlink()
+            total_size -= size
@@ -0,0 +1,93 @@
+import datetime
+import io
+import logging
+from typing import Any, Iterator, List
+
+from schemasheets.schemasheet_datamodel import ROW
+
+
+def open_workbook(data: bytes):
+    """
+    Opens an Excel workbook for streaming, in read-only mode
+
+    :param data: xlsx content
+    :return: openpyxl workbook
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError('openpyxl is required to read Excel workbooks; install it with: pip install openpyxl')
+    return load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+
+
+def cell_text(value: Any) -> str:
+    """
+    Converts a cell value to the text that would appear in a CSV export of the sheet
+
+    :param value: cell value, as read by openpyxl
+    :return:
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def worksheet_rows(worksheet) -> Iterator[ROW]:
+    """
+    Yields the rows of a worksheet as dicts keyed by the header row, like a csv.DictReader
+
+    Columns with an empty header are skipped. Rows with no values are yielded as in a CSV export,
+    so that line numbers in error messages match the sheet, except at the end of the sheet.
+
+    :param worksheet: openpyxl worksheet
+    :return:
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [(i, cell_text(h)) for i, h in enumerate(header) if cell_text(h)]
+    # rows with no values, only yielded once a row with values follows them
+    empty_rows = []
+    for values in rows:
+        row = {k: cell_text(values[i]) if i < len(values) else '' for i, k in columns}
+        if any(row.values()):
+            yield from empty_rows
+            empty_rows = []
+            yield row
+        else:
+            empty_rows.append(row)
+
+
+def is_schemasheet(worksheet) -> bool:
+    """
+    True if the worksheet has a descriptor row directly below the header
+
+    :param worksheet: openpyxl worksheet
+    :return:
+    """
+    for row in worksheet_rows(worksheet):
+        return next(iter(row.values()), '').startswith('>')
+    return False
+
+
+def discover_schemasheets(workbook) -> List[str]:
+    """
+    Finds all worksheets in a workbook that are schema sheets, in workbook order
+
+    :param workbook: openpyxl workbook
+    :return: worksheet names
+    """
+    names = []
+    for worksheet in workbook.worksheets:
+        if is_schemasheet(worksheet):
+            names.append(worksheet.title)
+        else:
+            logging.info(f"Skipping {worksheet.title}: no descriptor row")
+    return names
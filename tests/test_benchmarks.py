@@ -0,0 +1,72 @@
+import filecmp
+
+from benchmarks.gate import compare, format_comparisons, measure_import_time
+from benchmarks.run import run_benchmarks, round_trip_scenario, CLI_MODULES
+from benchmarks.synthetic import SyntheticSheetSpec, write_schemasheets
+from schemasheets.schemamaker import SchemaMaker
+
+
+def test_synthetic_sheets(tmp_path):
+    """
+    Tests that synthetic sheets are deterministic, and translate to a schema of the requested size
+    """
+    spec = SyntheticSheetSpec(classes=5, slots=8, usages=12, enums=3, permissible_values=7, annotations=2)
+    sheets = write_schemasheets(spec, tmp_path / 'a')
+    for p, q in zip(sheets, write_schemasheets(spec, tmp_path / 'b')):
+        assert filecmp.cmp(p, q, shallow=False)
+    schema = SchemaMaker().create_schema([str(p) for p in sheets])
+    assert len(schema.classes) == 5
+    assert len(schema.slots) == 8
+    assert sum(len(c.slot_usage) for c in schema.classes.values()) == 12
+    assert [len(e.permissible_values) for e in schema.enums.values()] == [7, 7, 7]
+    roundtripped = round_trip_scenario(sheets, tmp_path)(None)
+    assert set(roundtripped.classes) == set(schema.classes)
+    assert set(roundtripped.slots) == set(schema.slots)
+
+
+def test_run_benchmarks(tmp_path):
+    """
+    Tests that every scenario runs, giving machine-readable results
+    """
+    scenarios = ['create_schema', 'repair_schema', 'export', 'round_trip']
+    results = run_benchmarks(scenarios, [1], workdir=tmp_path, repeat=1, usages=10)
+    assert [r['scenario'] for r in results['results']] == scenarios
+    for r in results['results']:
+        assert r['time'] > 0
+        assert r['peak_memory'] > 0
+    assert 'add_row' in results['results'][0]['phases']
+
+
+def test_compare():
+    """
+    Tests detecting regressions against a baseline, with per-phase deltas
+    """
+    def results(create_time: float, add_row_time: float):
+        return {'results': [
+            {'scenario': 'create_schema', 'scale': 20, 'time': create_time,
+             'phases': {'read': 0.1, 'add_row': add_row_time}},
+            {'scenario': 'export', 'scale': 20, 'time': 1.0, 'phases': {}},
+        ]}
+
+    baseline = results(1.0, 0.5)
+    comparisons = compare(baseline, results(3.0, 2.5))
+    assert comparisons[0].ratio == 3.0
+    assert comparisons[0].phases['add_row'] == (0.5, 2.5)
+    assert comparisons[0].is_regression(1.5)
+    assert not comparisons[0].is_regression(3.5)
+    assert not comparisons[1].is_regression(1.5)
+    # small absolute differences are ignored
+    assert not compare(baseline, results(1.04, 0.5))[0].is_regression(1.01, min_delta=0.05)
+    report = format_comparisons(comparisons, 1.5)
+    assert 'REGRESSION' in report
+    assert '+400.0%' in report
+
+
+def test_measure_import_time():
+    """
+    Tests that the import time of each command line module is measured as a phase
+    """
+    result = measure_import_time(repeat=1).as_dict()
+    assert result['scenario'] == 'cli_import'
+    assert list(result['phases']) == list(CLI_MODULES)
+    assert result['time'] == sum(result['phases'].values())
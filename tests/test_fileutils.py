@@ -0,0 +1,24 @@
+import pytest
+
+from schemasheets.utils.fileutils import atomic_file, write_atomic, package_version
+
+
+def test_write_atomic(tmp_path):
+    """
+    Tests that files are replaced, and that a failed write leaves the original unchanged
+    """
+    path = tmp_path / 'sub' / 'test.txt'
+    write_atomic(path, 'a')
+    write_atomic(path, b'b')
+    assert path.read_text() == 'b'
+    with pytest.raises(ValueError):
+        with atomic_file(path, encoding='utf-8') as stream:
+            stream.write('c')
+            raise ValueError('failed')
+    assert path.read_text() == 'b'
+    assert [p.name for p in path.parent.iterdir()] == ['test.txt']
+
+
+def test_package_version():
+    assert package_version('linkml-runtime') != 'unknown'
+    assert package_version('no-such-package') == 'unknown'
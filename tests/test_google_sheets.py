@@ -0,0 +1,263 @@
+import csv
+import hashlib
+import io
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+from openpyxl import Workbook
+from linkml_runtime.dumpers import yaml_dumper
+
+from schemasheets.schemamaker import SchemaMaker
+from schemasheets.utils.google_sheets import SheetFetcher, FetchError
+from schemasheets.utils.sheet_cache import SheetCache, file_lock
+from schemasheets.utils.workbook import open_workbook, worksheet_rows
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+INPUT_DIR = os.path.join(ROOT, 'input')
+SHEETS = ['schema', 'prefixes', 'enums', 'types', 'subsets', 'personinfo']
+WORKBOOK = 'workbook'
+
+
+def _as_csv(sheet: str) -> bytes:
+    with open(os.path.join(INPUT_DIR, f'{sheet}.tsv')) as stream:
+        rows = list(csv.reader(stream, delimiter='\t'))
+    out = io.StringIO()
+    csv.writer(out).writerows(rows)
+    return out.getvalue().encode('utf-8')
+
+
+def _as_xlsx(sheets: List[str]) -> bytes:
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    worksheet = workbook.create_sheet('notes')
+    worksheet.append(['This tab is not a schema sheet'])
+    for sheet in sheets:
+        worksheet = workbook.create_sheet(sheet)
+        with open(os.path.join(INPUT_DIR, f'{sheet}.tsv')) as stream:
+            for row in csv.reader(stream, delimiter='\t'):
+                # numbers are stored as numbers, as they would be in a spreadsheet
+                worksheet.append([int(v) if v.isdigit() else (v or None) for v in row])
+    out = io.BytesIO()
+    workbook.save(out)
+    return out.getvalue()
+
+
+class _GoogleSheetsStandIn(BaseHTTPRequestHandler):
+    """
+    Serves test sheets as CSV, in the same way as the gviz endpoint
+    """
+    protocol_version = 'HTTP/1.1'
+    requests = Counter()
+    downloads = Counter()
+    failures = Counter()
+
+    workbook = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.endswith('/export'):
+            sheet, content = WORKBOOK, type(self).workbook
+        else:
+            sheet = parse_qs(url.query)['sheet'][0]
+            content = _as_csv(sheet) if sheet in SHEETS else None
+        type(self).requests[sheet] += 1
+        etag = None
+        if type(self).failures[sheet] > 0:
+            type(self).failures[sheet] -= 1
+            status, body = 503, b''
+        elif content is not None:
+            status, body = 200, content
+            etag = f'"{hashlib.sha256(body).hexdigest()}"'
+            if self.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+            else:
+                type(self).downloads[sheet] += 1
+        else:
+            status, body = 404, b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/csv')
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gsheets_server(monkeypatch):
+    _GoogleSheetsStandIn.requests = Counter()
+    _GoogleSheetsStandIn.downloads = Counter()
+    _GoogleSheetsStandIn.failures = Counter()
+    _GoogleSheetsStandIn.workbook = _as_xlsx(SHEETS)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _GoogleSheetsStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+
+    def download_url(sheet_id: str, sheet_name: str) -> str:
+        return f'{base}/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}'
+
+    monkeypatch.setattr('schemasheets.utils.google_sheets.gsheets_download_url', download_url)
+    monkeypatch.setattr('schemasheets.schemamaker.gsheets_download_url', download_url)
+    monkeypatch.setattr('schemasheets.utils.google_sheets.gsheets_workbook_url',
+                        lambda sheet_id: f'{base}/{sheet_id}/export?format=xlsx')
+    yield _GoogleSheetsStandIn
+    server.shutdown()
+    server.server_close()
+
+
+def test_gsheets_each_tab_downloaded_once(gsheets_server, tmp_path):
+    """
+    Tests that all tabs are downloaded exactly once, even when caching a copy
+    """
+    expected = SchemaMaker().create_schema([os.path.join(INPUT_DIR, f'{s}.tsv') for s in SHEETS])
+    sm = SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path), gsheet_concurrency=3)
+    schema = sm.create_schema(SHEETS)
+    assert yaml_dumper.dumps(schema) == yaml_dumper.dumps(expected)
+    assert gsheets_server.requests == Counter({s: 1 for s in SHEETS})
+    for s in SHEETS:
+        assert (tmp_path / 'TEST' / f'{s}.csv').read_bytes().decode('utf-8') == _as_csv(s).decode('utf-8')
+
+
+def test_gsheets_retry(gsheets_server):
+    """
+    Tests that transient errors are retried, and permanent errors are not
+    """
+    gsheets_server.failures['types'] = 2
+    sm = SchemaMaker(gsheet_id='TEST', gsheet_retries=2)
+    sm._sheet_fetcher = lambda: SheetFetcher(retries=2, backoff=0.01)
+    schema = sm.create_schema(['types'])
+    assert 'DecimalDegree' in schema.types
+    assert gsheets_server.requests['types'] == 3
+    with pytest.raises(FetchError):
+        sm.create_schema(['no_such_tab'])
+    assert gsheets_server.requests['no_such_tab'] == 1
+
+
+def test_gsheets_cache(gsheets_server, tmp_path):
+    """
+    Tests that cached tabs are revalidated rather than downloaded again, and that
+    offline builds only use the cache
+    """
+    expected = yaml_dumper.dumps(SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path)).create_schema(SHEETS))
+    assert gsheets_server.downloads == Counter({s: 1 for s in SHEETS})
+    # revalidated: one request per tab, no downloads
+    schema = SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path)).create_schema(SHEETS)
+    assert yaml_dumper.dumps(schema) == expected
+    assert gsheets_server.requests == Counter({s: 2 for s in SHEETS})
+    assert gsheets_server.downloads == Counter({s: 1 for s in SHEETS})
+    # fresh within the ttl, or offline: no requests at all
+    for sm in [SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path), gsheet_cache_ttl=3600),
+               SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path), offline=True)]:
+        schema = sm.create_schema(SHEETS)
+        assert yaml_dumper.dumps(schema) == expected
+    assert gsheets_server.requests == Counter({s: 2 for s in SHEETS})
+    # a different spreadsheet with the same tab names is not served from the cache
+    with pytest.raises(FetchError):
+        SchemaMaker(gsheet_id='OTHER', gsheet_cache_dir=str(tmp_path), offline=True).create_schema(SHEETS)
+    with pytest.raises(ValueError):
+        SchemaMaker(gsheet_id='TEST', offline=True).create_schema(SHEETS)
+
+
+def test_sheet_cache_eviction(gsheets_server, tmp_path):
+    """
+    Tests that least recently used entries are evicted, except those in use
+    """
+    cache = SheetCache(tmp_path, max_size=1)
+    SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path)).create_schema(['types', 'prefixes'])
+    sm = SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path), gsheet_cache_max_size=1)
+    sm.create_schema(['types'])
+    assert cache.path('TEST/types.csv').exists()
+    assert not cache.path('TEST/prefixes.csv').exists()
+    sm = SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path), gsheet_cache_max_age=0)
+    sm.create_schema(['prefixes'])
+    assert cache.path('TEST/prefixes.csv').exists()
+    assert not cache.path('TEST/types.csv').exists()
+
+
+def test_sheet_cache_keyed_by_sheet(gsheets_server, tmp_path):
+    """
+    Tests that tabs with the same name in different sheets are cached separately
+    """
+    SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path)).create_schema(SHEETS)
+    SchemaMaker(gsheet_id='OTHER', gsheet_cache_dir=str(tmp_path)).create_schema(SHEETS)
+    cache = SheetCache(tmp_path)
+    for s in SHEETS:
+        assert cache.path(f'TEST/{s}.csv').exists()
+        assert cache.path(f'OTHER/{s}.csv').exists()
+    requests = gsheets_server.requests.copy()
+    SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path), gsheet_cache_ttl=3600).create_schema(SHEETS)
+    assert gsheets_server.requests == requests
+
+
+def test_sheet_cache_evict_missing_entry(gsheets_server, tmp_path):
+    """
+    Tests that eviction skips entries whose sheet was removed by another process
+    """
+    SchemaMaker(gsheet_id='TEST', gsheet_cache_dir=str(tmp_path)).create_schema(['types', 'prefixes'])
+    cache = SheetCache(tmp_path, max_size=1)
+    read_meta = cache._read_meta
+
+    def read_meta_then_remove(name):
+        meta = read_meta(name)
+        if name == 'TEST/types.csv':
+            cache.path(name).unlink()
+        return meta
+
+    cache._read_meta = read_meta_then_remove
+    cache.evict(keep=['TEST/prefixes.csv'])
+    assert cache.path('TEST/prefixes.csv').exists()
+
+
+def test_file_lock(tmp_path):
+    """
+    Tests that a held lock cannot be acquired again until it is released
+    """
+    path = tmp_path / 'test.lock'
+    with file_lock(path):
+        with file_lock(path, blocking=False) as locked:
+            assert not locked
+    with file_lock(path, blocking=False) as locked:
+        assert locked
+
+
+def test_gsheets_workbook(gsheets_server, tmp_path):
+    """
+    Tests downloading all tabs as a single workbook, with and without tab discovery
+    """
+    expected = yaml_dumper.dumps(SchemaMaker().create_schema([os.path.join(INPUT_DIR, f'{s}.tsv') for s in SHEETS]))
+    sm = SchemaMaker(gsheet_id='TEST', gsheet_workbook=True, gsheet_cache_dir=str(tmp_path))
+    assert yaml_dumper.dumps(sm.create_schema(SHEETS)) == expected
+    assert gsheets_server.requests == Counter({WORKBOOK: 1})
+    # all schema sheet tabs are found, and the 'notes' tab is skipped
+    assert yaml_dumper.dumps(sm.create_schema([])) == expected
+    assert gsheets_server.requests == Counter({WORKBOOK: 2})
+    assert gsheets_server.downloads == Counter({WORKBOOK: 1})
+    with pytest.raises(ValueError, match='No tab named'):
+        sm.create_schema(['no_such_tab'])
+
+
+def test_worksheet_rows_keep_line_numbers():
+    """
+    Tests that empty rows within a worksheet are kept, so rows have the same line numbers as in a CSV export
+    """
+    workbook = Workbook()
+    worksheet = workbook.active
+    for row in [['class', 'desc'], ['> class', 'description'], [], ['Person', 'a person'], [], []]:
+        worksheet.append(row)
+    # formatting makes trailing rows part of the worksheet, without giving them values
+    worksheet.cell(row=8, column=1).number_format = '0.00'
+    out = io.BytesIO()
+    workbook.save(out)
+    rows = list(worksheet_rows(open_workbook(out.getvalue()).active))
+    assert rows == [{'class': '> class', 'desc': 'description'},
+                    {'class': '', 'desc': ''},
+                    {'class': 'Person', 'desc': 'a person'}]
@@ -1,4 +1,6 @@
-from schemasheets.schemasheet_datamodel import SchemaSheet
+import pytest
+
+from schemasheets.schemasheet_datamodel import SchemaSheet, get_metaslot_index, lookup_metaslot
 
 RECORD = "Record"
 FIELD = "Field"
@@ -120,3 +122,39 @@ def test_parse_header():
 
 
 
+
+
+def test_streaming_rows():
+    """
+    Tests that in streaming mode, descriptors are parsed up front and data rows are yielded lazily
+    """
+    rows = [
+        {RECORD: "> class", INFO: " description"},
+        {RECORD: "Person", INFO: "a person"},
+        {RECORD: "Organization", INFO: "an organization"},
+    ]
+    ss = SchemaSheet.from_dictreader(iter(rows), stream=True)
+    assert ss.table_config.columns[INFO].maps_to == "description"
+    assert ss.start_line_number == 2
+    assert not isinstance(ss.rows, list)
+    assert [row[RECORD] for row in ss.rows] == ["Person", "Organization"]
+    # descriptors may not follow data rows when streaming
+    rows.append({RECORD: "> class", INFO: " description"})
+    ss = SchemaSheet.from_dictreader(iter(rows), stream=True)
+    with pytest.raises(ValueError):
+        list(ss.rows)
+
+
+def test_metaslot_index():
+    """
+    Tests the shared, read-only index of metamodel slots
+    """
+    snmap = get_metaslot_index()
+    assert snmap is get_metaslot_index()
+    assert snmap["uri"] is snmap["type_uri"]
+    assert snmap["description"].name == "description"
+    with pytest.raises(TypeError):
+        snmap["foo"] = snmap["description"]
+    assert lookup_metaslot("metaslot.range") == ("range", snmap["range"])
+    assert lookup_metaslot("type") == ("type", None)
+    assert lookup_metaslot("class") == ("class", None)
@@ -0,0 +1,35 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+CLI_MODULES = [
+    'schemasheets.schemamaker',
+    'schemasheets.schema_exporter',
+    'schemasheets.sheets_to_project',
+    'schemasheets.generate_populate',
+]
+
+DEFERRED_MODULES = ['bioregistry', 'linkml.generators', 'openpyxl']
+"""Slow to import, and only needed for some features, e.g. repairing prefixes or generating a project"""
+
+MODULES = '''
+import json, sys
+import {module}
+print(json.dumps(sorted(sys.modules)))
+'''
+
+
+@pytest.mark.parametrize('module', CLI_MODULES)
+def test_deferred_imports(module):
+    """
+    Tests that command line modules start quickly, by deferring slow imports until they are needed
+
+    The import time itself is checked against a baseline by benchmarks/gate.py
+    """
+    out = subprocess.run([sys.executable, '-c', MODULES.format(module=module)],
+                         check=True, capture_output=True, text=True).stdout
+    modules = json.loads(out.splitlines()[-1])
+    for deferred in DEFERRED_MODULES:
+        assert not [m for m in modules if m == deferred or m.startswith(f'{deferred}.')]
@@ -0,0 +1,49 @@
+import json
+
+from schemasheets.utils import metamodel_snapshot
+from schemasheets.utils.metamodel_snapshot import get_snapshot, build_snapshot, snapshot_key
+
+
+def test_shipped_snapshot():
+    """
+    Tests that the snapshot shipped with schemasheets is up to date with the installed metamodel;
+    regenerate it with python -m schemasheets.utils.metamodel_snapshot if this fails
+    """
+    snapshot = get_snapshot()
+    assert snapshot['key'] == snapshot_key()
+    assert snapshot == build_snapshot()
+    assert snapshot['slots']['range'] == {'name': 'range', 'range': 'element', 'multivalued': None}
+    assert snapshot['types']['integer'] == 'int'
+    assert 'one_to_many' in snapshot['cardinality']
+
+
+def test_cached_snapshot(tmp_path, monkeypatch):
+    """
+    Tests that a snapshot is generated in the cache directory when the shipped snapshot does not match
+    """
+    monkeypatch.setenv(metamodel_snapshot.CACHE_DIR_ENV, str(tmp_path))
+    monkeypatch.setattr(metamodel_snapshot, 'SHIPPED_SNAPSHOT', 'no-such-snapshot.json')
+    get_snapshot.cache_clear()
+    try:
+        snapshot = get_snapshot()
+    finally:
+        get_snapshot.cache_clear()
+    path = tmp_path / f'metamodel-{snapshot_key()}.json'
+    with open(path, encoding='utf-8') as stream:
+        assert json.load(stream) == snapshot
+
+
+def test_snapshot_not_stored_by_default(tmp_path, monkeypatch):
+    """
+    Tests that a generated snapshot is only kept in memory unless a cache directory is set
+    """
+    monkeypatch.delenv(metamodel_snapshot.CACHE_DIR_ENV, raising=False)
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    monkeypatch.setattr(metamodel_snapshot, 'SHIPPED_SNAPSHOT', 'no-such-snapshot.json')
+    get_snapshot.cache_clear()
+    try:
+        assert get_snapshot()['key'] == snapshot_key()
+    finally:
+        get_snapshot.cache_clear()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,69 @@
+import io
+import json
+import os
+
+from linkml_runtime.utils.schemaview import SchemaView
+
+from schemasheets.schema_exporter import SchemaExporter
+from schemasheets.schemamaker import SchemaMaker
+from schemasheets.utils.profiler import Profiler
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+INPUT_DIR = os.path.join(ROOT, 'input')
+OUTPUT_DIR = os.path.join(ROOT, 'output')
+
+
+def test_profile_schemamaker():
+    """
+    Tests that each phase of translation is recorded, with row counts for each sheet
+    """
+    sheets = [os.path.join(INPUT_DIR, f'{s}.tsv') for s in ['personinfo', 'types']]
+    with Profiler(command='test') as profiler:
+        sm = SchemaMaker(profiler=profiler)
+        sm.repair_schema(sm.create_schema(sheets))
+    for phase in ['read', 'parse_descriptors', 'add_row', 'finalize_elements', 'tidy_slot_usage']:
+        assert phase in profiler.phases
+        assert profiler.phases[phase].peak_memory is not None
+    assert profiler.phases['read'].calls == 2
+    assert profiler.phases['add_row'].calls == 2
+    assert profiler.sheets[sheets[0]].rows == 12
+    assert profiler.sheets[sheets[1]].rows == 2
+    # nested phases are not counted twice
+    assert sum(s.wall_time for s in profiler.phases.values()) <= profiler.total_time
+    report = profiler.report()
+    assert 'add_row' in report
+    assert 'personinfo.tsv' in report
+    obj = json.loads(profiler.to_json())
+    assert obj['command'] == 'test'
+    assert [p['name'] for p in obj['phases']] == list(profiler.phases)
+    assert obj['sheets'][0]['rows'] == 12
+
+
+def test_profile_exporter():
+    """
+    Tests profiling export, without memory tracing
+    """
+    sv = SchemaView(SchemaMaker().create_schema(os.path.join(INPUT_DIR, 'personinfo.tsv')))
+    spec = os.path.join(INPUT_DIR, 'personinfo.tsv')
+    with Profiler(track_memory=False) as profiler:
+        SchemaExporter(profiler=profiler).export(sv, specification=spec,
+                                                  to_file=os.path.join(OUTPUT_DIR, 'personinfo-profiled.tsv'))
+    assert list(profiler.phases) == ['parse_specification', 'export_elements', 'write']
+    assert all(p.peak_memory is None for p in profiler.phases.values())
+    assert profiler.sheets[spec].rows > 0
+
+
+def test_profile_export_many():
+    """
+    Tests that exporting several sheets in one traversal attributes export time to each sheet
+    """
+    sv = SchemaView(SchemaMaker().create_schema(os.path.join(INPUT_DIR, 'personinfo.tsv')))
+    specs = [os.path.join(INPUT_DIR, f'{s}.tsv') for s in ['personinfo', 'types']]
+    with Profiler(track_memory=False) as profiler:
+        SchemaExporter(profiler=profiler).export_many(sv, [(spec, io.StringIO()) for spec in specs])
+    sheets = [profiler.sheets[spec] for spec in specs]
+    assert all(s.rows > 0 for s in sheets)
+    # the time to parse specifications, and to export and write rows, is split between the sheets
+    assert sum(s.wall_time for s in sheets) >= sum(profiler.phases[p].wall_time
+                                                   for p in ['parse_specification', 'export_elements', 'write'])
+    assert sum(s.wall_time for s in sheets) <= profiler.total_time
@@ -1,15 +1,18 @@
+import io
 import logging
 import os
 
+import pytest
+
 from linkml.utils.schema_builder import SchemaBuilder
 from linkml.utils.schema_fixer import SchemaFixer
 from linkml_runtime.dumpers import yaml_dumper
-from linkml_runtime.linkml_model import TypeDefinition, Annotation
+from linkml_runtime.linkml_model import TypeDefinition, Annotation, EnumDefinition, PermissibleValue
 from linkml_runtime.utils.introspection import package_schemaview
 from linkml_runtime.utils.schemaview import SchemaView, SchemaDefinition, SlotDefinition, ClassDefinition, YAMLRoot
-from schemasheets.schema_exporter import SchemaExporter
+from schemasheets.schema_exporter import SchemaExporter, ExportPlan, compile_renderer, RowSink
 from schemasheets.schemamaker import SchemaMaker
-from schemasheets.schemasheet_datamodel import SchemaSheet
+from schemasheets.schemasheet_datamodel import SchemaSheet, ColumnConfig
 
 ROOT = os.path.abspath(os.path.dirname(__file__))
 INPUT_DIR = os.path.join(ROOT, 'input')
@@ -65,7 +68,7 @@ def test_roundtrip_schema():
     sm = SchemaMaker()
     # sheets2linkml, from SHEET
     schema = sm.create_schema(SHEET)
-    exporter = SchemaExporter(schemamaker=sm)
+    exporter = SchemaExporter(schemamaker=sm, keep_rows=True)
     sv = SchemaView(schema)
     # linkml2sheets, using original sheets as specification
     # (note that this ignores the main data in the TSV)
@@ -223,7 +226,7 @@ def test_export_metamodel_slots():
     sm = SchemaMaker()
     metamodel_sv = package_schemaview('linkml_runtime.linkml_model.meta')
     metamodel_schema = metamodel_sv.schema
-    exporter = SchemaExporter(schemamaker=sm)
+    exporter = SchemaExporter(schemamaker=sm, keep_rows=True)
     sv = SchemaView(metamodel_schema)
     exporter.export(sv, specification=SLOT_SPEC, to_file=MINISHEET)
     all_of_slot_rows = [row for row in exporter.rows if row['slot'] == 'all_of']
@@ -233,3 +236,157 @@ def test_export_metamodel_slots():
     # of this will change
     examples = s['examples']
     assert 'bibo:draft' == examples
+
+
+def test_export_plan():
+    """
+    Tests that the columns used to export each type of element are computed once per table configuration
+    """
+    table_config = SchemaSheet.from_csv(TEST_SPEC).table_config
+    plan = SchemaExporter.export_plan(table_config)
+    assert isinstance(plan, ExportPlan)
+    assert SchemaExporter.export_plan(table_config) is plan
+    slot_usage_plan = plan.element_plan(SlotDefinition, ClassDefinition)
+    assert (slot_usage_plan.pk_col, slot_usage_plan.parent_pk_col) == ('field', 'record')
+    assert plan.element_plan(ClassDefinition).pk_col == 'record'
+    assert plan.element_plan(SlotDefinition, ClassDefinition) is slot_usage_plan
+    assert [c[0] for c in slot_usage_plan.columns if c[2] is None] == ['record', 'field']
+    # the notes column is ignored
+    assert 'notes' not in [c[0] for c in slot_usage_plan.columns]
+    assert [c[1] for c in slot_usage_plan.columns if c[0] == 'desc'] == ['description']
+    assert plan.exports(SlotDefinition)
+    assert not plan.exports(EnumDefinition)
+    assert not plan.exports(PermissibleValue)
+    table_config.add_info('comments', 'comments')
+    assert SchemaExporter.export_plan(table_config) is not plan
+
+
+def _column(*info) -> ColumnConfig:
+    cc = ColumnConfig('col')
+    for i in info:
+        cc.add_info(i)
+    return cc
+
+
+def test_compile_renderer():
+    """
+    Tests rendering metaslot values as cells, for each kind of column setting
+    """
+    assert compile_renderer(_column('aliases'))(['a', 'b']) == 'a|b'
+    assert compile_renderer(_column('aliases', {'internal_separator': ';'}))(['a', 'b']) == 'a;b'
+    assert compile_renderer(_column('aliases'))([]) is None
+    render = compile_renderer(_column({'exact_mappings': {'curie_prefix': 'sdo'}}))
+    assert render(['sdo:name', 'wd:Q1', 'sdo:Person']) == 'name|Person'
+    assert render(['wd:Q1']) is None
+    render = compile_renderer(_column('annotations', {'inner_key': 'special'}))
+    slot = SlotDefinition('s', annotations=[Annotation('special', 'x'), Annotation('other', 'y')])
+    assert render(slot.annotations) == 'x'
+    assert compile_renderer(_column('identifier'))(True) == 'true'
+    assert compile_renderer(_column('identifier'))(None) is None
+
+
+class ListSink(RowSink):
+    def __init__(self):
+        self.fieldnames = None
+        self.rows = []
+        self.closed = False
+
+    def start(self, fieldnames, descriptor_rows):
+        self.fieldnames = fieldnames
+
+    def write_row(self, row):
+        self.rows.append(row)
+
+    def close(self):
+        self.closed = True
+
+
+def test_export_streams_rows():
+    """
+    Tests that rows are passed to a sink, not kept, and that each export starts afresh
+    """
+    sm = SchemaMaker()
+    sv = SchemaView(sm.create_schema(SHEET))
+    exporter = SchemaExporter(schemamaker=sm)
+    sink = ListSink()
+    exporter.export(sv, specification=SHEET, sink=sink)
+    assert sink.closed
+    assert 'record' in sink.fieldnames
+    assert exporter.rows == []
+    assert exporter.row_count == len(sink.rows)
+    for record in EXPECTED:
+        assert record in sink.rows
+    # a second export with the same exporter only has rows for its own specification
+    stream = io.StringIO()
+    exporter.export(sv, specification=ENUM_SPEC, to_file=stream)
+    lines = stream.getvalue().splitlines()
+    assert exporter.row_count < len(sink.rows)
+    # header, descriptor rows, then exported rows
+    assert len(lines) == 1 + len(SchemaSheet.from_csv(ENUM_SPEC).table_config_rows) + exporter.row_count
+    assert not [line for line in lines if line.startswith('Person\t')]
+
+
+def test_export_many():
+    """
+    Tests exporting to several sheets in a single traversal, giving the same sheets as separate exports
+    """
+    sm = SchemaMaker()
+    sv = SchemaView(sm.create_schema(SHEET))
+    specs = [SHEET, ENUM_SPEC, TYPES_SPEC, PREFIXES_SPEC, SLOT_SPEC]
+    expected = []
+    for spec in specs:
+        stream = io.StringIO()
+        SchemaExporter().export(sv, specification=spec, to_file=stream)
+        expected.append(stream.getvalue())
+    calls = []
+    all_slots = sv.all_slots
+
+    def counting_all_slots(*args, **kwargs):
+        calls.append(args)
+        return all_slots(*args, **kwargs)
+
+    sv.all_slots = counting_all_slots
+    streams = [io.StringIO() for _ in specs]
+    exporter = SchemaExporter()
+    exporter.export_many(sv, list(zip(specs, streams)))
+    assert [s.getvalue() for s in streams] == expected
+    assert len(calls) == 1
+    assert exporter.row_count == sum(len(e.splitlines()) for e in expected) - \
+        sum(1 + len(SchemaSheet.from_csv(spec).table_config_rows) for spec in specs)
+
+
+def test_failed_export_keeps_sheet(tmp_path):
+    """
+    Tests that a sheet exported in place is left unchanged if the export fails
+    """
+    schema = SchemaDefinition('test', id='test', enums={'E': EnumDefinition('E', permissible_values=['a'])})
+    sheet = tmp_path / 'pv.tsv'
+    content = 'permissible_value\tdesc\n> permissible_value\tdescription\nx\tmy value\n'
+    sheet.write_text(content)
+    with pytest.raises(ValueError, match='floating permissible value'):
+        SchemaExporter().export_many(SchemaView(schema), [(str(sheet), sheet)])
+    assert sheet.read_text() == content
+    assert [p.name for p in tmp_path.iterdir()] == ['pv.tsv']
+
+
+def test_export_same_path_twice(tmp_path):
+    """
+    Tests that a sheet can be exported to the same path more than once in one process
+    """
+    sv = SchemaView(SchemaMaker().create_schema(SHEET))
+    path = tmp_path / 'enums.tsv'
+    expected = io.StringIO()
+    SchemaExporter().export(sv, specification=ENUM_SPEC, to_file=expected)
+    exporter = SchemaExporter()
+    exporter.export_many(sv, [(ENUM_SPEC, path), (ENUM_SPEC, path)])
+    exporter.export(sv, specification=ENUM_SPEC, to_file=path)
+    assert path.read_bytes().decode('utf-8') == expected.getvalue()
+    assert [p.name for p in tmp_path.iterdir()] == ['enums.tsv']
+
+
+def test_row_sink_is_abstract():
+    class IncompleteSink(RowSink):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteSink()
@@ -1,17 +1,41 @@
 import logging
 import os
+from pathlib import Path
+from typing import List
+
+import pytest
 
 from linkml.generators.projectgen import ProjectGenerator, ProjectConfiguration
 from linkml_runtime.dumpers import yaml_dumper
+from linkml_runtime.linkml_model import SlotDefinition, ClassDefinition, SchemaDefinition, Prefix
 from linkml_runtime.utils.schemaview import SchemaView
 
-from schemasheets.schemamaker import SchemaMaker, get_metamodel, SchemaSheetRowException
+from schemasheets.schemamaker import SchemaMaker, get_metamodel, SchemaSheetRowException, compile_normalizer, \
+    merge_element
+from schemasheets.schemasheet_datamodel import TableConfig
+from schemasheets.utils.element_builder import ElementBuilder
+from schemasheets.utils.file_watcher import FileWatcher
+from schemasheets.utils.fragment_cache import FragmentCache
+from schemasheets.utils import prefixtool
+from schemasheets.utils.prefixtool import PrefixResolver
 
 ROOT = os.path.abspath(os.path.dirname(__file__))
 INPUT_DIR = os.path.join(ROOT, 'input')
 OUTPUT_DIR = os.path.join(ROOT, 'output')
 PROBLEM_DIR = os.path.join(INPUT_DIR, 'problem_cases')
 
+
+def _write_tsv(path: Path, rows: List[List[str]]) -> str:
+    """
+    Writes a small sheet used as a test fixture
+
+    :param path:
+    :param rows: header, descriptor and data rows
+    :return: path of the sheet
+    """
+    path.write_text(''.join('\t'.join(row) + '\n' for row in rows))
+    return str(path)
+
 def test_meta():
     sv = get_metamodel()
     #logging.info(sv)
@@ -106,6 +130,62 @@ def test_cardinality():
     assert 'wikidata:Q215627' in person_cls.exact_mappings
     assert 'sdo:Person' in person_cls.exact_mappings
 
+def test_cardinality_vocabulary(tmp_path):
+    """
+    Tests cardinality columns using different vocabularies, and mapping other terms using vmap
+    """
+    sheet = _write_tsv(tmp_path / 'cardinality.tsv', [
+        ['class', 'slot', 'mixs', 'ena'],
+        ['> class', 'slot', 'cardinality', 'cardinality'],
+        ['>', '', 'cardinality_vocabulary: mixs_notation', 'vmap: {Y: mandatory, N: optional}'],
+        ['Sample', 'depth', 'M', ''],
+        ['Sample', 'temperature', 'X', ''],
+        ['Sample', 'size', '1..*', ''],
+        ['Study', 'depth', '', 'Y'],
+        ['Study', 'size', '', 'N'],
+    ])
+    schema = SchemaMaker().create_schema(sheet)
+    sample = schema.classes['Sample']
+    assert sample.slot_usage['depth'].required
+    assert sample.slot_usage['temperature'].required is False
+    assert sample.slot_usage['size'].required
+    assert sample.slot_usage['size'].multivalued
+    study = schema.classes['Study']
+    assert study.slot_usage['depth'].required
+    assert study.slot_usage['size'].required is False
+    with pytest.raises(ValueError, match='Cannot parse cardinality'):
+        SchemaMaker(cardinality_vocabulary='mixs_notation').set_cardinality(SlotDefinition('s'), 'R')
+
+@pytest.mark.parametrize('jobs', [None, 2])
+def test_inapplicable_slot_usage(tmp_path, jobs):
+    """
+    Tests that slot usages marked not applicable are removed, together with the slot from the class
+    """
+    sheets = []
+    for name, rows in [('a', [['Sample', 'depth', 'M'], ['Sample', 'ph', '-'], ['Study', 'ph', '-'],
+                              ['Study', 'depth', 'O']]),
+                       ('b', [['Sample', 'size', '-'], ['Sample', 'temperature', 'O']])]:
+        sheets.append(_write_tsv(tmp_path / f'{name}.tsv',
+                                 [['class', 'slot', 'cardinality'], ['> class', 'slot', 'cardinality']] + rows))
+    schema = SchemaMaker(jobs=jobs).create_schema(sheets)
+    sample = schema.classes['Sample']
+    assert sample.slots == ['depth', 'temperature']
+    assert list(sample.slot_usage) == ['depth', 'temperature']
+    study = schema.classes['Study']
+    assert study.slots == ['depth']
+    assert list(study.slot_usage) == ['depth']
+
+def test_descriptor_after_data(tmp_path):
+    """
+    Tests that a descriptor row following data rows applies to the whole sheet, unless rows are streamed
+    """
+    sheet = _write_tsv(tmp_path / 'late.tsv', [['class', 'aliases'], ['> class', 'aliases'], ['Person', 'a|b'],
+                                               ['>', 'internal_separator: "|"']])
+    schema = SchemaMaker().create_schema(sheet)
+    assert schema.classes['Person'].aliases == ['a', 'b']
+    with pytest.raises(ValueError, match='Descriptor rows must precede'):
+        SchemaMaker(stream_rows=True).create_schema(sheet)
+
 def test_prefixes():
     sm = SchemaMaker()
     schema = sm.create_schema(os.path.join(INPUT_DIR, 'prefixes.tsv'))
@@ -114,6 +194,77 @@ def test_prefixes():
     logging.info(yaml)
     assert schema.prefixes['sdo'].prefix_reference == 'http://schema.org/'
 
+def _schema_with_mappings() -> SchemaDefinition:
+    schema = SchemaDefinition(id='http://example.org/test', name='test')
+    schema.classes['Person'] = ClassDefinition('Person', exact_mappings=['sdo:Person', 'foaf:Person'])
+    schema.slots['name'] = SlotDefinition('name', close_mappings=['NOSUCHPREFIX:name'])
+    return schema
+
+
+def test_repair_with_prefix_map(tmp_path, monkeypatch):
+    """
+    Tests that missing prefixes are filled in from a local prefix map, without guessing
+    """
+    monkeypatch.setattr(prefixtool, 'guess_prefix_expansion', lambda pfx: pytest.fail('should not guess'))
+    prefix_map_path = tmp_path / 'prefixes.tsv'
+    prefix_map_path.write_text('prefix\texpansion\nsdo\thttp://schema.org/\nFOAF\thttp://xmlns.com/foaf/0.1/\n')
+    schema = SchemaMaker(prefix_map_path=str(prefix_map_path)).repair_schema(_schema_with_mappings())
+    assert schema.prefixes['sdo'].prefix_reference == 'http://schema.org/'
+    assert schema.prefixes['foaf'].prefix_reference == 'http://xmlns.com/foaf/0.1/'
+    assert schema.prefixes['NOSUCHPREFIX'].prefix_reference == 'http://example.org/NOSUCHPREFIX/'
+
+
+def test_repair_prefix_cache(tmp_path, monkeypatch):
+    """
+    Tests that guessed prefixes, including failed guesses, are cached across resolvers
+    """
+    guessed = []
+
+    def guess(pfx):
+        guessed.append(pfx)
+        return {'sdo': 'http://schema.org/'}.get(pfx)
+
+    monkeypatch.setattr(prefixtool, 'guess_prefix_expansion', guess)
+    SchemaMaker(prefix_resolver=PrefixResolver(cache_dir=tmp_path)).repair_schema(_schema_with_mappings())
+    assert {'NOSUCHPREFIX', 'foaf', 'sdo'} <= set(guessed)
+    guessed.clear()
+    schema = SchemaMaker(prefix_resolver=PrefixResolver(cache_dir=tmp_path)).repair_schema(_schema_with_mappings())
+    assert guessed == []
+    assert schema.prefixes['sdo'].prefix_reference == 'http://schema.org/'
+    assert schema.prefixes['foaf'].prefix_reference == 'http://example.org/foaf/'
+    # guesses are cached in --cache-dir
+    cache_dir = tmp_path / 'cache'
+    SchemaMaker(cache_dir=str(cache_dir)).repair_schema(_schema_with_mappings())
+    assert len(list(cache_dir.glob('prefixes-*.json'))) == 1
+    # without a cache directory, nothing is written
+    home = tmp_path / 'home'
+    home.mkdir()
+    monkeypatch.delenv('SCHEMASHEETS_CACHE_DIR', raising=False)
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.setenv('XDG_CACHE_HOME', str(home / '.cache'))
+    guessed.clear()
+    SchemaMaker().repair_schema(_schema_with_mappings())
+    assert 'sdo' in guessed
+    assert list(home.iterdir()) == []
+
+def test_repair_schema_references(tmp_path):
+    """
+    Tests that repair fills in prefixes of mappings in slot_usage, and subsets referenced by any element
+    """
+    schema = _schema_with_mappings()
+    schema.default_prefix = 'test'
+    schema.prefixes['test'] = Prefix('test', 'http://example.org/test/')
+    schema.classes['Person'].slot_usage['name'] = SlotDefinition('name', exact_mappings=['rdfs:label'],
+                                                                 in_subset=['basic'])
+    schema.slots['name'].in_subset = ['basic', 'core']
+    prefix_map_path = tmp_path / 'prefixes.json'
+    prefix_map_path.write_text('{"rdfs": "http://www.w3.org/2000/01/rdf-schema#"}')
+    schema = SchemaMaker(prefix_map_path=str(prefix_map_path)).repair_schema(schema)
+    assert schema.prefixes['rdfs'].prefix_reference == 'http://www.w3.org/2000/01/rdf-schema#'
+    assert 'http' not in schema.prefixes
+    assert list(schema.subsets) == ['basic', 'core']
+    assert schema.classes['Person'].from_schema == schema.id
+
 def test_types():
     sm = SchemaMaker()
     schema = sm.create_schema(os.path.join(INPUT_DIR, 'types.tsv'))
@@ -208,6 +359,183 @@ def test_combined():
     project_config.directory = str(os.path.join(OUTPUT_DIR, 'personinfo'))
     pgen.generate(outf, project_config)
 
+def test_combined_parallel():
+    """
+    Tests that translating sheets in parallel gives the same schema as translating them in turn
+    """
+    sheets = ['schema', 'prefixes', 'enums', 'types', 'subsets', 'personinfo']
+    files = [os.path.join(INPUT_DIR, f'{s}.tsv') for s in sheets]
+    schema = SchemaMaker().create_schema(files)
+    schema_parallel = SchemaMaker(jobs=2).create_schema(files)
+    assert yaml_dumper.dumps(schema_parallel) == yaml_dumper.dumps(schema)
+
+def test_overlapping_sheets_parallel(tmp_path):
+    """
+    Tests that sheets describing the same slot usages give the same schema when translated in parallel
+    or from the cache as when translated in turn; later sheets replace slot usages of earlier ones
+    """
+    sheets = []
+    for name, rows in [('a', [['Sample', 'depth', 'one', 'M'], ['Sample', 'ph', '', '-'],
+                              ['Study', 'depth', '', 'O']]),
+                       ('b', [['Sample', 'depth', 'two', 'O'], ['Sample', 'ph', 'acidity', 'O'],
+                              ['Study', 'size', '', '-']])]:
+        sheets.append(_write_tsv(tmp_path / f'{name}.tsv',
+                                 [['class', 'slot', 'desc', 'cardinality'],
+                                  ['> class', 'slot', 'description', 'cardinality']] + rows))
+    schema = SchemaMaker().create_schema(sheets)
+    depth = schema.classes['Sample'].slot_usage['depth']
+    assert (depth.description, depth.required) == ('two', False)
+    assert schema.classes['Sample'].slots == ['depth', 'ph']
+    assert schema.classes['Study'].slots == ['depth']
+    expected = yaml_dumper.dumps(schema)
+    assert yaml_dumper.dumps(SchemaMaker(jobs=2).create_schema(sheets)) == expected
+    cache_dir = str(tmp_path / 'cache')
+    assert yaml_dumper.dumps(SchemaMaker(cache_dir=cache_dir).create_schema(sheets)) == expected
+    assert yaml_dumper.dumps(SchemaMaker(cache_dir=cache_dir).create_schema(sheets)) == expected
+    # a real conflict names the sheet
+    conflicting = [_write_tsv(tmp_path / f'{name}.tsv', [['class', 'desc'], ['> class', 'description'],
+                                                         ['Sample', desc]])
+                   for name, desc in [('c', 'a sample'), ('d', 'another sample')]]
+    with pytest.raises(SchemaSheetRowException, match='Cannot reset value for desc'):
+        SchemaMaker().create_schema(conflicting)
+    with pytest.raises(SchemaSheetRowException, match='d.tsv'):
+        SchemaMaker(jobs=2).create_schema(conflicting)
+
+
+def test_fragment_cache(tmp_path, monkeypatch):
+    """
+    Tests that translated sheets are cached, and that only changed sheets are translated again
+    """
+    cache_dir = tmp_path / 'cache'
+    sheets = ['schema', 'prefixes', 'enums', 'types', 'subsets', 'personinfo']
+    files = []
+    for s in sheets:
+        path = tmp_path / f'{s}.tsv'
+        path.write_text(open(os.path.join(INPUT_DIR, f'{s}.tsv')).read())
+        files.append(str(path))
+    expected = yaml_dumper.dumps(SchemaMaker().create_schema(files))
+    schema = SchemaMaker(cache_dir=str(cache_dir)).create_schema(files)
+    assert yaml_dumper.dumps(schema) == expected
+    assert len(list(cache_dir.glob('*.yaml'))) == len(sheets)
+    translated = []
+    create_schema_fragment = SchemaMaker.create_schema_fragment
+
+    def tracked(self, file_name, **kwargs):
+        translated.append(file_name)
+        return create_schema_fragment(self, file_name, **kwargs)
+
+    monkeypatch.setattr(SchemaMaker, 'create_schema_fragment', tracked)
+    schema = SchemaMaker(cache_dir=str(cache_dir)).create_schema(files)
+    assert yaml_dumper.dumps(schema) == expected
+    assert translated == []
+    # changing a sheet only causes that sheet to be translated again
+    with open(files[3], 'a') as stream:
+        stream.write('MyType\tinteger\txsd:integer\tmy type\t\n')
+    schema = SchemaMaker(cache_dir=str(cache_dir)).create_schema(files)
+    assert translated == [files[3]]
+    assert 'MyType' in schema.types
+    # changing settings invalidates all entries
+    SchemaMaker(cache_dir=str(cache_dir), use_attributes=True).create_schema(files)
+    assert len(translated) == 1 + len(sheets)
+
+def test_watch_rebuild(tmp_path):
+    """
+    Tests the file watching and in-memory fragment cache used by sheets2linkml --watch
+    """
+    sheet = tmp_path / 'types.tsv'
+    sheet.write_text(open(os.path.join(INPUT_DIR, 'types.tsv')).read())
+    watcher = FileWatcher([sheet])
+    assert watcher.changed() == []
+    sm = SchemaMaker(fragment_cache=FragmentCache(in_memory=True))
+    schema = sm.create_schema([str(sheet), os.path.join(INPUT_DIR, 'schema.tsv')])
+    assert 'MyType' not in schema.types
+    assert len(sm.fragment_cache.memory) == 2
+    with open(sheet, 'a') as stream:
+        stream.write('MyType\tinteger\txsd:integer\tmy type\t\n')
+    assert watcher.changed() == [str(sheet)]
+    assert watcher.changed() == []
+    schema = sm.create_schema([str(sheet), os.path.join(INPUT_DIR, 'schema.tsv')])
+    assert 'MyType' in schema.types
+    # entries for the previous version of the sheet are dropped
+    assert len(sm.fragment_cache.memory) == 2
+
+def test_watch_rebuild_overlapping(tmp_path):
+    """
+    Tests that rebuilding after an edit gives the same schema as a fresh build, when sheets overlap
+    """
+    header = [['class', 'slot', 'desc', 'cardinality'], ['> class', 'slot', 'description', 'cardinality']]
+    a = _write_tsv(tmp_path / 'a.tsv', header + [['Sample', 'depth', 'one', 'M'], ['Sample', 'ph', '', '-']])
+    b = _write_tsv(tmp_path / 'b.tsv', header + [['Sample', 'depth', 'two', 'O']])
+    sheets = [a, b]
+    sm = SchemaMaker(fragment_cache=FragmentCache(in_memory=True))
+    for edit in [None, 'Sample\tph\tacidity\tO\n', 'Sample\tsize\t\t-\n']:
+        if edit:
+            with open(b, 'a') as stream:
+                stream.write(edit)
+        expected = yaml_dumper.dumps(SchemaMaker().create_schema(sheets))
+        assert yaml_dumper.dumps(sm.create_schema(sheets)) == expected
+        # rebuilding without changes gives the same schema again
+        assert yaml_dumper.dumps(sm.create_schema(sheets)) == expected
+    assert sm.schema.classes['Sample'].slots == ['depth', 'ph']
+
+
+def test_merge_element():
+    """
+    Tests merging of elements translated from different sheets
+    """
+    c = ClassDefinition('C', slots=['s1'], description='d', slot_usage={'s1': SlotDefinition('s1', required=True)})
+    merge_element(c, ClassDefinition('C', slots=['s1', 's2'], aliases=['x'],
+                                     slot_usage={'s1': SlotDefinition('s1', range='string'),
+                                                 's2': SlotDefinition('s2')}))
+    assert c.slots == ['s1', 's2']
+    assert c.aliases == ['x']
+    # each row for a slot usage creates a new slot usage, replacing any earlier one
+    assert c.slot_usage['s1'].required is None
+    assert c.slot_usage['s1'].range == 'string'
+    assert 's2' in c.slot_usage
+    with pytest.raises(ValueError, match='Cannot reset value'):
+        merge_element(c, ClassDefinition('C', description='d2'))
+
+def test_lookup_element():
+    """
+    Tests looking up elements by type and name in the schema being built
+    """
+    sm = SchemaMaker()
+    sm.schema = SchemaDefinition(id='test', name='test', classes={'Person': ClassDefinition('Person')})
+    person = sm.lookup_element('class', 'Person')
+    assert person is sm.schema.classes['Person']
+    assert sm.get_current_element(ClassDefinition('Person')) is person
+    s = sm.lookup_element('slot', 'name')
+    assert sm.schema.slots['name'] is s
+    assert sm.element_map[('slot', 'name')] is s
+    # attributes are not added as top level slots
+    a = sm.lookup_element('slot', 'age', is_attr=True)
+    assert a.name == 'age'
+    assert 'age' not in sm.schema.slots
+    assert sm.lookup_element('slot', 'name', is_attr=True) is s
+    with pytest.raises(ValueError):
+        sm.lookup_element('permissible_value', 'x')
+
+def test_element_builder():
+    """
+    Tests accumulating element values before building the element
+    """
+    b = ElementBuilder(ClassDefinition, name='Person')
+    assert b.description is None
+    b.description = 'a person'
+    b.aliases.append('human')
+    b.slot_usage['age'] = ElementBuilder(SlotDefinition, name='age', range='integer')
+    b.annotations['special'] = {'tag': 'special', 'value': 'x'}
+    with pytest.raises(AttributeError):
+        b.no_such_slot
+    c = b.build()
+    assert isinstance(c, ClassDefinition)
+    assert c.description == 'a person'
+    assert c.aliases == ['human']
+    assert isinstance(c.slot_usage['age'], SlotDefinition)
+    assert c.slot_usage['age'].range == 'integer'
+    assert c.annotations['special'].value == 'x'
+
 def test_autofill():
     """
     Tests for automatic filling in / repair of incomplete information
@@ -247,6 +575,42 @@ def test_problem_cases():
             raised = True
         assert raised
 
+@pytest.mark.parametrize('stream_rows', [None, True])
+def test_problem_case_line_number(stream_rows):
+    """
+    tests that errors in rows report the line number, whether or not rows are streamed
+    """
+    sm = SchemaMaker(stream_rows=stream_rows)
+    file = os.path.join(PROBLEM_DIR, 'inconsistent_value_case.tsv')
+    with pytest.raises(SchemaSheetRowException, match="Error in line 3"):
+        sm.create_schema(file)
+
+def test_compile_normalizer():
+    """
+    tests compiled per-column normalizers
+    """
+    tc = TableConfig(columns={})
+    tc.add_info('id', 'slot')
+    tc.add_info('key', 'identifier')
+    tc.add_info('aliases', 'aliases')
+    tc.add_info('aliases', {'internal_separator': '|'})
+    tc.add_info('mapping', {'exact_mappings': {'curie_prefix': 'sdo'}})
+    tc.add_info('code', {'description': {'regular_expression_match': r'^\[(\w+)\]'}})
+    assert compile_normalizer(None)(' x ') == 'x'
+    assert compile_normalizer(None)('n/a') is None
+    assert compile_normalizer(tc.columns['key'])('yes') is True
+    assert compile_normalizer(tc.columns['key'])('') is False
+    assert compile_normalizer(tc.columns['aliases'])('a|b') == ['a', 'b']
+    assert compile_normalizer(tc.columns['aliases'])('.') == []
+    assert compile_normalizer(tc.columns['mapping'])('Person') == ['sdo:Person']
+    assert compile_normalizer(tc.columns['mapping'])('wd:Q5') == ['wd:Q5']
+    assert compile_normalizer(tc.columns['code'])('[abc] def') == 'abc'
+    sm = SchemaMaker()
+    normalizers = sm.column_normalizers(tc)
+    assert sm.column_normalizers(tc) is normalizers
+    tc.add_info('desc', 'description')
+    assert 'desc' in sm.column_normalizers(tc)
+
 def test_load_table_config():
     """
     tests loading of table configuration
@@ -4,6 +4,7 @@ from sqlalchemy.sql.ddl import SchemaGenerator
 import schemasheets.schemamaker as ss
 import os
 from linkml_runtime.dumpers import yaml_dumper
+from linkml_runtime.linkml_model.meta import PatternExpression
 import yaml
 
 from schemasheets.schema_exporter import SchemaExporter
@@ -45,6 +46,7 @@ def test_structured_syntax():
     exporter.export(sv, specification=sheet_path, to_file=out_path)
     schema2 = sm.create_schema(out_path)
     #print(yaml_dumper.dumps(schema2))
+    assert isinstance(schema2.slots["full"].structured_pattern, PatternExpression)
     assert schema2.slots["full"].structured_pattern.syntax == "{token} {token}"
     assert schema2.slots["full"].structured_pattern.interpolated
     # test for https://github.com/linkml/schemasheets/issues/67